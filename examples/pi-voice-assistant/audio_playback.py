@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Audio Playback for Pi Zero 2 W
+Plays PCM16 audio from a bounded queue on a background thread so the
+event loop never blocks on the sound card
+"""
+
+import queue
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioPlayer:
+    def __init__(self, sample_rate: int = 24000, channels: int = 1, max_queued_chunks: int = 200):
+        """
+        Initialize audio player
+
+        Args:
+            sample_rate: Output sample rate
+            channels: Output channels
+            max_queued_chunks: Chunks buffered before new audio is dropped
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=max_queued_chunks)
+        self.stream = None
+        self.thread = None
+        self.running = False
+        self.writing = False
+
+        self.played_chunks = 0
+        self.dropped_chunks = 0
+        
+        # RMS of the chunk being played (0-1), e.g. for audio-reactive lighting
+        self.level = 0.0
+
+    def start(self, pyaudio_instance) -> bool:
+        """Open the output stream on an existing PyAudio instance and start playing"""
+        try:
+            import pyaudio
+
+            self.stream = pyaudio_instance.open(
+                format=pyaudio.paInt16,
+                channels=self.channels,
+                rate=self.sample_rate,
+                output=True
+            )
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="audio-playback", daemon=True)
+            self.thread.start()
+            logger.info(f"Audio playback started: {self.sample_rate}Hz")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to start audio playback: {e}")
+            return False
+
+    def play(self, pcm: bytes) -> bool:
+        """Queue PCM16 audio; returns False if the queue is full and the chunk was dropped"""
+        if not self.running:
+            return False
+        try:
+            self.queue.put_nowait(pcm)
+            return True
+        except queue.Full:
+            self.dropped_chunks += 1
+            return False
+
+    def play_all(self, pcm, chunk_bytes: int = 4800) -> bool:
+        """Queue a longer clip in chunks (100 ms at 24 kHz) so clear() can still cut it short"""
+        for offset in range(0, len(pcm), chunk_bytes):
+            if not self.play(pcm[offset:offset + chunk_bytes]):
+                return False
+        return True
+
+    def is_playing(self) -> bool:
+        """True while audio is queued or being written to the sound card"""
+        return self.writing or not self.queue.empty()
+
+    def clear(self):
+        """Drop queued audio, e.g. when the guest starts talking over the assistant"""
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        while self.running:
+            pcm = self.queue.get()
+            if pcm is None:
+                break
+            self.writing = True
+            try:
+                self.level = self._rms(pcm)
+                self.stream.write(pcm)
+                self.played_chunks += 1
+            except Exception as e:
+                logger.error(f"Error playing audio: {e}")
+            finally:
+                self.writing = False
+                if self.queue.empty():
+                    self.level = 0.0
+
+    @staticmethod
+    def _rms(pcm: bytes) -> float:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if not len(samples):
+            return 0.0
+        return min(1.0, float(np.sqrt(np.mean(samples * samples))) / 32768)
+
+    def stop(self):
+        """Stop playback and close the output stream"""
+        if not self.running:
+            return
+        self.running = False
+        self.clear()
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+        try:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+        except Exception as e:
+            logger.error(f"Error closing audio output: {e}")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Confirmation Audio
+Short pre-rendered clips ("Done, lights are off", or an earcon) played the
+moment a tool call succeeds, instead of waiting for the model's spoken reply.
+Clips are raw PCM16 mono at 24 kHz, memory-mapped from disk at startup
+"""
+
+import os
+import mmap
+import logging
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+
+# Phrases rendered by `python confirmation_audio.py render`, keyed like clip files
+DEFAULT_PHRASES = {
+    "control_hotel_lighting.on.success": "Lights on.",
+    "control_hotel_lighting.off.success": "Done, lights are off.",
+    "control_hotel_lighting.goodnight.success": "Goodnight.",
+    "control_hotel_lighting.success": "Done.",
+    "control_hotel_lighting.failure": "Sorry, I couldn't reach the lights.",
+}
+
+
+def earcon(kind: str = "success", volume: float = 0.25) -> bytes:
+    """Two-tone chime: rising for success, falling for failure"""
+    tones = (880.0, 1320.0) if kind == "success" else (660.0, 440.0)
+    samples_per_tone = int(SAMPLE_RATE * 0.08)
+    t = np.arange(samples_per_tone) / SAMPLE_RATE
+    # Short fade in/out so the tones don't click
+    ramp = min(samples_per_tone // 4, int(SAMPLE_RATE * 0.01))
+    envelope = np.ones(samples_per_tone)
+    envelope[:ramp] = np.linspace(0, 1, ramp)
+    envelope[-ramp:] = np.linspace(1, 0, ramp)
+    wave = np.concatenate([np.sin(2 * np.pi * f * t) * envelope for f in tones])
+    return (wave * volume * 32767).astype(np.int16).tobytes()
+
+
+def clip_keys(tool: str, arguments: Dict[str, Any], success: bool) -> List[str]:
+    """Clip keys to try for a tool call, most specific first"""
+    outcome = "success" if success else "failure"
+    variant = arguments.get("scene") or arguments.get("action") or arguments.get("effect")
+    keys = [f"{tool}.{variant}.{outcome}"] if variant else []
+    return keys + [f"{tool}.{outcome}", outcome]
+
+
+class ConfirmationClips:
+    def __init__(self, directory: Optional[str] = None, earcons: bool = True):
+        """
+        Initialize confirmation clips
+
+        Args:
+            directory: Folder of <key>.pcm clips, each with an optional <key>.txt
+                holding what it says (e.g. control_hotel_lighting.off.success.pcm)
+            earcons: Fall back to built-in success/failure chimes
+        """
+        self.directory = directory
+        self.clips = {}
+        self.texts = {}
+        self.files = []
+        if earcons:
+            self.clips["success"] = earcon("success")
+            self.clips["failure"] = earcon("failure")
+
+        self.played = {}
+        self.misses = 0
+
+    def load(self) -> int:
+        """Memory-map every clip in the directory; returns how many were loaded"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return 0
+        loaded = 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".pcm"):
+                continue
+            key = name[:-4]
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        continue
+                    self.clips[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.files.append(self.clips[key])
+                text_path = os.path.join(self.directory, key + ".txt")
+                if os.path.exists(text_path):
+                    with open(text_path) as f:
+                        self.texts[key] = f.read().strip()
+                loaded += 1
+            except OSError as e:
+                logger.warning(f"Skipping confirmation clip {path}: {e}")
+        logger.info(f"Loaded {loaded} confirmation clip(s) from {self.directory}")
+        return loaded
+
+    def lookup(self, tool: str, arguments: Dict[str, Any], result: Dict[str, Any]) -> Optional[Tuple[str, Any]]:
+        """Find the clip for a tool result as (key, clip)"""
+        for key in clip_keys(tool, arguments, bool(result.get("success"))):
+            if key in self.clips:
+                return key, self.clips[key]
+        self.misses += 1
+        return None
+
+    def play(self, player, tool: str, arguments: Dict[str, Any], result: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue the matching clip on an AudioPlayer
+
+        Returns:
+            The clip's text if it has one (so the model can avoid repeating it), else None
+        """
+        found = self.lookup(tool, arguments, result)
+        if not found:
+            return None
+        key, clip = found
+        player.play_all(clip)
+        self.played[key] = self.played.get(key, 0) + 1
+        return self.texts.get(key)
+
+    def close(self):
+        for clip in self.files:
+            clip.close()
+        self.files = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clips": len(self.clips),
+            "played": dict(self.played),
+            "misses": self.misses
+        }
+
+
+def render_clips(directory: str, api_key: str, phrases: Dict[str, str] = None, voice: str = "alloy") -> int:
+    """
+    Render spoken clips with the OpenAI speech API, plus the earcons
+
+    Returns:
+        Number of clips written
+    """
+    import requests
+
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for kind in ("success", "failure"):
+        with open(os.path.join(directory, f"{kind}.pcm"), 'wb') as f:
+            f.write(earcon(kind))
+        written += 1
+
+    for key, text in (phrases or DEFAULT_PHRASES).items():
+        # response_format=pcm is 24 kHz 16-bit mono, the player's own format
+        response = requests.post(
+            "https://api.openai.com/v1/audio/speech",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": "tts-1", "voice": voice, "input": text, "response_format": "pcm"},
+            timeout=30
+        )
+        if response.status_code != 200:
+            logger.error(f"Rendering '{key}' failed: {response.status_code} - {response.text}")
+            continue
+        with open(os.path.join(directory, f"{key}.pcm"), 'wb') as f:
+            f.write(response.content)
+        with open(os.path.join(directory, f"{key}.txt"), 'w') as f:
+            f.write(text + "\n")
+        written += 1
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Render or list confirmation clips")
+    parser.add_argument("command", choices=["render", "earcons", "list"])
+    parser.add_argument("--dir", default=os.getenv('CONFIRMATION_AUDIO_DIR', 'confirmations'))
+    parser.add_argument("--voice", default="alloy")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "render":
+        print(f"Wrote {render_clips(args.dir, os.getenv('OPENAI_API_KEY'), voice=args.voice)} clip(s) to {args.dir}")
+    elif args.command == "earcons":
+        os.makedirs(args.dir, exist_ok=True)
+        for earcon_kind in ("success", "failure"):
+            with open(os.path.join(args.dir, f"{earcon_kind}.pcm"), 'wb') as out:
+                out.write(earcon(earcon_kind))
+        print(f"Wrote earcons to {args.dir}")
+    else:
+        clips = ConfirmationClips(args.dir, earcons=False)
+        clips.load()
+        for clip_key, data in clips.clips.items():
+            print(f"{clip_key:>45}: {len(data) / 2 / SAMPLE_RATE:.2f}s {clips.texts.get(clip_key, '')}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Bounded Conversation Context for the OpenAI Realtime API
+Tracks server-side conversation items and prunes old ones so long
+concierge chats don't get slower and more expensive with every turn
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough token costs used to rank items when the server hasn't told us the size
+CHARS_PER_TOKEN = 4
+AUDIO_TOKENS_PER_SECOND = 10
+
+
+class ConversationContextManager:
+    def __init__(self,
+                 token_budget: int = 6000,
+                 target_ratio: float = 0.6,
+                 keep_recent_items: int = 6,
+                 keep_tool_results: int = 4,
+                 summary_chars: int = 1200,
+                 max_tracked_items: int = 500):
+        """
+        Initialize conversation context manager
+
+        Args:
+            token_budget: Context size (input tokens per response) that triggers pruning
+            target_ratio: Prune down to this fraction of the budget
+            keep_recent_items: Most recent conversation items that are never pruned
+            keep_tool_results: Most recent function call/output pairs that are never pruned
+            summary_chars: Maximum length of the summary replacing pruned turns
+            max_tracked_items: Hard cap on tracked items
+        """
+        self.token_budget = token_budget
+        self.target_ratio = target_ratio
+        self.keep_recent_items = keep_recent_items
+        self.keep_tool_results = keep_tool_results
+        self.summary_chars = summary_chars
+        self.max_tracked_items = max_tracked_items
+
+        self.reset()
+
+        self.items_pruned = 0
+        self.prunes = 0
+
+    def reset(self):
+        """Forget all items; a new Realtime session starts with an empty conversation"""
+        self.items = OrderedDict()
+        self.context_tokens = 0
+        self.pending_deletes = set()
+        self.summary_count = 0
+
+    def _track(self, item: Dict[str, Any]):
+        item_id = item.get("id")
+        if not item_id:
+            return
+        entry = self.items.get(item_id) or {
+            "type": item.get("type"),
+            "role": item.get("role"),
+            "call_id": item.get("call_id"),
+            "text": "",
+            "audio_seconds": 0.0
+        }
+        text = self._item_text(item)
+        if text:
+            entry["text"] = text
+        if item.get("type") == "function_call_output":
+            entry["text"] = item.get("output", "")
+        elif item.get("type") == "function_call":
+            entry["text"] = f"{item.get('name', '')}({item.get('arguments', '')})"
+        self.items[item_id] = entry
+
+        while len(self.items) > self.max_tracked_items:
+            self.items.popitem(last=False)
+
+    @staticmethod
+    def _item_text(item: Dict[str, Any]) -> str:
+        parts = []
+        for content in item.get("content") or []:
+            parts.append(content.get("text") or content.get("transcript") or "")
+        return " ".join(part for part in parts if part)
+
+    @staticmethod
+    def estimate_tokens(entry: Dict[str, Any]) -> int:
+        return len(entry["text"]) // CHARS_PER_TOKEN + int(entry["audio_seconds"] * AUDIO_TOKENS_PER_SECOND) + 4
+
+    def estimated_total(self) -> int:
+        return sum(self.estimate_tokens(entry) for entry in self.items.values())
+
+    def on_event(self, message_type: str, data: Dict[str, Any]):
+        """Observe a Realtime server event"""
+        if message_type == "conversation.item.created":
+            self._track(data.get("item", {}))
+
+        elif message_type == "response.output_item.done":
+            self._track(data.get("item", {}))
+
+        elif message_type == "conversation.item.input_audio_transcription.completed":
+            entry = self.items.get(data.get("item_id"))
+            if entry is not None:
+                entry["text"] = data.get("transcript", "")
+
+        elif message_type == "input_audio_buffer.speech_stopped":
+            entry = self.items.get(data.get("item_id"))
+            if entry is not None and "audio_start_ms" in entry:
+                entry["audio_seconds"] = max(0, data.get("audio_end_ms", 0) - entry["audio_start_ms"]) / 1000
+
+        elif message_type == "input_audio_buffer.speech_started" and data.get("item_id"):
+            # The item for this speech is created later; remember where it started
+            self.items.setdefault(data.get("item_id"), {
+                "type": "message", "role": "user", "call_id": None, "text": "", "audio_seconds": 0.0
+            })["audio_start_ms"] = data.get("audio_start_ms", 0)
+
+        elif message_type == "conversation.item.deleted":
+            item_id = data.get("item_id")
+            self.items.pop(item_id, None)
+            self.pending_deletes.discard(item_id)
+
+        elif message_type == "response.done":
+            usage = (data.get("response") or {}).get("usage") or {}
+            if usage.get("input_tokens"):
+                self.context_tokens = usage["input_tokens"]
+
+    def plan_pruning(self) -> List[Dict[str, Any]]:
+        """
+        Return client events that bring the conversation back under budget
+
+        Old turns are deleted with conversation.item.delete and replaced by one
+        short summary message. The most recent items and tool results are kept.
+        """
+        context_tokens = self.context_tokens or self.estimated_total()
+        if context_tokens <= self.token_budget:
+            return []
+
+        item_ids = [item_id for item_id in self.items if item_id not in self.pending_deletes]
+        protected = set(item_ids[-self.keep_recent_items:]) if self.keep_recent_items else set()
+
+        # Keep the newest tool call/output pairs, matched by call_id
+        recent_calls = []
+        for item_id in reversed(item_ids):
+            call_id = self.items[item_id]["call_id"]
+            if call_id and call_id not in recent_calls:
+                recent_calls.append(call_id)
+            if len(recent_calls) >= self.keep_tool_results:
+                break
+        protected.update(item_id for item_id in item_ids if self.items[item_id]["call_id"] in recent_calls)
+
+        # Prune oldest first until the estimate is under the target
+        scale = context_tokens / max(1, self.estimated_total())
+        target = self.token_budget * self.target_ratio
+        remaining = context_tokens
+        pruned = []
+        for item_id in item_ids:
+            if remaining <= target:
+                break
+            if item_id in protected:
+                continue
+            pruned.append(item_id)
+            remaining -= self.estimate_tokens(self.items[item_id]) * scale
+
+        if not pruned:
+            return []
+
+        messages = [{"type": "conversation.item.delete", "item_id": item_id} for item_id in pruned]
+        summary = self._summary_item(pruned)
+        if summary:
+            messages.append(summary)
+
+        self.pending_deletes.update(pruned)
+        self.items_pruned += len(pruned)
+        self.prunes += 1
+        logger.info(f"Context at ~{context_tokens} tokens (budget {self.token_budget}), "
+                    f"pruning {len(pruned)} old item(s)")
+        return messages
+
+    def _summary_item(self, pruned: List[str]) -> Optional[Dict[str, Any]]:
+        """Build a conversation.item.create with an extractive summary of pruned turns"""
+        lines = []
+        for item_id in pruned:
+            entry = self.items[item_id]
+            if entry["type"] != "message" or not entry["text"]:
+                continue
+            speaker = {"user": "Guest", "assistant": "Assistant"}.get(entry["role"], "Note")
+            lines.append(f"{speaker}: {entry['text'].strip()}")
+        if not lines:
+            return None
+
+        text = " | ".join(lines)
+        if len(text) > self.summary_chars:
+            # Keep the most recent part of the pruned history
+            text = "..." + text[-self.summary_chars:]
+
+        self.summary_count += 1
+        # Insert the summary after the last surviving item before the pruned ones
+        previous = "root"
+        for item_id in self.items:
+            if item_id == pruned[0]:
+                break
+            if item_id not in self.pending_deletes:
+                previous = item_id
+        return {
+            "type": "conversation.item.create",
+            "previous_item_id": previous,
+            "item": {
+                "id": f"ctx_summary_{self.summary_count}",
+                "type": "message",
+                "role": "system",
+                "content": [{
+                    "type": "input_text",
+                    "text": f"Summary of the earlier conversation: {text}"
+                }]
+            }
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self.items),
+            "context_tokens": self.context_tokens,
+            "estimated_tokens": self.estimated_total(),
+            "prunes": self.prunes,
+            "items_pruned": self.items_pruned
+        }
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Energy Gate for Wake Word Detection
+Cheap vectorized energy and zero-crossing check that keeps Porcupine idle
+through sustained silence, replaying a short history into it at speech onset
+so the start of a wake word is never lost
+"""
+
+import time
+import logging
+import numpy as np
+from collections import deque
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Zero-crossing rate (crossings per sample) typical of voiced speech at 16 kHz;
+# hiss and clicks sit well above it, hum below
+SPEECH_ZCR_RANGE = (0.02, 0.30)
+
+
+class EnergyGate:
+    def __init__(self,
+                 frame_ms: float = 32.0,
+                 margin_db: float = 9.0,
+                 min_level_db: float = -60.0,
+                 history_ms: float = 600.0,
+                 hangover_ms: float = 1500.0,
+                 floor_rise_db_per_s: float = 1.0):
+        """
+        Initialize energy gate
+
+        Args:
+            frame_ms: Duration of one Porcupine frame (512 samples at 16 kHz)
+            margin_db: Level above the noise floor that opens the gate
+            min_level_db: Frames quieter than this (dBFS) never open the gate
+            history_ms: Audio kept while closed and replayed into Porcupine on onset
+            hangover_ms: Time the gate stays open after the last loud frame
+            floor_rise_db_per_s: How fast the noise floor follows rising background noise
+        """
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.history = deque(maxlen=max(1, int(history_ms / frame_ms)))
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.floor_rise = floor_rise_db_per_s * frame_ms / 1000
+        self.frame_seconds = frame_ms / 1000
+
+        self.noise_floor_db = None
+        self.open_frames = 0
+
+        self.frames = 0
+        self.skipped = 0
+        self.onsets = 0
+        self.replayed = 0
+        self.gate_seconds = 0.0
+        self.inference_seconds = 0.0
+        self.inferences = 0
+
+    @staticmethod
+    def measure(pcm: bytes):
+        """Level in dBFS and zero-crossing rate of a PCM16 frame"""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if not len(samples):
+            return -120.0, 0.0
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        level_db = float(20 * np.log10(max(rms, 1.0) / 32768))
+        zcr = float(np.count_nonzero(np.diff(np.signbit(samples)))) / len(samples)
+        return level_db, zcr
+
+    def _speech_like(self, level_db: float, zcr: float) -> bool:
+        if level_db < self.min_level_db:
+            return False
+        if level_db >= self.noise_floor_db + self.margin_db:
+            return True
+        # A quieter voiced onset still opens the gate if it crosses zero like speech
+        low, high = SPEECH_ZCR_RANGE
+        return level_db >= self.noise_floor_db + self.margin_db / 2 and low <= zcr <= high
+
+    def _track_floor(self, level_db: float):
+        if self.noise_floor_db is None or level_db < self.noise_floor_db:
+            # Follow drops immediately
+            self.noise_floor_db = level_db
+        else:
+            # Creep up slowly so speech doesn't become the new floor
+            self.noise_floor_db = min(level_db, self.noise_floor_db + self.floor_rise)
+
+    def process(self, pcm: bytes) -> List[bytes]:
+        """
+        Gate one frame
+
+        Returns:
+            Frames to run through Porcupine: none while gated, the frame while
+            open, and the buffered history followed by the frame at onset
+        """
+        started = time.perf_counter()
+        self.frames += 1
+        level_db, zcr = self.measure(pcm)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level_db
+        speech_like = self._speech_like(level_db, zcr)
+        # Also tracked while open, so a fan switching on doesn't hold the gate open
+        self._track_floor(level_db)
+
+        if speech_like:
+            frames = [pcm]
+            if self.open_frames == 0:
+                self.onsets += 1
+                self.replayed += len(self.history)
+                frames = list(self.history) + frames
+                self.history.clear()
+            self.open_frames = self.hangover_frames
+        elif self.open_frames > 0:
+            self.open_frames -= 1
+            frames = [pcm]
+        else:
+            self.history.append(pcm)
+            self.skipped += 1
+            frames = []
+
+        self.gate_seconds += time.perf_counter() - started
+        return frames
+
+    def record_inference(self, seconds: float):
+        """Account one porcupine.process call, to estimate the CPU time saved"""
+        self.inference_seconds += seconds
+        self.inferences += 1
+
+    def reset(self):
+        """Forget buffered audio, e.g. after the microphone was used by a session"""
+        self.history.clear()
+        self.open_frames = 0
+
+    def stats(self) -> Dict[str, Any]:
+        per_inference = self.inference_seconds / self.inferences if self.inferences else None
+        saved = self.skipped * per_inference - self.gate_seconds if per_inference else None
+        return {
+            "frames": self.frames,
+            "skipped_fraction": round(self.skipped / self.frames, 3) if self.frames else None,
+            "onsets": self.onsets,
+            "replayed_frames": self.replayed,
+            "noise_floor_db": round(self.noise_floor_db, 1) if self.noise_floor_db is not None else None,
+            "inference_us": round(per_inference * 1e6) if per_inference else None,
+            "gate_us": round(self.gate_seconds / self.frames * 1e6) if self.frames else None,
+            "cpu_saved_s": round(saved, 1) if saved is not None else None,
+            # Share of one core no longer spent on inference
+            "cpu_saved_percent": round(saved / (self.frames * self.frame_seconds) * 100, 2)
+            if saved is not None else None
+        }
@@ -71,6 +71,8 @@ sudo tee /etc/systemd/system/pi-voice-assistant.service > /dev/null <<EOF
 Description=Pi Voice Assistant
 After=network.target sound.target
 Wants=network-online.target
+# Never give up restarting; the short RestartSec below would otherwise trip the default limit
+StartLimitIntervalSec=0
 
 [Service]
 Type=simple
@@ -80,7 +82,7 @@ WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$PROJECT_DIR/venv/bin
 ExecStart=$PROJECT_DIR/venv/bin/python main.py
 Restart=always
-RestartSec=5
+RestartSec=500ms
 StandardOutput=journal
 StandardError=journal
 
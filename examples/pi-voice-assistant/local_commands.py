@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Local Command Keywords
+Runs common guest commands ("lights off", "goodnight") detected by Porcupine
+directly against the hotel controllers, without a Realtime API session
+"""
+
+import json
+import logging
+from typing import Dict, Any, List
+
+from mcp_tools import dispatch_tool_call
+
+logger = logging.getLogger(__name__)
+
+
+def load_command_keywords(path: str) -> List[Dict[str, Any]]:
+    """
+    Load command keyword definitions from a JSON file
+
+    Each entry needs 'keyword' (built-in Porcupine keyword) or 'keyword_path'
+    (.ppn file), plus the 'tool' to run and its 'arguments', or 'steps': a
+    list of raw MCP tool calls ({"tool", "arguments"}) sent together. See
+    command_keywords.example.json.
+
+    Raises:
+        ValueError: If an entry is missing required fields
+    """
+    with open(path) as f:
+        commands = json.load(f)
+
+    if not isinstance(commands, list):
+        raise ValueError("Command keyword file must contain a list")
+
+    for index, command in enumerate(commands):
+        if not command.get("keyword") and not command.get("keyword_path"):
+            raise ValueError(f"Command {index} needs 'keyword' or 'keyword_path'")
+        if command.get("steps") is not None:
+            if not isinstance(command["steps"], list) or not all(
+                    isinstance(step, dict) and step.get("tool") for step in command["steps"]):
+                raise ValueError(f"Command {index} 'steps' must be a list of objects with a 'tool'")
+        elif not command.get("tool"):
+            raise ValueError(f"Command {index} needs a 'tool' or 'steps'")
+        if not isinstance(command.get("arguments", {}), dict):
+            raise ValueError(f"Command {index} 'arguments' must be an object")
+
+    return commands
+
+
+class LocalCommandRouter:
+    def __init__(self, mcp_controller=None, mqtt_controller=None, default_room: str = "room1"):
+        """
+        Initialize local command router
+
+        Args:
+            mcp_controller: MCPHotelController used for tool calls
+            mqtt_controller: Optional connected MQTTHotelController; lighting commands
+                go straight to the broker when available
+            default_room: Room used when a command doesn't name one
+        """
+        self.mcp_controller = mcp_controller
+        self.mqtt_controller = mqtt_controller
+        self.default_room = default_room
+        self.executed = 0
+
+    async def execute(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a command keyword's tool call and return the tool result"""
+        if command.get("steps"):
+            return await self.execute_steps(command)
+        
+        tool = command["tool"]
+        arguments = dict(command.get("arguments", {}))
+        if tool in ("control_hotel_lighting", "get_lighting_status"):
+            arguments.setdefault("room", self.default_room)
+
+        logger.info(f"⚡ Local command '{command.get('label', tool)}': {tool} with args: {arguments}")
+        self.executed += 1
+
+        try:
+            if tool == "control_hotel_lighting" and self.mqtt_controller:
+                result = await self.mqtt_controller.control_room_lighting(**arguments)
+                # This publish bypasses the MCP controller, so drop its cached reads of the room
+                if self.mcp_controller and result.get("topic"):
+                    self.mcp_controller.cache.invalidate_topic(result["topic"])
+                return result
+            return await dispatch_tool_call(self.mcp_controller, tool, arguments)
+        except Exception as e:
+            logger.error(f"Local command {tool} failed: {e}")
+            return {
+                "success": False,
+                "message": f"Local command error: {str(e)}"
+            }
+
+    async def execute_steps(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a multi-step command; the JSON-RPC controller sends the steps as one batch"""
+        label = command.get("label", "steps")
+        calls = [(step["tool"], dict(step.get("arguments", {}))) for step in command["steps"]]
+        logger.info(f"⚡ Local command '{label}': {len(calls)} MCP call(s)")
+        self.executed += 1
+
+        if not self.mcp_controller:
+            return {"success": False, "message": "MCP controller not available"}
+        try:
+            results = await self.mcp_controller.call_mcp_tools(calls)
+        except Exception as e:
+            logger.error(f"Local command {label} failed: {e}")
+            return {
+                "success": False,
+                "message": f"Local command error: {str(e)}"
+            }
+        return {
+            "success": all(result.get("success") for result in results),
+            "results": results,
+            "message": f"Ran {len(results)} step(s) for {label}"
+        }
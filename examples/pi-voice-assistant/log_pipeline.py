@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Non-blocking Log Pipeline
+Log records are queued from the event loop and written by a background
+thread, so a slow SD card or journald never stalls audio. Hot-path messages
+are rate-limited on the console, and a flight recorder keeps recent records
+(including rate-limited ones and DEBUG from chosen modules) to dump to disk
+when an error is logged
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        # Rate-limited records only fill the first 3/4, keeping room for the rest
+        self.limited_room = max(1, log_queue.maxsize * 3 // 4)
+
+    def enqueue(self, record: logging.LogRecord):
+        if getattr(record, "rate_limited", False) and self.queue.qsize() >= self.limited_room:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, rate: float = 5.0, burst: int = 10, exempt_level: int = logging.WARNING,
+                 max_sites: int = 1000):
+        """
+        Token bucket per log call site (file and line)
+
+        Records over the limit are marked rate_limited rather than dropped, so
+        the flight recorder still keeps them; the console skips them.
+
+        Args:
+            rate: Records per second allowed from one call site
+            burst: Records allowed in a burst before rate limiting starts
+            exempt_level: Records at or above this level are never limited
+            max_sites: Cap on tracked call sites
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        self.max_sites = max_sites
+        self.buckets = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+        bucket = self.buckets.get(site)
+        if bucket is None:
+            if len(self.buckets) >= self.max_sites:
+                self.buckets.clear()
+            # [tokens, last refill, suppressed since last record]
+            bucket = self.buckets[site] = [float(self.burst), now, 0]
+
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            self.suppressed += 1
+            record.rate_limited = True
+            return True
+
+        bucket[0] -= 1
+        if bucket[2]:
+            record.msg = f"{record.getMessage()} ({bucket[2]} similar suppressed)"
+            record.args = None
+            bucket[2] = 0
+        return True
+
+
+def not_rate_limited(record: logging.LogRecord) -> bool:
+    return not getattr(record, "rate_limited", False)
+
+
+class FlightRecorder(logging.Handler):
+    def __init__(self, capacity: int = 500, dump_dir: Optional[str] = None,
+                 dump_level: int = logging.ERROR, min_dump_interval: float = 60.0, max_dumps: int = 5):
+        """
+        Keep the last records in memory and write them to a file when an error is logged
+
+        Args:
+            capacity: Records kept in memory
+            dump_dir: Directory for dump files (None only keeps records in memory)
+            dump_level: Records at or above this level trigger a dump
+            min_dump_interval: Seconds between dumps, so an error storm writes one file
+            max_dumps: Dump files kept in dump_dir; older ones are deleted
+        """
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.dump_dir = dump_dir
+        self.dump_level = dump_level
+        self.min_dump_interval = min_dump_interval
+        self.max_dumps = max_dumps
+        self.last_dump = None
+        self.dumps = 0
+
+    def emit(self, record: logging.LogRecord):
+        # Runs on the listener thread, so formatting and file I/O stay off the event loop
+        self.records.append(self.format(record))
+        if record.levelno >= self.dump_level:
+            self.dump()
+
+    def dump(self) -> Optional[str]:
+        """Write the recorded history to a file and return its path"""
+        if not self.dump_dir:
+            return None
+        now = time.monotonic()
+        if self.last_dump is not None and now - self.last_dump < self.min_dump_interval:
+            return None
+        self.last_dump = now
+
+        try:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, time.strftime("flight-%Y%m%d-%H%M%S.log"))
+            with open(path, 'w') as f:
+                f.write('\n'.join(self.records) + '\n')
+            self.dumps += 1
+
+            dumps = sorted(name for name in os.listdir(self.dump_dir) if name.startswith("flight-"))
+            for name in dumps[:-self.max_dumps]:
+                os.remove(os.path.join(self.dump_dir, name))
+            return path
+        except OSError:
+            self.handleError(None)
+            return None
+
+
+class LogPipeline:
+    def __init__(self,
+                 level: str = "INFO",
+                 queue_size: int = 1000,
+                 rate: float = 5.0,
+                 burst: int = 10,
+                 recorder_size: int = 500,
+                 recorder_level: str = "INFO",
+                 debug_loggers: Optional[List[str]] = None,
+                 dump_dir: Optional[str] = None):
+        """
+        Route all logging through a bounded queue to a background writer thread
+
+        Args:
+            level: Level written to the console/journald
+            queue_size: Records buffered before new ones are dropped
+            rate: Records per second allowed from one call site below WARNING
+            burst: Burst allowance per call site
+            recorder_size: Records kept by the flight recorder
+            recorder_level: Lowest level kept by the flight recorder
+            debug_loggers: Loggers (e.g. module names) whose DEBUG records the flight
+                recorder also keeps; DEBUG everywhere costs every hot-path debug call
+            dump_dir: Where flight recorder dumps are written (None disables dumps)
+        """
+        formatter = logging.Formatter(LOG_FORMAT)
+
+        self.console = logging.StreamHandler()
+        self.console.setLevel(getattr(logging, level.upper(), logging.INFO))
+        self.console.setFormatter(formatter)
+        self.console.addFilter(not_rate_limited)
+
+        self.recorder_level = getattr(logging, recorder_level.upper(), logging.INFO)
+        self.debug_loggers = [name for name in (debug_loggers or []) if name]
+        self.recorder = FlightRecorder(capacity=recorder_size, dump_dir=dump_dir)
+        self.recorder.setLevel(logging.DEBUG if self.debug_loggers else self.recorder_level)
+        self.recorder.setFormatter(formatter)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.rate_limit = RateLimitFilter(rate=rate, burst=burst)
+        self.handler = BoundedQueueHandler(self.queue)
+        self.handler.addFilter(self.rate_limit)
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue, self.console, self.recorder, respect_handler_level=True
+        )
+        self.running = False
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        # Records below the console level are still created for the flight recorder
+        root.setLevel(min(self.console.level, self.recorder_level))
+        for name in self.debug_loggers:
+            logging.getLogger(name).setLevel(logging.DEBUG)
+
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and stop the writer thread"""
+        if self.running:
+            self.running = False
+            self.listener.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "rate_limited": self.rate_limit.suppressed,
+            "flight_dumps": self.recorder.dumps
+        }
+
+
+def setup_logging(**kwargs) -> LogPipeline:
+    """Install the non-blocking pipeline on the root logger and return it"""
+    pipeline = LogPipeline(**kwargs)
+    pipeline.start()
+    return pipeline
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Event Loop Lag Monitor
+Measures how late the asyncio loop wakes up a periodic probe, exports the lag
+as a telemetry histogram, and uses a watchdog thread to capture the loop
+thread's stack while something is blocking it, so blocking calls hidden in
+async code show up with the code that made them
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from telemetry import LatencyHistogram
+from sampling_profiler import collapse_stack
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(self,
+                 interval: float = 0.1,
+                 stall_ms: float = 100.0,
+                 keep_stalls: int = 20,
+                 telemetry=None):
+        """
+        Initialize loop monitor
+
+        Args:
+            interval: Seconds between lag probes
+            stall_ms: Lag (or callback duration) reported as a stall, with its stack
+            keep_stalls: Recent stalls kept for stats() and the 'loop' debug command
+            telemetry: Optional TelemetryCollector receiving loop_lag samples and a loop_stalls count
+        """
+        self.interval = interval
+        self.stall_ms = stall_ms
+        self.telemetry = telemetry
+
+        self.lag = LatencyHistogram()
+        self.stalls = deque(maxlen=keep_stalls)
+        self.stall_count = 0
+        self.slow_callbacks = 0
+
+        self.loop_thread_id = None
+        self.heartbeat = None
+        self.pending_stack = None
+        self.pending_frames = None
+        self.slowest_callback = None
+        self.watchdog = None
+        self.running = False
+        self.original_handle_run = None
+
+        if telemetry:
+            telemetry.add_counter_source("loop_stalls", lambda: self.stall_count)
+
+    async def run(self):
+        """Probe the loop every interval until cancelled"""
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.running = True
+        self.watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.watchdog.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag_ms = max(0.0, (now - started - self.interval) * 1000)
+                self.heartbeat = now
+                self.lag.record(lag_ms)
+                if self.telemetry:
+                    self.telemetry.record("loop_lag", lag_ms)
+                if lag_ms >= self.stall_ms:
+                    self._record_stall(lag_ms)
+        finally:
+            self.running = False
+
+    def _watch(self):
+        """Watchdog thread: grab the loop thread's stack while the probe is overdue"""
+        check = max(self.stall_ms / 4000, 0.005)
+        while self.running:
+            time.sleep(check)
+            overdue_ms = (time.monotonic() - self.heartbeat - self.interval) * 1000
+            if overdue_ms < self.stall_ms or self.pending_stack is not None:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.pending_stack = collapse_stack(frame)
+                self.pending_frames = traceback.format_stack(frame)[-6:]
+            del frame
+
+    def _record_stall(self, lag_ms: float):
+        stall = {
+            "at": time.time(),
+            "lag_ms": round(lag_ms, 1),
+            "stack": self.pending_stack,
+            "callback": self.slowest_callback
+        }
+        frames = self.pending_frames
+        self.pending_stack = None
+        self.pending_frames = None
+        self.slowest_callback = None
+        self.stalls.append(stall)
+        self.stall_count += 1
+
+        where = "".join(frames).rstrip() if frames else (stall["callback"] or "(too short for the watchdog)")
+        logger.warning(f"🐢 Event loop blocked for {lag_ms:.0f} ms:\n{where}")
+
+    def instrument_callbacks(self):
+        """
+        Time every loop callback (each coroutine step is one), remembering the
+        slowest one over stall_ms to name it in the next stall
+
+        Costs two clock reads per callback; meant for staging rather than guests' rooms.
+        """
+        if self.original_handle_run:
+            return
+        monitor = self
+        original = self.original_handle_run = asyncio.Handle._run
+
+        def timed_run(handle):
+            started = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if elapsed_ms >= monitor.stall_ms:
+                    monitor.slow_callbacks += 1
+                    if monitor.slowest_callback is None or elapsed_ms > monitor.slowest_callback["ms"]:
+                        monitor.slowest_callback = {"ms": round(elapsed_ms, 1), "handle": repr(handle)[:300]}
+
+        asyncio.Handle._run = timed_run
+
+    def uninstrument_callbacks(self):
+        if self.original_handle_run:
+            asyncio.Handle._run = self.original_handle_run
+            self.original_handle_run = None
+
+    def recent_stalls(self, limit: int = 5) -> List[Dict[str, Any]]:
+        return list(self.stalls)[-limit:]
+
+    def handle_command(self, payload: str) -> bool:
+        """Handle 'loop' on the debug topic by logging lag stats and recent stalls"""
+        if payload.strip().split()[:1] != ["loop"]:
+            return False
+        logger.info(f"Event loop stats: {self.stats()}")
+        for stall in self.recent_stalls():
+            logger.info(f"Stall of {stall['lag_ms']} ms: {stall['stack'] or stall['callback']}")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        last: Optional[Dict[str, Any]] = self.stalls[-1] if self.stalls else None
+        return {
+            "lag_p50_ms": self.lag.percentile(50),
+            "lag_p99_ms": self.lag.percentile(99),
+            "lag_max_ms": round(self.lag.maximum, 1),
+            "stalls": self.stall_count,
+            "slow_callbacks": self.slow_callbacks,
+            "last_stall_ms": last["lag_ms"] if last else None
+        }
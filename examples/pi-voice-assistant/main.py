@@ -5,22 +5,38 @@ Combines wake word detection, OpenAI Realtime API, and MQTT hotel controls
 """
 
 import os
+import time
 import logging
 import asyncio
 import signal
+import importlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from wake_word_detector import WakeWordDetector
-from openai_client import OpenAIRealtimeClient
-from mcp_tools import MCPHotelController
+from session_lifecycle import SessionLifecycleManager
+from memory_monitor import MemoryMonitor
+from sampling_profiler import SamplingProfiler
+from log_pipeline import setup_logging
+from telemetry import TelemetryCollector
+
+# Tool calls that change the room lights (the voice lighting stream yields to them)
+LIGHT_CHANGING_TOOLS = {"control_hotel_lighting", "call_mcp_tool", "mqtt_publish"}
+
+# Heavy modules (numpy, pyaudio, pvporcupine, websockets, requests) are
+# imported inside the startup stages below so independent stages can overlap
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configure logging: records are written by a background thread, never the event loop
+log_pipeline = setup_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', '1000')),
+    rate=float(os.getenv('LOG_RATE_LIMIT', '5')),
+    recorder_size=int(os.getenv('FLIGHT_RECORDER_SIZE', '500')),
+    recorder_level=os.getenv('FLIGHT_RECORDER_LEVEL', 'INFO'),
+    debug_loggers=os.getenv('FLIGHT_RECORDER_DEBUG', '').split(','),
+    dump_dir=os.getenv('FLIGHT_RECORDER_DIR') or None
 )
 logger = logging.getLogger(__name__)
 
@@ -31,78 +47,490 @@ class PiVoiceAssistant:
         self.wake_detector = None
         self.openai_client = None
         self.mcp_controller = None
+        self.mqtt_controller = None
+        self.local_commands = None
+        
+        # Startup bookkeeping
+        self.startup_began = time.perf_counter()
+        self.startup_timings = {}
+        self.services_task = None
+        self.memory_task = None
+        self.telemetry_task = None
         
         # Configuration from environment
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         self.mcp_server_url = os.getenv('MCP_SERVER_URL', 'https://srv1000332.hstgr.cloud/mcp')
+        self.mcp_timeout = float(os.getenv('MCP_TIMEOUT', '10'))
+        self.mcp_hedge_delay_ms = os.getenv('MCP_HEDGE_DELAY_MS')
+        self.mcp_client_mode = os.getenv('MCP_CLIENT_MODE', 'rest').lower()
+        self.mcp_tools_cache = os.getenv('MCP_TOOLS_CACHE', 'mcp_tools_cache.json')
+        self.scenes_file = os.getenv('SCENES_FILE')
+        self.scenes = None
+        self.preset_manifest = None
+        self.tool_discovery_task = None
         self.wake_word = os.getenv('WAKE_WORD', 'jarvis')
         self.custom_wake_word_path = os.getenv('CUSTOM_WAKE_WORD_PATH')
+        self.command_keywords_file = os.getenv('COMMAND_KEYWORDS_FILE')
+        self.room_id = os.getenv('ROOM_ID', 'room1')
+        self.audio_format = os.getenv('AUDIO_FORMAT', 'pcm16')
+        
+        # Session lifecycle: follow-up window and teardown limits
+        self.lifecycle = SessionLifecycleManager(
+            follow_up_window=float(os.getenv('FOLLOW_UP_WINDOW', '8')),
+            idle_timeout=float(os.getenv('SESSION_IDLE_TIMEOUT', '30')),
+            max_session_seconds=float(os.getenv('SESSION_MAX_SECONDS', '600')),
+            token_budget=int(os.getenv('SESSION_TOKEN_BUDGET', '30000'))
+        )
+        
+        # RSS budget warnings and tracemalloc allocation reports (also on SIGUSR2)
+        self.memory_monitor = MemoryMonitor(
+            rss_budget_mb=float(os.getenv('MEMORY_BUDGET_MB', '300')),
+            check_interval=float(os.getenv('MEMORY_CHECK_INTERVAL', '30')),
+            profile=os.getenv('MEMORY_PROFILE', 'false').lower() == 'true',
+            profile_interval=float(os.getenv('MEMORY_PROFILE_INTERVAL', '300'))
+        )
+        
+        # CPU profile of the event loop, wake-word and capture threads on SIGUSR1 or <room>/debug
+        self.profiler = SamplingProfiler(
+            output_dir=os.getenv('PROFILE_DIR', 'profiles'),
+            interval=1 / float(os.getenv('PROFILE_HZ', '200')),
+            default_duration=float(os.getenv('PROFILE_DURATION', '30')),
+            label=f"profile-{self.room_id}"
+        )
+        self.debug_task = None
+        self.loop_monitor = None
+        self.loop_monitor_task = None
+        
+        # Wake word detection blocks on the microphone; give it its own named thread
+        self.wake_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wake-word")
+        
+        # Fleet telemetry on <room>/telemetry (TELEMETRY_INTERVAL=0 disables publishing)
+        self.telemetry_interval = float(os.getenv('TELEMETRY_INTERVAL', '60'))
+        self.telemetry = TelemetryCollector(
+            room_id=self.room_id,
+            floor=os.getenv('FLOOR'),
+            access_point=os.getenv('ACCESS_POINT'),
+            interval=self.telemetry_interval
+        )
+        
+        # Optional audio-reactive lighting that follows the assistant's voice during sessions
+        self.pixel_stream_host = os.getenv('PIXEL_STREAM_HOST')
+        self.pixel_stream_pixels = int(os.getenv('PIXEL_STREAM_PIXELS', '60'))
+        self.pixel_stream_protocol = os.getenv('PIXEL_STREAM_PROTOCOL', 'ddp')
+        self.pixel_stream_fps = float(os.getenv('PIXEL_STREAM_FPS', '30'))
+        # Same controller as the room lights: stop streaming when the guest changes them
+        self.pixel_stream_yield = os.getenv('PIXEL_STREAM_YIELD', 'true').lower() == 'true'
+        self.voice_streamer = None
+        self.voice_lighting_task = None
+        
+        # Optional direct MQTT connection for local commands (otherwise they go via MCP)
+        self.mqtt_broker = os.getenv('MQTT_BROKER')
+        self.mqtt_port = int(os.getenv('MQTT_PORT', '1883'))
+        self.mqtt_user = os.getenv('MQTT_USER')
+        self.mqtt_password = os.getenv('MQTT_PASSWORD')
         
         # Validate configuration
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
     
-    async def initialize(self) -> bool:
-        """Initialize all components"""
+    async def run_stage(self, name: str, func, *args):
+        """Run a blocking startup stage in the executor and log how long it took"""
+        loop = asyncio.get_event_loop()
+        started = time.perf_counter()
         try:
-            logger.info("🚀 Initializing Pi Voice Assistant...")
+            return await loop.run_in_executor(None, func, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.startup_timings[name] = elapsed_ms
+            logger.info(f"⏱️ Startup stage '{name}' took {elapsed_ms:.0f} ms")
+    
+    def _create_wake_detector(self) -> bool:
+        """Stage: load Porcupine/PyAudio and open the microphone"""
+        from wake_word_detector import WakeWordDetector
+        
+        command_keywords = []
+        if self.command_keywords_file:
+            from local_commands import load_command_keywords
+            try:
+                command_keywords = load_command_keywords(self.command_keywords_file)
+                logger.info(f"Loaded {len(command_keywords)} local command keyword(s)")
+            except Exception as e:
+                logger.error(f"Ignoring command keywords from {self.command_keywords_file}: {e}")
+        
+        # Skip Porcupine inference through sustained silence
+        energy_gate = None
+        if os.getenv('WAKE_ENERGY_GATE', 'true').lower() == 'true':
+            from energy_gate import EnergyGate
+            energy_gate = EnergyGate(margin_db=float(os.getenv('WAKE_GATE_MARGIN_DB', '9')))
+            self.telemetry.add_counter_source("wake_frames_skipped", lambda: energy_gate.skipped)
+        
+        if self.custom_wake_word_path and os.path.exists(self.custom_wake_word_path):
+            self.wake_detector = WakeWordDetector(
+                keyword_paths=[self.custom_wake_word_path],
+                command_keywords=command_keywords,
+                energy_gate=energy_gate
+            )
+        else:
+            self.wake_detector = WakeWordDetector(
+                keywords=[self.wake_word],
+                command_keywords=command_keywords,
+                energy_gate=energy_gate
+            )
+        
+        return self.wake_detector.initialize()
+    
+    def load_scenes(self):
+        """Scene definitions from SCENES_FILE (None for the built-in scenes), loaded once"""
+        if not self.scenes_file:
+            return None
+        if self.scenes is None:
+            from wled_scenes import load_scenes
+            self.scenes = load_scenes(self.scenes_file)
+        return self.scenes
+    
+    def load_preset_manifest(self):
+        """Which rooms have the scene presets stored (written by `python wled_scenes.py`), loaded once"""
+        if self.preset_manifest is None:
+            from wled_scenes import PresetSyncManifest
+            self.preset_manifest = PresetSyncManifest(os.getenv('PRESET_SYNC_MANIFEST', 'preset_sync.json'))
+        return self.preset_manifest
+    
+    def _create_mcp_controller(self):
+        """Stage: import the MCP tooling and build the controller"""
+        hedge_delay = float(self.mcp_hedge_delay_ms) / 1000 if self.mcp_hedge_delay_ms else None
+        scenes = self.load_scenes()
+        
+        if self.mcp_client_mode == 'jsonrpc':
+            from mcp_jsonrpc import MCPJsonRpcController, ToolCatalog
             
-            # Initialize MCP controller
-            logger.info("Initializing MCP controller...")
-            self.mcp_controller = MCPHotelController(self.mcp_server_url)
+            # The cached catalog is used straight away; discovery refreshes it in the background
+            catalog = ToolCatalog(self.mcp_tools_cache)
+            self.mcp_controller = MCPJsonRpcController(
+                self.mcp_server_url,
+                timeout=self.mcp_timeout,
+                hedge_delay=hedge_delay,
+                catalog=catalog,
+                scenes=scenes,
+                manifest=self.load_preset_manifest()
+            )
+            if catalog.load(self.mcp_controller.mcp_server_url):
+                logger.info(f"Loaded {len(catalog.tools)} MCP tool(s) from {self.mcp_tools_cache}")
+            return
+        
+        from mcp_tools import MCPHotelController
+        
+        self.mcp_controller = MCPHotelController(
+            self.mcp_server_url,
+            timeout=self.mcp_timeout,
+            hedge_delay=hedge_delay,
+            scenes=scenes,
+            manifest=self.load_preset_manifest()
+        )
+    
+    async def discover_tools(self):
+        """Refresh the MCP tool catalog via tools/list and offer the result to the next session"""
+        catalog = self.mcp_controller.catalog
+        try:
+            if catalog.stale:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self.mcp_controller.refresh_tools)
+        except Exception as e:
+            logger.warning(f"MCP tool discovery failed, using {'cached' if catalog.tools else 'built-in'} tools: {e}")
+        if self.openai_client:
+            self.openai_client.tools = catalog.realtime_tools()
+    
+    def _create_openai_client(self):
+        """Stage: import the Realtime client (and websockets) and build it"""
+        from openai_client import OpenAIRealtimeClient
+        import websockets  # noqa: F401 - warm the import before the first session
+        
+        self.openai_client = OpenAIRealtimeClient(
+            api_key=self.openai_api_key,
+            mcp_controller=self.mcp_controller,
+            audio_format=self.audio_format,
+            context_token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '6000'))
+        )
+        if getattr(self.mcp_controller, 'catalog', None):
+            self.openai_client.tools = self.mcp_controller.catalog.realtime_tools()
+        self.openai_client.add_event_listener(self.lifecycle.on_event)
+        self.openai_client.add_event_listener(self.telemetry.on_event)
+        self.openai_client.add_event_listener(self.yield_voice_lighting)
+        self.openai_client.telemetry = self.telemetry
+        self.telemetry.add_counter_source("dropped_frames", lambda: self.openai_client.player.dropped_chunks)
+        
+        self.openai_client.model = os.getenv('REALTIME_MODEL', self.openai_client.model)
+        tiers = os.getenv('MODEL_TIERS', 'default')
+        if tiers.lower() != 'off':
+            from model_tiers import TierRouter, TierConnectionPool, load_tiers
+            router = TierRouter(
+                tiers=None if tiers.lower() == 'default' else load_tiers(tiers),
+                escalate_words=int(os.getenv('ESCALATE_WORDS', '20')),
+                demote_seconds=float(os.getenv('TIER_DEMOTE_SECONDS', '600')),
+                telemetry=self.telemetry
+            )
+            pool = TierConnectionPool(self.openai_client.open_websocket, warm=int(os.getenv('POOL_WARM', '1')))
+            self.openai_client.enable_model_tiers(router, pool)
+        
+        if os.getenv('TOOL_OUTPUT_SHAPING', 'true').lower() == 'true':
+            from tool_output import ToolOutputShaper
+            self.openai_client.output_shaper = ToolOutputShaper(
+                max_bytes=int(os.getenv('TOOL_OUTPUT_MAX_BYTES', '1200'))
+            )
+        
+        if os.getenv('CONFIRMATION_AUDIO', 'true').lower() == 'true':
+            from confirmation_audio import ConfirmationClips
+            clips = ConfirmationClips(os.getenv('CONFIRMATION_AUDIO_DIR'))
+            clips.load()
+            self.openai_client.confirmations = clips
+        
+        if os.getenv('RESPONSE_CACHE', 'true').lower() == 'true':
+            from response_cache import ResponseCache
+            self.openai_client.enable_response_cache(ResponseCache(
+                ttl=float(os.getenv('RESPONSE_CACHE_TTL', str(6 * 3600))),
+                max_bytes=int(os.getenv('RESPONSE_CACHE_MB', '8')) * 1024 * 1024,
+                threshold=float(os.getenv('RESPONSE_CACHE_THRESHOLD', '0.9'))
+            ))
+    
+    async def connect_mqtt(self):
+        """Stage: connect directly to the MQTT broker for local commands (optional)"""
+        if not self.mqtt_broker:
+            return
+        
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_event_loop()
+            module = await loop.run_in_executor(None, importlib.import_module, 'mqtt_tools')
+            controller = module.MQTTHotelController(
+                broker=self.mqtt_broker,
+                port=self.mqtt_port,
+                username=self.mqtt_user,
+                password=self.mqtt_password,
+                scenes=self.load_scenes(),
+                manifest=self.load_preset_manifest()
+            )
+            if await controller.connect():
+                self.mqtt_controller = controller
+        except Exception as e:
+            logger.error(f"MQTT unavailable, local commands will use MCP: {e}")
+        finally:
+            self.startup_timings["mqtt"] = (time.perf_counter() - started) * 1000
+            logger.info(f"⏱️ Startup stage 'mqtt' took {self.startup_timings['mqtt']:.0f} ms")
+    
+    async def initialize_services(self) -> bool:
+        """Initialize the network-facing components (MCP + OpenAI)"""
+        try:
+            await self.run_stage("mcp_controller", self._create_mcp_controller)
+            
+            # The health check, the OpenAI client and MQTT don't depend on each other
+            mcp_healthy, _, _ = await asyncio.gather(
+                self.run_stage("mcp_health", self.mcp_controller.test_connection),
+                self.run_stage("openai_client", self._create_openai_client),
+                self.connect_mqtt()
+            )
             
-            if self.mcp_controller.test_connection():
+            if self.openai_client.pool:
+                # Pay the TLS/WebSocket handshakes now rather than after the wake word
+                for tier in self.openai_client.tiers.tiers:
+                    self.openai_client.pool.refill(tier.model)
+            
+            if mcp_healthy:
                 logger.info("✅ MCP controller initialized")
+                if self.mcp_client_mode == 'jsonrpc':
+                    self.tool_discovery_task = asyncio.ensure_future(self.discover_tools())
             else:
-                logger.error("❌ Failed to initialize MCP controller")
-                return False
+                logger.error("❌ MCP server unreachable, tool calls will fail until it recovers")
+            
+            if self.mqtt_controller:
+                self.debug_task = asyncio.ensure_future(
+                    self.mqtt_controller.listen(f"{self.room_id}/debug", self.handle_debug_command)
+                )
             
-            # Initialize OpenAI client
-            logger.info("Initializing OpenAI client...")
-            self.openai_client = OpenAIRealtimeClient(
-                api_key=self.openai_api_key,
-                mcp_controller=self.mcp_controller
+            from local_commands import LocalCommandRouter
+            self.local_commands = LocalCommandRouter(
+                mcp_controller=self.mcp_controller,
+                mqtt_controller=self.mqtt_controller,
+                default_room=self.room_id
             )
             
-            # Initialize wake word detector
-            logger.info(f"Initializing wake word detector for '{self.wake_word}'...")
-            if self.custom_wake_word_path and os.path.exists(self.custom_wake_word_path):
-                self.wake_detector = WakeWordDetector(
-                    keyword_paths=[self.custom_wake_word_path]
-                )
-            else:
-                self.wake_detector = WakeWordDetector(
-                    keywords=[self.wake_word]
+            logger.info("✅ OpenAI client initialized")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to initialize services: {e}")
+            return False
+    
+    async def initialize(self) -> bool:
+        """
+        Initialize all components in stages
+        
+        The MCP/OpenAI stages run in the background while Porcupine loads, and
+        this returns as soon as wake word listening is possible. The first
+        voice session waits for the background stages to finish.
+        """
+        try:
+            logger.info("🚀 Initializing Pi Voice Assistant...")
+            
+            self.services_task = asyncio.ensure_future(self.initialize_services())
+            
+            self.memory_monitor.install_signal_handler()
+            self.profiler.install_signal_handler()
+            self.memory_task = asyncio.ensure_future(self.memory_monitor.run())
+            if os.getenv('LOOP_MONITOR', 'true').lower() == 'true':
+                from loop_monitor import LoopMonitor
+                self.loop_monitor = LoopMonitor(
+                    interval=float(os.getenv('LOOP_LAG_INTERVAL_MS', '100')) / 1000,
+                    stall_ms=float(os.getenv('LOOP_STALL_MS', '100')),
+                    telemetry=self.telemetry
                 )
+                if os.getenv('LOOP_MONITOR_CALLBACKS', 'false').lower() == 'true':
+                    self.loop_monitor.instrument_callbacks()
+                self.loop_monitor_task = asyncio.ensure_future(self.loop_monitor.run())
+            if self.telemetry_interval > 0:
+                self.telemetry_task = asyncio.ensure_future(self.telemetry.run(self.publish_telemetry))
             
-            if self.wake_detector.initialize():
+            logger.info(f"Initializing wake word detector for '{self.wake_word}'...")
+            if await self.run_stage("wake_word", self._create_wake_detector):
                 logger.info("✅ Wake word detector initialized")
             else:
                 logger.error("❌ Failed to initialize wake word detector")
                 return False
             
-            logger.info("🎉 All components initialized successfully!")
+            elapsed_ms = (time.perf_counter() - self.startup_began) * 1000
+            logger.info(f"🎉 Ready to listen {elapsed_ms:.0f} ms after start")
             return True
             
         except Exception as e:
             logger.error(f"Failed to initialize components: {e}")
             return False
     
+    async def services_ready(self) -> bool:
+        """Wait for the background startup stages before using MCP/OpenAI"""
+        if self.services_task is None:
+            return False
+        if not await self.services_task:
+            return False
+        return self.openai_client is not None
+    
+    def handle_debug_command(self, topic: str, payload: str):
+        """Remote diagnostics on <room>/debug, e.g. 'profile 60' or 'loop'"""
+        if self.loop_monitor and self.loop_monitor.handle_command(payload):
+            return
+        if not self.profiler.handle_command(payload):
+            logger.warning(f"Unknown command on {topic}: {payload[:80]}")
+    
+    async def publish_telemetry(self, topic: str, payload: str):
+        """Publish a telemetry snapshot directly over MQTT when connected, otherwise via MCP"""
+        if self.mqtt_controller:
+            return await self.mqtt_controller.publish_message(topic, payload)
+        if not await self.services_ready():
+            return False
+        return await self.mcp_controller.call_mcp_tool(
+            "mqtt_publish",
+            topic=topic,
+            message=payload,
+            qos=0,
+            retain=False
+        )
+    
+    async def run_local_command(self, command):
+        """Execute a command keyword locally, without a Realtime session"""
+        if self.services_task is None or not await self.services_task or not self.local_commands:
+            logger.error("Local command unavailable: services failed to initialize")
+            return
+        
+        started = time.perf_counter()
+        result = await self.local_commands.execute(command)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.telemetry.record("tool_call", elapsed_ms)
+        if result.get("success"):
+            logger.info(f"✅ Local command done in {elapsed_ms:.0f} ms")
+        else:
+            logger.error(f"❌ Local command failed after {elapsed_ms:.0f} ms: {result.get('message')}")
+    
+    def start_voice_lighting(self):
+        """Stream audio-reactive frames to WLED for the session; returns the streamer or None"""
+        if not self.pixel_stream_host:
+            return None
+        from pixel_stream import PixelStreamer, audio_reactive
+        
+        streamer = PixelStreamer(
+            self.pixel_stream_host,
+            self.pixel_stream_pixels,
+            protocol=self.pixel_stream_protocol,
+            fps=self.pixel_stream_fps
+        )
+        player = self.openai_client.player
+        self.voice_streamer = streamer
+        self.voice_lighting_task = asyncio.ensure_future(streamer.run(audio_reactive(lambda: player.level)))
+        return streamer
+    
+    def yield_voice_lighting(self, message_type: str, data):
+        """
+        Stop the voice lighting stream as soon as the model starts a call that changes the lights
+        
+        WLED ignores JSON/MQTT state while it is in realtime mode, so the guest's
+        change would otherwise only show once the session ends.
+        """
+        if message_type != "response.output_item.added" or not self.voice_streamer or not self.pixel_stream_yield:
+            return
+        item = data.get("item", {})
+        if item.get("type") == "function_call" and item.get("name") in LIGHT_CHANGING_TOOLS \
+                and not self.voice_streamer.closed:
+            # close() also covers a stream that hasn't sent its first frame yet
+            logger.info(f"💡 Stopping voice lighting for {item.get('name')}")
+            self.voice_streamer.close()
+    
     async def run_voice_session(self):
         """Run a voice conversation session"""
+        if not await self.services_ready():
+            logger.error("Voice session unavailable: OpenAI client failed to initialize")
+            return
+        
         try:
             logger.info("🎤 Starting voice session...")
             
             # Connect to OpenAI
             if await self.openai_client.connect():
                 logger.info("Connected to OpenAI Realtime API")
+                self.telemetry.increment("connects")
                 
-                # Start conversation
-                await self.openai_client.start_conversation()
+                # Start conversation; the lifecycle watcher ends it on silence/idle/budget
+                self.lifecycle.start()
+                watcher = asyncio.ensure_future(self.lifecycle.watch(self.openai_client))
+                streamer = self.start_voice_lighting()
+                try:
+                    await self.openai_client.start_conversation()
+                finally:
+                    watcher.cancel()
+                    if streamer:
+                        # WLED returns to its previous state shortly after frames stop
+                        streamer.close()
+                        self.voice_lighting_task.cancel()
+                        try:
+                            await self.voice_lighting_task
+                        except asyncio.CancelledError:
+                            pass
+                        except Exception as e:
+                            logger.warning(f"Voice lighting stream failed: {e}")
+                        self.voice_lighting_task = None
+                        self.voice_streamer = None
+                        logger.info(f"Voice lighting stats: {streamer.stats()}")
                 
-                logger.info("Voice session completed")
+                summary = self.lifecycle.finish(self.openai_client.end_reason)
+                if summary['reason'] in ("connection_closed", "error"):
+                    self.telemetry.increment("connection_drops")
+                logger.info(f"Voice session completed after {summary['duration_s']}s "
+                            f"({summary['reason']}, {summary['turns']} turn(s), {summary['tokens']} tokens)")
+                logger.info(f"Session stats: {self.lifecycle.stats()}")
+                if self.openai_client.response_cache:
+                    logger.info(f"Response cache stats: {self.openai_client.response_cache.stats()}")
+                if self.openai_client.output_shaper:
+                    logger.info(f"Tool output stats: {self.openai_client.output_shaper.stats()}")
+                if self.openai_client.tiers:
+                    logger.info(f"Model tier report: {self.openai_client.tiers.report()}")
             else:
                 logger.error("Failed to connect to OpenAI")
+                self.telemetry.increment("connect_failures")
                 
         except Exception as e:
             logger.error(f"Error in voice session: {e}")
@@ -124,13 +552,19 @@ class PiVoiceAssistant:
                 
                 # Run wake word detection in executor to avoid blocking
                 loop = asyncio.get_event_loop()
-                wake_detected = await loop.run_in_executor(
-                    None, 
-                    self.wake_detector.wait_for_wake_word
+                detection = await loop.run_in_executor(
+                    self.wake_executor,
+                    self.wake_detector.wait_for_keyword
                 )
                 
-                if wake_detected and self.running:
+                # Command keywords are handled locally and never open a session
+                command = self.wake_detector.command_for(detection)
+                if command and self.running:
+                    await self.run_local_command(command)
+                
+                elif detection is not None and self.running:
                     logger.info("🎯 Wake word detected!")
+                    self.telemetry.mark_wake()
                     
                     # Run voice session
                     await self.run_voice_session()
@@ -151,14 +585,50 @@ class PiVoiceAssistant:
         self.running = False
         
         try:
+            if self.services_task and not self.services_task.done():
+                self.services_task.cancel()
+            
+            if self.telemetry_task:
+                self.telemetry_task.cancel()
+            
+            if self.memory_task:
+                self.memory_task.cancel()
+                logger.info(f"Memory stats: {self.memory_monitor.stats()}")
+            
+            if self.loop_monitor_task:
+                self.loop_monitor_task.cancel()
+                logger.info(f"Event loop stats: {self.loop_monitor.stats()}")
+            
+            logger.info(f"Log pipeline stats: {log_pipeline.stats()}")
+            
+            if self.openai_client and self.openai_client.confirmations:
+                logger.info(f"Confirmation audio stats: {self.openai_client.confirmations.stats()}")
+                self.openai_client.confirmations.close()
+            
             if self.openai_client:
                 await self.openai_client.disconnect()
+                if self.openai_client.pool:
+                    logger.info(f"Model tier report: {self.openai_client.tiers.report()}")
+                    logger.info(f"Realtime connection pool stats: {self.openai_client.pool.stats()}")
+                    await self.openai_client.pool.close()
+            
+            if self.tool_discovery_task:
+                self.tool_discovery_task.cancel()
+            
+            if self.debug_task:
+                self.debug_task.cancel()
+            self.profiler.stop()
+            
+            if self.mcp_controller and hasattr(self.mcp_controller, 'close'):
+                # Ends the JSON-RPC session; the REST controller holds no session state
+                self.mcp_controller.close()
             
-            if self.mcp_controller:
-                # MCP controller doesn't need explicit disconnection
-                pass
+            if self.mqtt_controller:
+                await self.mqtt_controller.disconnect()
             
             if self.wake_detector:
+                if self.wake_detector.energy_gate:
+                    logger.info(f"Wake energy gate stats: {self.wake_detector.energy_gate.stats()}")
                 self.wake_detector.cleanup()
             
             logger.info("✅ Shutdown complete")
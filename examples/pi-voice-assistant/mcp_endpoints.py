@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+MCP Endpoint Health Tracking
+Latency tracking and circuit breaking for one or more MCP server endpoints
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10.0):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds to wait before the first background health probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def allow_request(self) -> bool:
+        """Requests only go through while closed; an open circuit is closed by a health probe"""
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        """Record a successful call or health probe"""
+        with self._lock:
+            if self.state == self.OPEN:
+                logger.info(f"Circuit closed after {time.monotonic() - self.opened_at:.1f}s open")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit once the threshold is reached"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+
+
+class MCPEndpoint:
+    def __init__(self,
+                 url: str,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 10.0,
+                 latency_window: int = 20):
+        """
+        Initialize an MCP endpoint
+
+        Args:
+            url: Base URL of the MCP server (e.g., https://srv1000332.hstgr.cloud/mcp)
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds before the first background health probe
+            latency_window: Number of recent response times kept for percentiles
+        """
+        self.url = url.rstrip('/')
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'User-Agent': 'Pi-Voice-Assistant/1.0'
+        })
+
+        # Recent response times in milliseconds
+        self.latencies = deque(maxlen=latency_window)
+        self.ewma_ms = None
+        self.requests = 0
+        self.failures = 0
+
+        # Background /health probe while the circuit is open
+        self.probe_task = None
+
+    def record_latency(self, elapsed_ms: float):
+        """Record a response time and update the moving average"""
+        self.latencies.append(elapsed_ms)
+        if self.ewma_ms is None:
+            self.ewma_ms = elapsed_ms
+        else:
+            self.ewma_ms = 0.7 * self.ewma_ms + 0.3 * elapsed_ms
+
+    def record_success(self, elapsed_ms: float):
+        self.requests += 1
+        self.record_latency(elapsed_ms)
+        self.breaker.record_success()
+
+    def record_failure(self, elapsed_ms: float = None):
+        self.requests += 1
+        self.failures += 1
+        if elapsed_ms is not None:
+            self.record_latency(elapsed_ms)
+        self.breaker.record_failure()
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Return a percentile of the recent response times, or None without samples"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def score(self) -> float:
+        """
+        Lower is better. Endpoints without samples are tried first so they get
+        measured, and recent failures count as a second of latency each so a
+        fast-failing endpoint doesn't look like the quickest one.
+        """
+        latency = self.ewma_ms if self.ewma_ms is not None else 0.0
+        return latency + 1000.0 * self.breaker.consecutive_failures
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a summary of this endpoint's health"""
+        return {
+            "url": self.url,
+            "state": self.breaker.state,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "p95_ms": self.latency_percentile(95),
+            "requests": self.requests,
+            "failures": self.failures,
+            "times_opened": self.breaker.times_opened
+        }
+
+
+def rank_endpoints(endpoints: List[MCPEndpoint]) -> List[MCPEndpoint]:
+    """Return endpoints with a closed circuit, fastest first"""
+    available = [endpoint for endpoint in endpoints if endpoint.breaker.allow_request()]
+    return sorted(available, key=lambda endpoint: endpoint.score())
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Native MCP Client (JSON-RPC over Streamable HTTP)
+Talks to the MCP server's JSON-RPC endpoint over one long-lived HTTP session
+(Mcp-Session-Id), batches multi-step calls, and discovers tools with
+tools/list into an on-disk catalog that the Realtime tool list is built from
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import itertools
+import threading
+import requests
+from typing import Dict, Any, List, Optional, Tuple
+
+from mcp_tools import MCPHotelController, OPENAI_MCP_TOOLS
+from mcp_endpoints import MCPEndpoint, rank_endpoints
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+CLIENT_INFO = {"name": "pi-voice-assistant", "version": "1.0"}
+
+# Tool wrappers implemented locally in MCPHotelController, always offered to the model
+LOCAL_TOOL_NAMES = ("control_hotel_lighting", "get_lighting_status")
+
+TOOL_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by the MCP server"""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"MCP error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class MCPSession:
+    def __init__(self, url: str, http: requests.Session, connect_timeout: float = 3.0, timeout: float = 10.0):
+        """
+        JSON-RPC session with one MCP server over Streamable HTTP
+
+        Args:
+            url: MCP endpoint (the same URL takes every JSON-RPC POST)
+            http: requests session whose keep-alive connection is reused
+            connect_timeout: Connect timeout in seconds
+            timeout: Read timeout in seconds
+        """
+        self.url = url
+        self.http = http
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.session_id = None
+        self.protocol_version = None
+        self.server_info = {}
+        self.initialized = False
+        self.batch_supported = True
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream"
+        }
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        if self.protocol_version:
+            headers["MCP-Protocol-Version"] = self.protocol_version
+        return headers
+
+    def _send(self, body: Any, expected_ids: set) -> Tuple[requests.Response, Dict[Any, Dict[str, Any]]]:
+        """POST one JSON-RPC message or batch and collect the responses by id"""
+        response = self.http.post(
+            self.url,
+            data=json.dumps(body, separators=(',', ':')),
+            headers=self._headers(),
+            timeout=(self.connect_timeout, self.timeout),
+            stream=True
+        )
+        replies = {}
+        if response.status_code >= 300 or not expected_ids:
+            response.close()
+            return response, replies
+
+        content_type = response.headers.get("Content-Type", "")
+        if content_type.startswith("text/event-stream"):
+            data_lines = []
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line is None:
+                        continue
+                    if line.startswith("data:"):
+                        data_lines.append(line[5:].lstrip())
+                    elif not line and data_lines:
+                        self._collect(json.loads("\n".join(data_lines)), replies)
+                        data_lines = []
+                        # The server may keep the stream open for notifications
+                        if expected_ids <= set(replies):
+                            break
+            finally:
+                response.close()
+        else:
+            self._collect(response.json(), replies)
+        return response, replies
+
+    @staticmethod
+    def _collect(message: Any, replies: Dict[Any, Dict[str, Any]]):
+        for item in message if isinstance(message, list) else [message]:
+            # Server requests and notifications on the stream are not answers to us
+            if isinstance(item, dict) and "id" in item and ("result" in item or "error" in item):
+                replies[item["id"]] = item
+
+    def initialize(self):
+        """Open the session: initialize, then notifications/initialized"""
+        with self.lock:
+            if self.initialized:
+                return
+            self.session_id = None
+            self.protocol_version = None
+            request_id = next(self.ids)
+            response, replies = self._send({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": CLIENT_INFO
+                }
+            }, {request_id})
+            if response.status_code >= 300:
+                raise requests.HTTPError(f"MCP initialize failed: HTTP {response.status_code}", response=response)
+            reply = replies.get(request_id)
+            if reply is None or "error" in reply:
+                error = (reply or {}).get("error", {})
+                raise MCPError(error.get("code", -1), error.get("message", "no initialize result"))
+
+            result = reply["result"]
+            self.session_id = response.headers.get("Mcp-Session-Id")
+            self.protocol_version = result.get("protocolVersion", PROTOCOL_VERSION)
+            self.server_info = result.get("serverInfo", {})
+            self._send({"jsonrpc": "2.0", "method": "notifications/initialized"}, set())
+            self.initialized = True
+            logger.info(f"MCP session with {self.url} ({self.server_info.get('name', 'server')}, "
+                        f"protocol {self.protocol_version}, session {self.session_id or 'none'})")
+
+    def _exchange(self, requests_: List[Dict[str, Any]]) -> Tuple[requests.Response, Dict[Any, Dict[str, Any]]]:
+        """Send requests (batched when more than one), re-initializing once if the session expired"""
+        for attempt in range(2):
+            if not self.initialized:
+                self.initialize()
+            body = requests_[0] if len(requests_) == 1 else requests_
+            response, replies = self._send(body, {request["id"] for request in requests_})
+            if response.status_code == 404 and self.session_id and attempt == 0:
+                logger.info(f"MCP session {self.session_id} expired, re-initializing")
+                self.initialized = False
+                continue
+            return response, replies
+        return response, replies
+
+    def request(self, method: str, params: Dict[str, Any] = None) -> Tuple[int, Any]:
+        """
+        Send one JSON-RPC request
+
+        Returns:
+            (HTTP status, result); result is an MCPError for JSON-RPC errors
+        """
+        request_id = next(self.ids)
+        response, replies = self._exchange([{"jsonrpc": "2.0", "id": request_id, "method": method,
+                                             "params": params or {}}])
+        if response.status_code >= 300:
+            return response.status_code, None
+        return response.status_code, self._result(replies.get(request_id))
+
+    def batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Send several requests as one JSON-RPC batch
+
+        A server that rejects batches with an HTTP 4xx ran none of the calls, so
+        they are resent one at a time. A 2xx without replies is ambiguous (some
+        calls may have run), so those calls fail rather than being replayed.
+        Either way later batches go one request at a time.
+
+        Returns:
+            Results in call order; failed calls are MCPError instances
+        """
+        if not self.batch_supported or len(calls) == 1:
+            return [self._status_result(*self.request(method, params)) for method, params in calls]
+
+        messages = [{"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params}
+                    for method, params in calls]
+        response, replies = self._exchange(messages)
+        if response.status_code >= 500:
+            return [MCPError(-32000, f"HTTP {response.status_code}")] * len(calls)
+        if response.status_code >= 300 or not replies:
+            logger.info(f"MCP server {self.url} does not accept JSON-RPC batches, sending calls one by one from now on")
+            self.batch_supported = False
+            if response.status_code >= 300:
+                return [self._status_result(*self.request(method, params)) for method, params in calls]
+            return [MCPError(-32000, "No replies to batch, not replayed in case some calls ran")] * len(calls)
+        return [self._result(replies.get(message["id"])) for message in messages]
+
+    @staticmethod
+    def _status_result(status: int, result: Any) -> Any:
+        return result if status < 300 else MCPError(-32000, f"HTTP {status}")
+
+    @staticmethod
+    def _result(reply: Optional[Dict[str, Any]]) -> Any:
+        if reply is None:
+            return MCPError(-32603, "No response from server")
+        if "error" in reply:
+            error = reply["error"]
+            return MCPError(error.get("code", -1), error.get("message", ""), error.get("data"))
+        return reply.get("result")
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """All tools from tools/list, following pagination"""
+        tools = []
+        cursor = None
+        while True:
+            status, result = self.request("tools/list", {"cursor": cursor} if cursor else {})
+            if status >= 300 or isinstance(result, MCPError):
+                raise result if isinstance(result, MCPError) else MCPError(-32000, f"HTTP {status}")
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    def close(self):
+        """End the server-side session"""
+        if self.session_id:
+            try:
+                self.http.delete(self.url, headers=self._headers(), timeout=self.connect_timeout)
+            except Exception:
+                pass
+        self.session_id = None
+        self.initialized = False
+
+
+def tool_result_value(result: Dict[str, Any]) -> Any:
+    """Reduce an MCP CallToolResult to its useful value (structured content, or parsed text)"""
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    texts = [item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"]
+    if len(texts) == 1:
+        try:
+            return json.loads(texts[0])
+        except ValueError:
+            return texts[0]
+    return texts or result.get("content", [])
+
+
+class ToolCallResponse:
+    """Minimal stand-in for requests.Response, so MCPHotelController's call path is shared"""
+
+    def __init__(self, status_code: int, body: Any = None, text: str = ""):
+        self.status_code = status_code
+        self.body = body
+        self.text = text or (json.dumps(body) if body is not None else "")
+
+    def json(self) -> Any:
+        return self.body
+
+
+def validate_tools(tools: List[Any]) -> List[Dict[str, Any]]:
+    """Keep well-formed tool definitions from tools/list; log and drop the rest"""
+    valid = []
+    for tool in tools:
+        name = tool.get("name") if isinstance(tool, dict) else None
+        schema = tool.get("inputSchema") if isinstance(tool, dict) else None
+        if not name or len(name) > 64 or set(name) - TOOL_NAME_CHARS:
+            logger.warning(f"Ignoring MCP tool with invalid name: {name!r}")
+            continue
+        if not isinstance(schema, dict) or schema.get("type") != "object":
+            logger.warning(f"Ignoring MCP tool {name}: inputSchema must be an object schema")
+            continue
+        valid.append({
+            "name": name,
+            "description": str(tool.get("description", ""))[:1024],
+            "inputSchema": schema
+        })
+    return valid
+
+
+class ToolCatalog:
+    def __init__(self, path: str, max_age: float = 86400.0):
+        """
+        On-disk cache of tools/list results
+
+        Args:
+            path: JSON file holding the catalog
+            max_age: Seconds after which the catalog is refreshed in the background
+        """
+        self.path = path
+        self.max_age = max_age
+        self.tools = []
+        self.server = None
+        self.fetched_at = 0.0
+
+    @staticmethod
+    def _digest(tools: List[Dict[str, Any]]) -> str:
+        return hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+
+    def load(self, server: str = None) -> bool:
+        """Load the catalog from disk; False if missing, corrupt or from another server"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable MCP tool catalog {self.path}: {e}")
+            return False
+
+        tools = data.get("tools")
+        if not isinstance(tools, list) or data.get("sha256") != self._digest(tools):
+            logger.warning(f"MCP tool catalog {self.path} failed validation, ignoring it")
+            return False
+        if server and data.get("server") != server:
+            logger.info(f"MCP tool catalog {self.path} is for {data.get('server')}, ignoring it")
+            return False
+
+        self.tools = validate_tools(tools)
+        self.server = data.get("server")
+        self.fetched_at = data.get("fetched_at", 0.0)
+        return True
+
+    def store(self, tools: List[Dict[str, Any]], server: str) -> bool:
+        """Replace the catalog; returns True if the tools changed"""
+        tools = validate_tools(tools)
+        changed = self._digest(tools) != self._digest(self.tools)
+        self.tools = tools
+        self.server = server
+        self.fetched_at = time.time()
+
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"server": server, "fetched_at": self.fetched_at, "tools": tools,
+                       "sha256": self._digest(tools)}, f, indent=2)
+        os.replace(tmp, self.path)
+        return changed
+
+    @property
+    def stale(self) -> bool:
+        return not self.tools or time.time() - self.fetched_at > self.max_age
+
+    @property
+    def names(self) -> set:
+        return {tool["name"] for tool in self.tools}
+
+    def realtime_tools(self) -> List[Dict[str, Any]]:
+        """
+        Tool definitions for the Realtime session
+
+        The local lighting wrappers are always included; discovered server tools
+        replace the generic call_mcp_tool. Without a catalog the static list is used.
+        """
+        if not self.tools:
+            return OPENAI_MCP_TOOLS
+        local = [tool for tool in OPENAI_MCP_TOOLS if tool["function"]["name"] in LOCAL_TOOL_NAMES]
+        discovered = [{
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool["inputSchema"]
+            }
+        } for tool in self.tools if tool["name"] not in LOCAL_TOOL_NAMES]
+        return local + discovered
+
+
+class MCPJsonRpcController(MCPHotelController):
+    def __init__(self, *args, catalog: ToolCatalog = None, **kwargs):
+        """
+        MCPHotelController speaking native MCP JSON-RPC instead of POST /call-tool
+
+        Failover, hedging, circuit breaking and the read cache are shared with the
+        REST controller; only the per-endpoint transport differs.
+
+        Args:
+            catalog: Tool catalog to refresh via tools/list
+        """
+        super().__init__(*args, **kwargs)
+        self.catalog = catalog
+        self.sessions = {
+            endpoint.url: MCPSession(endpoint.url, endpoint.session, self.connect_timeout, self.timeout)
+            for endpoint in self.endpoints
+        }
+        self.batches = 0
+
+    @property
+    def tool_names(self) -> set:
+        return self.catalog.names if self.catalog else set()
+
+    def _check_health(self, endpoint: MCPEndpoint) -> bool:
+        """JSON-RPC ping over the session (initializing it if needed)"""
+        started = time.perf_counter()
+        try:
+            status, result = self.sessions[endpoint.url].request("ping")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if status < 300 and not isinstance(result, MCPError):
+                endpoint.record_success(elapsed_ms)
+                return True
+            endpoint.record_failure(elapsed_ms)
+            return False
+        except Exception as e:
+            logger.debug(f"MCP ping failed for {endpoint.url}: {e}")
+            self.sessions[endpoint.url].initialized = False
+            endpoint.record_failure()
+            return False
+
+    def _post(self, endpoint: MCPEndpoint, payload: Dict[str, Any]) -> ToolCallResponse:
+        """Blocking tools/call against one endpoint, recording latency and failures"""
+        started = time.perf_counter()
+        try:
+            status, result = self.sessions[endpoint.url].request(
+                "tools/call", {"name": payload["tool"], "arguments": payload["parameters"]}
+            )
+        except Exception:
+            endpoint.record_failure((time.perf_counter() - started) * 1000)
+            self.sessions[endpoint.url].initialized = False
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if status >= 500:
+            endpoint.record_failure(elapsed_ms)
+            return ToolCallResponse(status, text=f"HTTP {status}")
+        endpoint.record_success(elapsed_ms)
+        if status >= 300:
+            return ToolCallResponse(status, text=f"HTTP {status}")
+        if isinstance(result, MCPError):
+            return ToolCallResponse(400, text=result.message)
+        if result.get("isError"):
+            return ToolCallResponse(422, text=json.dumps(tool_result_value(result)))
+        return ToolCallResponse(200, tool_result_value(result))
+
+    async def call_mcp_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run several tool calls as one JSON-RPC batch on the best endpoint"""
+        endpoints = rank_endpoints(self.endpoints)
+        if not endpoints:
+            return await super().call_mcp_tools(calls)
+
+        # Same cache bookkeeping as call_mcp_tool: cached reads are answered locally,
+        # publishes invalidate their topic before and after, and reads are only
+        # cached if nothing was published while the batch was in flight
+        generation = self.cache.generation
+        outcomes = [None] * len(calls)
+        pending = []
+        for index, (tool_name, arguments) in enumerate(calls):
+            if self.cache.is_cacheable(tool_name):
+                cached = self.cache.get(tool_name, arguments)
+                if cached is not None:
+                    outcomes[index] = cached
+                    continue
+            elif tool_name == "mqtt_publish":
+                self.cache.invalidate_topic(arguments.get("topic", ""))
+            pending.append(index)
+        if not pending:
+            return outcomes
+        batch_calls = [calls[index] for index in pending]
+
+        endpoint = endpoints[0]
+        session = self.sessions[endpoint.url]
+        loop = asyncio.get_event_loop()
+        started = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(
+                None, session.batch,
+                [("tools/call", {"name": name, "arguments": arguments}) for name, arguments in batch_calls]
+            )
+        except Exception as e:
+            endpoint.record_failure((time.perf_counter() - started) * 1000)
+            session.initialized = False
+            logger.error(f"MCP batch to {endpoint.url} failed: {e}")
+            results = [MCPError(-32000, str(e))] * len(batch_calls)
+        else:
+            endpoint.record_success((time.perf_counter() - started) * 1000)
+            self.batches += 1
+
+        for index, result in zip(pending, results):
+            name, arguments = calls[index]
+            if isinstance(result, MCPError) or (result or {}).get("isError"):
+                message = result.message if isinstance(result, MCPError) else json.dumps(tool_result_value(result))
+                outcomes[index] = {"success": False, "error": message, "message": f"Failed to call {name}"}
+                continue
+            outcomes[index] = {"success": True, "result": tool_result_value(result),
+                               "message": f"Successfully called {name}"}
+            if self.cache.is_cacheable(name):
+                self.cache.put(name, arguments, outcomes[index], generation=generation)
+            elif name == "mqtt_publish":
+                # Reads that raced this publish may have been cached meanwhile
+                self.cache.invalidate_topic(arguments.get("topic", ""))
+        return outcomes
+
+    def refresh_tools(self) -> bool:
+        """Blocking tools/list discovery into the catalog; returns True if the tools changed"""
+        if not self.catalog:
+            return False
+        endpoints = rank_endpoints(self.endpoints) or self.endpoints
+        tools = self.sessions[endpoints[0].url].list_tools()
+        changed = self.catalog.store(tools, self.mcp_server_url)
+        logger.info(f"Discovered {len(self.catalog.tools)} MCP tool(s) from {endpoints[0].url}"
+                    f"{' (changed)' if changed else ''}")
+        return changed
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+MCP Load Test
+Simulates many rooms calling the MCP server through MCPHotelController with
+Poisson arrivals and a realistic tool mix, and reports throughput, latency
+percentiles and error rates per stage, to find where the shared server saturates
+
+    python mcp_load_test.py --stand-in --rooms 50,100,200 --rate 6
+    python mcp_load_test.py --url http://staging-mcp:8000/mcp --rooms 20
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+from mcp_tools import MCPHotelController, dispatch_tool_call
+from telemetry import LatencyHistogram
+from wled_scenes import DEFAULT_SCENES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = {"control": 0.6, "status": 0.3, "raw": 0.1}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'control=0.6,status=0.3,raw=0.1' -> normalized weights"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown call type '{name}' (use {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Mix weights must add up to more than 0")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def random_call(kind: str, room: str, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """A plausible tool call of the given kind, as (function name, arguments)"""
+    if kind == "control":
+        choice = rng.random()
+        if choice < 0.4:
+            arguments = {"action": rng.choice(["on", "off"])}
+        elif choice < 0.7:
+            arguments = {"scene": rng.choice(list(DEFAULT_SCENES))}
+        elif choice < 0.9:
+            arguments = {"brightness": rng.randint(10, 255)}
+        else:
+            arguments = {"effect": rng.choice(["colorful", "relaxing", "party", "calm"])}
+        return "control_hotel_lighting", dict(arguments, room=room)
+    if kind == "status":
+        return "get_lighting_status", {"room": room}
+    return "call_mcp_tool", {"tool_name": rng.choice(["mqtt_list_topics", "mqtt_get_status"]), "parameters": {}}
+
+
+class LoadStage:
+    def __init__(self, rooms: int):
+        self.rooms = rooms
+        self.histograms = defaultdict(LatencyHistogram)
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.late_ms = LatencyHistogram()
+        self.elapsed = 0.0
+
+    def record(self, kind: str, latency_ms: float, result: Dict[str, Any]):
+        self.calls[kind] += 1
+        self.histograms[kind].record(latency_ms)
+        if not result.get("success"):
+            self.errors[kind] += 1
+            self.error_samples.setdefault(kind, str(result.get("error") or result.get("message"))[:120])
+
+    def summary(self) -> Dict[str, Any]:
+        overall = LatencyHistogram()
+        for histogram in self.histograms.values():
+            overall.merge(histogram)
+        total = sum(self.calls.values())
+        errors = sum(self.errors.values())
+        per_kind = {
+            kind: {
+                "calls": self.calls[kind],
+                "error_rate": round(self.errors[kind] / self.calls[kind], 4),
+                "p50_ms": self.histograms[kind].percentile(50),
+                "p99_ms": self.histograms[kind].percentile(99)
+            } for kind in sorted(self.calls)
+        }
+        return {
+            "rooms": self.rooms,
+            "seconds": round(self.elapsed, 1),
+            "calls": total,
+            "throughput": round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "p50_ms": overall.percentile(50),
+            "p99_ms": overall.percentile(99),
+            "max_ms": round(overall.maximum, 1),
+            # How far behind schedule calls started: growing lag means the client side saturated
+            "start_lag_p99_ms": self.late_ms.percentile(99),
+            "by_type": per_kind,
+            "errors": self.error_samples
+        }
+
+
+async def simulate_room(index: int, controller: MCPHotelController, stage: LoadStage,
+                        rate_per_min: float, mix: Dict[str, float], deadline: float,
+                        rng: random.Random, semaphore: asyncio.Semaphore):
+    """One room issuing calls with exponential inter-arrival times until the deadline"""
+    room = f"loadtest{index}"
+    kinds, weights = zip(*mix.items())
+    loop = asyncio.get_event_loop()
+    next_at = loop.time() + rng.expovariate(rate_per_min / 60)
+    in_flight = set()
+
+    while next_at < deadline:
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        # Arrivals are open-loop: a slow server doesn't slow the guests down
+        in_flight.add(asyncio.ensure_future(
+            timed_call(controller, stage, rng.choices(kinds, weights)[0], room, rng, semaphore, next_at)
+        ))
+        in_flight = {task for task in in_flight if not task.done()}
+        next_at += rng.expovariate(rate_per_min / 60)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def timed_call(controller: MCPHotelController, stage: LoadStage, kind: str, room: str,
+                     rng: random.Random, semaphore: asyncio.Semaphore, scheduled: float):
+    function_name, arguments = random_call(kind, room, rng)
+    async with semaphore:
+        started = time.perf_counter()
+        stage.late_ms.record(max(0.0, asyncio.get_event_loop().time() - scheduled) * 1000)
+        try:
+            result = await dispatch_tool_call(controller, function_name, arguments)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        stage.record(kind, (time.perf_counter() - started) * 1000, result)
+
+
+async def run_stage(url: str, rooms: int, rate_per_min: float, duration: float, mix: Dict[str, float],
+                    concurrency: int, shared: bool, seed: int, controller_options: Dict[str, Any],
+                    mode: str = "rest") -> Dict[str, Any]:
+    """Run one load level and return its summary"""
+    controller_class = MCPHotelController
+    if mode == "jsonrpc":
+        from mcp_jsonrpc import MCPJsonRpcController
+        controller_class = MCPJsonRpcController
+
+    # Every room is its own Pi with its own controller (and connection pool) unless shared
+    if shared:
+        controller = controller_class(url, **controller_options)
+        controllers = [controller] * rooms
+    else:
+        controllers = [controller_class(url, **controller_options) for _ in range(rooms)]
+
+    stage = LoadStage(rooms)
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    deadline = started + duration
+    await asyncio.gather(*(
+        simulate_room(index, controllers[index], stage, rate_per_min, mix, deadline,
+                      random.Random(seed * 100003 + index), semaphore)
+        for index in range(rooms)
+    ))
+    stage.elapsed = loop.time() - started
+    return stage.summary()
+
+
+def print_summary(summary: Dict[str, Any]):
+    def ms(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    print(f"{summary['rooms']:>6} {summary['calls']:>7} {summary['throughput']:>8.1f} "
+          f"{ms(summary['p50_ms']):>7} {ms(summary['p99_ms']):>7} {summary['max_ms']:>8.0f} "
+          f"{summary['error_rate'] * 100:>6.2f}% {ms(summary['start_lag_p99_ms']):>8}")
+    for kind, detail in summary["by_type"].items():
+        print(f"{'':>6} {kind:>7} {detail['calls']:>8} {ms(detail['p50_ms']):>7} {ms(detail['p99_ms']):>7} "
+              f"{'':>8} {detail['error_rate'] * 100:>6.2f}%")
+    for kind, sample in summary["errors"].items():
+        print(f"{'':>6} first {kind} error: {sample}")
+
+
+async def main(args) -> List[Dict[str, Any]]:
+    stand_in = None
+    url = args.url
+    if args.stand_in:
+        from mcp_stand_in import start_stand_in
+        stand_in, url = start_stand_in(latency_ms=args.stand_in_latency_ms, jitter_ms=args.stand_in_latency_ms / 3,
+                                       error_rate=args.stand_in_error_rate, workers=args.stand_in_workers)
+
+    # Tool calls run in the executor; size it so the client isn't the bottleneck
+    asyncio.get_event_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+    controller_options = {"timeout": args.timeout}
+    if args.no_cache:
+        controller_options["cache_ttls"] = {}
+
+    mix = ", ".join(f"{kind} {weight:.0%}" for kind, weight in args.mix.items())
+    print(f"Target {url} ({args.mode}): {args.rate}/min per room, {args.duration:.0f}s per stage, mix {mix}")
+    print(f"{'rooms':>6} {'calls':>7} {'calls/s':>8} {'p50ms':>7} {'p99ms':>7} {'max ms':>8} "
+          f"{'errors':>7} {'lag p99':>8}")
+    summaries = []
+    try:
+        for rooms in args.rooms:
+            summary = await run_stage(url, rooms, args.rate, args.duration, args.mix, args.concurrency,
+                                      args.shared_controller, args.seed, controller_options, args.mode)
+            summaries.append(summary)
+            print_summary(summary)
+    finally:
+        if stand_in:
+            stand_in.shutdown()
+    return summaries
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Simulate many rooms calling the MCP server")
+    # No default target: load meant for a staging server must never reach the guests' one by accident
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="MCP server to load (never defaulted from MCP_SERVER_URL)")
+    target.add_argument("--stand-in", action="store_true", help="Run against a local stand-in server instead")
+    parser.add_argument("--stand-in-latency-ms", type=float, default=30.0)
+    parser.add_argument("--stand-in-error-rate", type=float, default=0.0)
+    parser.add_argument("--stand-in-workers", type=int, default=16, help="Stand-in capacity (0 = unlimited)")
+    parser.add_argument("--mode", choices=["rest", "jsonrpc"], default=os.getenv('MCP_CLIENT_MODE', 'rest'),
+                        help="Client transport, as MCP_CLIENT_MODE")
+    parser.add_argument("--rooms", default="10", help="Rooms per stage, e.g. 50,100,200 to ramp up")
+    parser.add_argument("--rate", type=float, default=4.0, help="Tool calls per room per minute")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per stage")
+    parser.add_argument("--mix", default="control=0.6,status=0.3,raw=0.1",
+                        help="Relative weights of control/status/raw calls")
+    parser.add_argument("--concurrency", type=int, default=256, help="Calls in flight at once across all rooms")
+    parser.add_argument("--threads", type=int, default=64, help="Executor threads for blocking HTTP calls")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-call read timeout")
+    parser.add_argument("--shared-controller", action="store_true", help="One controller for all rooms")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the read-only result cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Also print the summaries as JSON")
+    cli_args = parser.parse_args()
+
+    try:
+        cli_args.rooms = [int(value) for value in cli_args.rooms.split(',')]
+        cli_args.mix = parse_mix(cli_args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.WARNING)
+    # Failed calls are counted in the report rather than logged one by one
+    logging.getLogger("mcp_tools").setLevel(logging.CRITICAL)
+    results = asyncio.run(main(cli_args))
+    if cli_args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
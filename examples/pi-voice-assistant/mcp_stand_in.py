@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Local MCP Stand-in Server
+Offline stand-in for the hotel MCP server: answers /health, REST /call-tool
+and MCP JSON-RPC (streamable HTTP) with in-memory MQTT tools, configurable
+latency, errors and worker capacity, for load tests and development
+
+    python mcp_stand_in.py --port 8765 --latency-ms 40 --workers 8
+"""
+
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOOLS = [
+    {
+        "name": "mqtt_publish",
+        "description": "Publish a message to an MQTT topic",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "topic": {"type": "string"},
+                "message": {"type": "string"},
+                "qos": {"type": "integer", "minimum": 0, "maximum": 2},
+                "retain": {"type": "boolean"}
+            },
+            "required": ["topic", "message"]
+        }
+    },
+    {
+        "name": "mqtt_read_messages",
+        "description": "Read the latest messages received on an MQTT topic",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"topic": {"type": "string"}, "max_messages": {"type": "integer"}},
+            "required": ["topic"]
+        }
+    },
+    {
+        "name": "mqtt_list_topics",
+        "description": "List MQTT topics with recent messages",
+        "inputSchema": {"type": "object", "properties": {}}
+    },
+    {
+        "name": "mqtt_get_status",
+        "description": "MQTT broker connection status",
+        "inputSchema": {"type": "object", "properties": {}}
+    },
+]
+
+
+class StandInState:
+    def __init__(self,
+                 latency_ms: float = 30.0,
+                 jitter_ms: float = 10.0,
+                 error_rate: float = 0.0,
+                 workers: int = 0,
+                 history: int = 10):
+        """
+        Behaviour of the stand-in server
+
+        Args:
+            latency_ms: Mean service time per tool call
+            jitter_ms: Standard deviation of the service time
+            error_rate: Fraction of tool calls answered with HTTP 500
+            workers: Calls served at once, the rest queue (0 = unlimited)
+            history: Messages kept per topic
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.workers = threading.BoundedSemaphore(workers) if workers > 0 else None
+        self.history = history
+        self.topics = {}
+        self.sessions = set()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Tuple[bool, Any]:
+        """Run one tool call with the configured delay; returns (ok, result or error text)"""
+        if self.workers:
+            self.workers.acquire()
+        try:
+            delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            time.sleep(delay)
+            with self.lock:
+                self.calls += 1
+                if random.random() < self.error_rate:
+                    self.errors += 1
+                    return False, "Injected failure"
+                return True, self._run(name, arguments)
+        finally:
+            if self.workers:
+                self.workers.release()
+
+    def _run(self, name: str, arguments: Dict[str, Any]) -> Any:
+        if name == "mqtt_publish":
+            topic = arguments.get("topic", "")
+            messages = self.topics.setdefault(topic, [])
+            messages.append({"payload": arguments.get("message"), "timestamp": time.time()})
+            del messages[:-self.history]
+            return {"published": True, "topic": topic}
+        if name == "mqtt_read_messages":
+            messages = self.topics.get(arguments.get("topic", ""), [])
+            return {"messages": messages[-int(arguments.get("max_messages", 10)):]}
+        if name == "mqtt_list_topics":
+            return {"topics": sorted(self.topics)}
+        if name == "mqtt_get_status":
+            return {"connected": True, "uptime": round(time.time() - self.started)}
+        raise KeyError(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "errors": self.errors, "topics": len(self.topics),
+                "sessions": len(self.sessions)}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MCPStandIn/1.0"
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+    def _reply(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith("/health"):
+            self._reply(200, {"status": "ok", **self.state.stats()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        self.state.sessions.discard(self.headers.get("Mcp-Session-Id"))
+        self._reply(200)
+
+    def do_POST(self):
+        try:
+            body = self._body()
+        except ValueError:
+            self._reply(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+
+        if self.path.rstrip('/').endswith("/call-tool"):
+            ok, result = self._call(body.get("tool", ""), body.get("parameters") or {})
+            if ok:
+                self._reply(200, result)
+            else:
+                self._reply(500 if result == "Injected failure" else 400, {"error": result})
+            return
+        self._jsonrpc(body)
+
+    def _call(self, name: str, arguments: Dict[str, Any]) -> Tuple[bool, Any]:
+        if name not in {tool["name"] for tool in TOOLS}:
+            return False, f"Unknown tool: {name}"
+        return self.state.call_tool(name, arguments)
+
+    def _jsonrpc(self, body: Any):
+        messages = body if isinstance(body, list) else [body]
+        session_id = self.headers.get("Mcp-Session-Id")
+        is_initialize = any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages)
+        if not is_initialize and session_id not in self.state.sessions:
+            self._reply(404, {"jsonrpc": "2.0", "id": None,
+                              "error": {"code": -32001, "message": "Session not found"}})
+            return
+
+        headers = {}
+        replies = []
+        for message in messages:
+            if not isinstance(message, dict) or "id" not in message:
+                continue  # notifications
+            method = message.get("method")
+            params = message.get("params") or {}
+            reply = {"jsonrpc": "2.0", "id": message["id"]}
+            if method == "initialize":
+                session_id = uuid.uuid4().hex
+                self.state.sessions.add(session_id)
+                headers["Mcp-Session-Id"] = session_id
+                reply["result"] = {
+                    "protocolVersion": params.get("protocolVersion", "2025-03-26"),
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": "mcp-stand-in", "version": "1.0"}
+                }
+            elif method == "ping":
+                reply["result"] = {}
+            elif method == "tools/list":
+                reply["result"] = {"tools": TOOLS}
+            elif method == "tools/call":
+                ok, result = self._call(params.get("name", ""), params.get("arguments") or {})
+                if not ok and result == "Injected failure":
+                    self._reply(500, {"error": result})
+                    return
+                reply["result"] = {"content": [{"type": "text", "text": json.dumps(result)}], "isError": not ok}
+            else:
+                reply["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+            replies.append(reply)
+
+        if not replies:
+            self._reply(202, headers=headers)
+        else:
+            self._reply(200, replies if isinstance(body, list) else replies[0], headers)
+
+
+def start_stand_in(host: str = "127.0.0.1", port: int = 0, **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve the stand-in from a background thread
+
+    Returns:
+        (server, base URL); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.state = StandInState(**options)
+    thread = threading.Thread(target=server.serve_forever, name="mcp-stand-in", daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_port}/mcp"
+    logger.info(f"MCP stand-in listening on {url}")
+    return server, url
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the hotel MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Mean service time per call")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Service time standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with HTTP 500")
+    parser.add_argument("--workers", type=int, default=0, help="Calls served at once (0 = unlimited)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stand_in, base_url = start_stand_in(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                        error_rate=args.error_rate, workers=args.workers)
+    print(f"Serving on {base_url} (MCP_SERVER_URL={base_url}); Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stand_in.shutdown()
+        print(stand_in.state.stats())
@@ -5,37 +5,224 @@ Provides hotel room lighting and device control via MCP server
 """
 
 import json
+import time
+import asyncio
 import logging
 import requests
-from typing import Dict, Any, Optional
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from typing import Dict, Any, Optional, List, Union
+from mcp_endpoints import MCPEndpoint, rank_endpoints
+from tool_cache import ToolResultCache
+from wled_scenes import DEFAULT_SCENES, PresetSyncManifest, with_transition, parse_effect_command
 
 logger = logging.getLogger(__name__)
 
+# Read-only tools that are safe to send to more than one endpoint at once
+IDEMPOTENT_TOOLS = {
+    "mqtt_read_messages",
+    "mqtt_list_topics",
+    "mqtt_get_status",
+}
+
 class MCPHotelController:
-    def __init__(self, mcp_server_url: str):
+    def __init__(self,
+                 mcp_server_url: Union[str, List[str]],
+                 timeout: float = 10.0,
+                 connect_timeout: float = 3.0,
+                 hedge_delay: float = None,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 10.0,
+                 cache_ttls: Dict[str, float] = None,
+                 cache_size: int = 128,
+                 scenes: Dict[str, Dict[str, Any]] = None,
+                 manifest: PresetSyncManifest = None):
         """
         Initialize MCP hotel controller
         
         Args:
-            mcp_server_url: URL of the MCP server (e.g., https://srv1000332.hstgr.cloud/mcp)
+            mcp_server_url: URL of the MCP server (e.g., https://srv1000332.hstgr.cloud/mcp),
+                or several as a list or comma-separated string for failover
+            timeout: Read timeout for a tool call in seconds
+            connect_timeout: Connect timeout in seconds
+            hedge_delay: Seconds before a read is hedged to a second endpoint
+                (None adapts it to the primary endpoint's recent latency)
+            failure_threshold: Consecutive failures before an endpoint's circuit opens
+            reset_timeout: Seconds before an open endpoint is first probed via /health
+            cache_ttls: Seconds to cache results per read-only tool ({} disables caching)
+            cache_size: Maximum number of cached results
+            scenes: Scenes stored as WLED presets (default: wled_scenes.DEFAULT_SCENES)
+            manifest: Rooms whose presets are synced; other rooms get the scene's full state
         """
-        self.mcp_server_url = mcp_server_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'Pi-Voice-Assistant/1.0'
-        })
+        if isinstance(mcp_server_url, str):
+            mcp_server_url = mcp_server_url.split(',')
+        urls = [url.strip().rstrip('/') for url in mcp_server_url if url.strip()]
+        if not urls:
+            raise ValueError("At least one MCP server URL is required")
+        
+        self.mcp_server_url = urls[0]
+        self.endpoints = [
+            MCPEndpoint(url, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+            for url in urls
+        ]
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.hedge_delay = hedge_delay
+        self.hedged_requests = 0
+        self.cache = ToolResultCache(ttls=cache_ttls, max_entries=cache_size)
+        self.scenes = DEFAULT_SCENES if scenes is None else scenes
+        self.manifest = manifest or PresetSyncManifest()
         
+    def _check_health(self, endpoint: MCPEndpoint) -> bool:
+        """Blocking /health check against one endpoint"""
+        started = time.perf_counter()
+        try:
+            response = endpoint.session.get(f"{endpoint.url}/health", timeout=5)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if response.status_code == 200:
+                endpoint.record_success(elapsed_ms)
+                return True
+            endpoint.record_failure(elapsed_ms)
+            return False
+        except Exception as e:
+            logger.debug(f"Health check failed for {endpoint.url}: {e}")
+            endpoint.record_failure()
+            return False
+    
     def test_connection(self) -> bool:
-        """Test connection to MCP server"""
+        """Test connection to the MCP server(s); True if any endpoint is healthy"""
         try:
-            response = self.session.get(f"{self.mcp_server_url}/health", timeout=5)
-            logger.info(f"MCP server connection test: {response.status_code}")
-            return response.status_code == 200
+            healthy = [self._check_health(endpoint) for endpoint in self.endpoints]
+            for endpoint, ok in zip(self.endpoints, healthy):
+                logger.info(f"MCP server connection test {endpoint.url}: {'ok' if ok else 'failed'}")
+            return any(healthy)
         except Exception as e:
             logger.error(f"MCP server connection failed: {e}")
             return False
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics for the read-only tool cache"""
+        return self.cache.stats()
+    
+    def get_endpoint_stats(self) -> List[Dict[str, Any]]:
+        """Return latency and circuit state for every endpoint"""
+        return [endpoint.stats() for endpoint in self.endpoints]
+    
+    def _post(self, endpoint: MCPEndpoint, payload: Dict[str, Any]) -> requests.Response:
+        """Blocking tool call against one endpoint, recording latency and failures"""
+        started = time.perf_counter()
+        try:
+            response = endpoint.session.post(
+                f"{endpoint.url}/call-tool",
+                json=payload,
+                timeout=(self.connect_timeout, self.timeout)
+            )
+        except Exception:
+            endpoint.record_failure((time.perf_counter() - started) * 1000)
+            raise
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code >= 500:
+            endpoint.record_failure(elapsed_ms)
+        else:
+            endpoint.record_success(elapsed_ms)
+        return response
+    
+    async def _post_async(self, endpoint: MCPEndpoint, payload: Dict[str, Any]) -> requests.Response:
+        """Run a tool call in the executor so the event loop keeps running"""
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(None, self._post, endpoint, payload)
+        finally:
+            if endpoint.breaker.is_open:
+                self._ensure_probe(endpoint)
+    
+    def _ensure_probe(self, endpoint: MCPEndpoint):
+        """Start a background /health probe for an endpoint with an open circuit"""
+        if endpoint.probe_task is None or endpoint.probe_task.done():
+            logger.warning(f"Circuit open for MCP endpoint {endpoint.url}, probing in background")
+            endpoint.probe_task = asyncio.ensure_future(self._probe_until_healthy(endpoint))
+    
+    async def _probe_until_healthy(self, endpoint: MCPEndpoint):
+        """Probe /health with exponential backoff until the endpoint recovers"""
+        loop = asyncio.get_event_loop()
+        delay = endpoint.breaker.reset_timeout
+        while endpoint.breaker.is_open:
+            await asyncio.sleep(delay)
+            if await loop.run_in_executor(None, self._check_health, endpoint):
+                logger.info(f"MCP endpoint {endpoint.url} recovered")
+                return
+            delay = min(delay * 2, 120.0)
+    
+    def _hedge_delay_for(self, endpoint: MCPEndpoint) -> float:
+        """Seconds to wait on the primary before hedging a read"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95_ms = endpoint.latency_percentile(95)
+        if p95_ms is None:
+            return 0.5
+        return max(0.05, min(1.0, p95_ms / 1000))
+    
+    async def _hedged_post(self, endpoints: List[MCPEndpoint], payload: Dict[str, Any]) -> requests.Response:
+        """Send a read to the best endpoint, and to the runner-up if it is slow to answer"""
+        primary = self._spawn_post(endpoints[0], payload)
+        done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay_for(endpoints[0]))
+        if done and self._usable(primary):
+            return primary.result()
+        
+        self.hedged_requests += 1
+        logger.debug(f"Hedging {payload['tool']} to {endpoints[1].url}")
+        pending = {primary, self._spawn_post(endpoints[1], payload)}
+        if done:
+            pending.discard(primary)
+        
+        last = primary
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                last = task
+                if self._usable(task):
+                    # The loser keeps running in its executor thread; its result is only recorded
+                    return task.result()
+        return last.result()
+    
+    def _spawn_post(self, endpoint: MCPEndpoint, payload: Dict[str, Any]) -> asyncio.Future:
+        task = asyncio.ensure_future(self._post_async(endpoint, payload))
+        # A losing hedge may fail after we've returned; mark its exception as retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+    
+    @staticmethod
+    def _usable(task: asyncio.Future) -> bool:
+        return not task.cancelled() and task.exception() is None and task.result().status_code < 500
+    
+    @staticmethod
+    def _never_sent(error: requests.exceptions.ConnectionError) -> bool:
+        """
+        True if no connection was established, so the server can't have seen the call
+        
+        'Connection aborted' / RemoteDisconnected are ConnectionErrors too, but happen
+        after the request was written and may have run on the server.
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+        reason = getattr(reason, "reason", reason)
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    
+    async def _post_with_failover(self, endpoints: List[MCPEndpoint], payload: Dict[str, Any]) -> requests.Response:
+        """Send a call to the best endpoint, failing over only when it was never delivered"""
+        for index, endpoint in enumerate(endpoints):
+            try:
+                return await self._post_async(endpoint, payload)
+            except requests.exceptions.ConnectionError as e:
+                # Reads may be retried after any connection error; a write only if it
+                # provably never left this device, or it could run on two endpoints
+                retry_safe = payload.get("tool") in IDEMPOTENT_TOOLS or self._never_sent(e)
+                if index == len(endpoints) - 1 or not retry_safe:
+                    raise
+                logger.warning(f"MCP endpoint {endpoint.url} unreachable ({e}), failing over")
+    
     async def call_mcp_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
         """
         Call an MCP tool on the server
@@ -53,22 +240,47 @@ class MCPHotelController:
                 "parameters": kwargs
             }
             
-            logger.info(f"Calling MCP tool: {tool_name} with params: {kwargs}")
+            cacheable = self.cache.is_cacheable(tool_name)
+            if cacheable:
+                cached = self.cache.get(tool_name, kwargs)
+                if cached is not None:
+                    logger.debug(f"MCP tool cache hit: {tool_name} with params: {kwargs}")
+                    return cached
+            elif tool_name == "mqtt_publish":
+                self.cache.invalidate_topic(kwargs.get("topic", ""))
+            generation = self.cache.generation
             
-            response = self.session.post(
-                f"{self.mcp_server_url}/call-tool",
-                json=payload,
-                timeout=10
-            )
+            logger.debug("Calling MCP tool: %s with params: %s", tool_name, kwargs)
+            
+            endpoints = rank_endpoints(self.endpoints)
+            if not endpoints:
+                for endpoint in self.endpoints:
+                    self._ensure_probe(endpoint)
+                return {
+                    "success": False,
+                    "error": "All MCP endpoints are unavailable",
+                    "message": f"Failed to call {tool_name}: hotel systems are temporarily unreachable"
+                }
+            
+            if tool_name in IDEMPOTENT_TOOLS and len(endpoints) > 1:
+                response = await self._hedged_post(endpoints, payload)
+            else:
+                response = await self._post_with_failover(endpoints, payload)
             
             if response.status_code == 200:
                 result = response.json()
-                logger.info(f"MCP tool result: {result}")
-                return {
+                logger.debug("MCP tool result: %s", result)
+                outcome = {
                     "success": True,
                     "result": result,
                     "message": f"Successfully called {tool_name}"
                 }
+                if cacheable:
+                    self.cache.put(tool_name, kwargs, outcome, generation=generation)
+                elif tool_name == "mqtt_publish":
+                    # Reads that raced this publish may have been cached meanwhile
+                    self.cache.invalidate_topic(kwargs.get("topic", ""))
+                return outcome
             else:
                 logger.error(f"MCP tool call failed: {response.status_code} - {response.text}")
                 return {
@@ -85,11 +297,25 @@ class MCPHotelController:
                 "message": f"Exception calling {tool_name}: {str(e)}"
             }
     
+    async def call_mcp_tools(self, calls: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Run several MCP tool calls in order
+
+        Args:
+            calls: (tool_name, parameters) pairs
+
+        Returns:
+            One result dict per call, as from call_mcp_tool
+        """
+        return [await self.call_mcp_tool(tool_name, **parameters) for tool_name, parameters in calls]
+    
     async def control_hotel_lighting(self, 
                                    room: str = "room1",
                                    action: str = "on",
                                    effect: str = None,
-                                   brightness: int = None) -> Dict[str, Any]:
+                                   brightness: int = None,
+                                   scene: str = None,
+                                   transition: float = None) -> Dict[str, Any]:
         """
         Control hotel lighting via MCP MQTT tools
         
@@ -98,10 +324,28 @@ class MCPHotelController:
             action: Basic action (on/off)
             effect: Lighting effect
             brightness: Brightness level
+            scene: Scene name, recalled from the WLED preset if the room has it synced
+            transition: Fade time in seconds, run by the controller
             
         Returns:
             Result from MCP server
         """
+        # A scene is a single message (preset recall or full state) with a device-side transition
+        if scene:
+            definition = self.scenes.get(scene.lower())
+            if not definition:
+                return {
+                    "success": False,
+                    "message": f"Unknown scene: {scene}. Available: {list(self.scenes.keys())}"
+                }
+            return await self.call_mcp_tool(
+                "mqtt_publish",
+                topic=f"{room}/api",
+                message=self.manifest.scene_payload(room, scene.lower(), definition, transition),
+                qos=0,
+                retain=False
+            )
+        
         # Determine MQTT topic and payload based on action
         topic = room
         payload = action.upper() if action.lower() in ['on', 'off'] else None
@@ -123,7 +367,12 @@ class MCPHotelController:
         # Handle brightness via JSON API
         if brightness is not None:
             topic = f"{room}/api"
-            payload = json.dumps({"bri": max(0, min(255, brightness))})
+            payload = json.dumps(with_transition({"bri": max(0, min(255, brightness))}, transition))
+        
+        # Plain ON/OFF/FX= commands can't carry a transition; send those via the JSON API
+        elif transition is not None and payload and parse_effect_command(payload):
+            topic = f"{room}/api"
+            payload = json.dumps(with_transition(parse_effect_command(payload), transition))
         
         # Call MCP MQTT publish tool
         return await self.call_mcp_tool(
@@ -143,6 +392,51 @@ class MCPHotelController:
         )
 
 
+async def dispatch_tool_call(controller: MCPHotelController,
+                             function_name: str,
+                             arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one of the OPENAI_MCP_TOOLS functions against a controller
+    
+    Args:
+        controller: MCP controller (None reports the controller as unavailable)
+        function_name: Tool function name
+        arguments: Parsed tool arguments
+        
+    Returns:
+        Tool result dict
+    """
+    # Tools discovered via tools/list (JSON-RPC mode) are called by their own name
+    discovered = getattr(controller, "tool_names", set())
+    if function_name not in ("control_hotel_lighting", "get_lighting_status", "call_mcp_tool") \
+            and function_name not in discovered:
+        return {
+            "success": False,
+            "message": f"Unknown function: {function_name}"
+        }
+    
+    if not controller:
+        return {
+            "success": False,
+            "message": "MCP controller not available"
+        }
+    
+    if function_name == "control_hotel_lighting":
+        return await controller.control_hotel_lighting(**arguments)
+    
+    elif function_name == "get_lighting_status":
+        return await controller.get_lighting_status(**arguments)
+    
+    elif function_name in discovered:
+        return await controller.call_mcp_tool(function_name, **arguments)
+    
+    else:
+        arguments = dict(arguments)
+        tool_name = arguments.pop("tool_name", "")
+        parameters = arguments.pop("parameters", {})
+        return await controller.call_mcp_tool(tool_name, **parameters)
+
+
 # OpenAI Tool Definitions for MCP Integration
 OPENAI_MCP_TOOLS = [
     {
@@ -173,6 +467,17 @@ OPENAI_MCP_TOOLS = [
                         "minimum": 0,
                         "maximum": 255,
                         "description": "Brightness level from 0 (off) to 255 (maximum brightness)"
+                    },
+                    "scene": {
+                        "type": "string",
+                        # Built-in scenes; the client substitutes the controller's with offer_scenes()
+                        "enum": list(DEFAULT_SCENES),
+                        "description": "Complete lighting scene (mood) to switch to in one step; prefer this over combining effect, color and brightness"
+                    },
+                    "transition": {
+                        "type": "number",
+                        "minimum": 0,
+                        "description": "Fade time in seconds, e.g. 10 for a slow goodnight fade"
                     }
                 },
                 "required": []
@@ -222,6 +527,13 @@ OPENAI_MCP_TOOLS = [
 ]
 
 
+def realtime_tool_definition(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Realtime API sessions take flat function definitions (name at top level, no "function" wrapper)"""
+    if "function" in tool:
+        return {"type": "function", **tool["function"]}
+    return tool
+
+
 def test_mcp_controller():
     """Test MCP hotel controller"""
     import asyncio
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Memory Monitoring for Pi Zero 2 W
+Watches RSS against a budget and, in profiling mode, reports the top
+allocating modules from tracemalloc snapshots
+"""
+
+import os
+import signal
+import asyncio
+import logging
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (Linux only)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def module_for_frame(filename: str) -> Optional[str]:
+    """Application module for a frame (e.g. openai_client), or None outside this app"""
+    if os.path.dirname(os.path.abspath(filename)) == APP_DIR:
+        return os.path.splitext(os.path.basename(filename))[0]
+    return None
+
+
+def package_for_frame(filename: str) -> str:
+    """Top-level package for a library frame (e.g. numpy, websockets)"""
+    parts = filename.replace('\\', '/').split('/')
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts:
+            index = parts.index(marker)
+            if index + 1 < len(parts):
+                return os.path.splitext(parts[index + 1])[0]
+    if parts[-1] == '__init__.py' and len(parts) > 1:
+        return parts[-2]
+    return os.path.splitext(parts[-1])[0]
+
+
+class MemoryMonitor:
+    def __init__(self,
+                 rss_budget_mb: float = 300.0,
+                 warn_ratio: float = 0.85,
+                 check_interval: float = 30.0,
+                 profile: bool = False,
+                 profile_interval: float = 300.0,
+                 traceback_frames: int = 12,
+                 top_n: int = 10):
+        """
+        Initialize memory monitor
+
+        Args:
+            rss_budget_mb: RSS the process is expected to stay under
+            warn_ratio: Fraction of the budget at which warnings start
+            check_interval: Seconds between RSS checks
+            profile: Take tracemalloc snapshots on every profile_interval
+            profile_interval: Seconds between profiling reports
+            traceback_frames: Frames kept per allocation to attribute it to an app module
+            top_n: Number of modules listed per report
+        """
+        self.rss_budget_mb = rss_budget_mb
+        self.warn_ratio = warn_ratio
+        self.check_interval = check_interval
+        self.profile = profile
+        self.profile_interval = profile_interval
+        self.traceback_frames = traceback_frames
+        self.top_n = top_n
+
+        self.peak_rss_mb = 0.0
+        self.warnings = 0
+        self.previous_totals = None
+        self.report_requested = None
+
+    def start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            logger.info(f"tracemalloc started ({self.traceback_frames} frames)")
+
+    def module_totals(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        """Bytes currently allocated, grouped by the innermost app module on each traceback"""
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        totals = defaultdict(int)
+        for stat in snapshot.statistics('traceback'):
+            owner = None
+            # Tracebacks are stored most recent call last
+            for frame in reversed(stat.traceback):
+                owner = module_for_frame(frame.filename)
+                if owner:
+                    break
+            if owner is None:
+                owner = package_for_frame(stat.traceback[-1].filename)
+            totals[owner] += stat.size
+        return dict(totals)
+
+    def collect(self) -> Dict[str, int]:
+        """Snapshot and group traced allocations (slow with many traces; keep it off the event loop)"""
+        return self.module_totals(tracemalloc.take_snapshot())
+
+    async def report(self) -> List[Tuple[str, float, float]]:
+        """Log the top allocating modules and their growth since the last report"""
+        self.start_tracing()
+        # Snapshotting and walking every traceback takes hundreds of ms on a Pi
+        loop = asyncio.get_event_loop()
+        totals = await loop.run_in_executor(None, self.collect)
+        previous = self.previous_totals or {}
+        self.previous_totals = totals
+
+        top = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+        rows = [(module, size / 1024, (size - previous.get(module, 0)) / 1024) for module, size in top]
+
+        traced, peak = tracemalloc.get_traced_memory()
+        logger.info(f"🧠 Memory report: RSS {read_rss_mb() or 0:.1f} MB, "
+                    f"traced {traced / 1048576:.1f} MB (peak {peak / 1048576:.1f} MB)")
+        for module, size_kb, growth_kb in rows:
+            logger.info(f"   {module:<24} {size_kb:>9.1f} KiB  ({growth_kb:+.1f} KiB)")
+        return rows
+
+    def check_rss(self) -> Optional[float]:
+        """Warn when RSS approaches the budget"""
+        rss = read_rss_mb()
+        if rss is None:
+            return None
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+
+        if rss >= self.rss_budget_mb:
+            self.warnings += 1
+            logger.error(f"RSS {rss:.1f} MB is over the {self.rss_budget_mb:.0f} MB budget")
+        elif rss >= self.rss_budget_mb * self.warn_ratio:
+            self.warnings += 1
+            logger.warning(f"RSS {rss:.1f} MB is at {rss / self.rss_budget_mb:.0%} of the "
+                           f"{self.rss_budget_mb:.0f} MB budget")
+        return rss
+
+    def install_signal_handler(self, sig: int = signal.SIGUSR2):
+        """
+        Take a report when the signal arrives
+
+        If tracing is off, the signal starts it and the report follows one
+        check_interval later, so it has allocations to show.
+        """
+        loop = asyncio.get_event_loop()
+        self.report_requested = asyncio.Event()
+        loop.add_signal_handler(sig, self.report_requested.set)
+        logger.info(f"Send signal {sig} (kill -USR2 {os.getpid()}) for a memory report")
+
+    async def run(self):
+        """Check RSS periodically and report allocations when profiling or signalled"""
+        if self.profile:
+            self.start_tracing()
+        loop = asyncio.get_event_loop()
+        next_report = loop.time() + self.profile_interval
+        deferred_report = False
+        while True:
+            signalled = False
+            if self.report_requested:
+                try:
+                    await asyncio.wait_for(self.report_requested.wait(), timeout=self.check_interval)
+                    self.report_requested.clear()
+                    signalled = True
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(self.check_interval)
+
+            self.check_rss()
+            if signalled and not tracemalloc.is_tracing():
+                # A snapshot taken right after starting would be nearly empty
+                self.start_tracing()
+                logger.info(f"🧠 Memory report in {self.check_interval:.0f}s, once allocations have been traced")
+                deferred_report = True
+                continue
+            if signalled or deferred_report or (self.profile and loop.time() >= next_report):
+                deferred_report = False
+                await self.report()
+                next_report = loop.time() + self.profile_interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rss_mb": read_rss_mb(),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "budget_mb": self.rss_budget_mb,
+            "warnings": self.warnings
+        }
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Realtime Model Tiers
+Routes sessions to a cheaper, faster Realtime model by default, escalates
+long or complex turns to a larger one, demotes a tier whose measured
+time-to-first-audio goes over budget, and keeps warm WebSocket connections
+per tier so switching models doesn't pay for a fresh handshake
+"""
+
+import re
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from telemetry import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Ordered cheapest first. Prices are USD per million tokens
+DEFAULT_TIERS = [
+    {
+        "name": "fast",
+        "model": "gpt-4o-mini-realtime-preview-2024-12-17",
+        "ttfa_budget_ms": 900,
+        "price": {"text_in": 0.60, "text_out": 2.40, "audio_in": 10.0, "audio_out": 20.0}
+    },
+    {
+        "name": "full",
+        "model": "gpt-4o-realtime-preview-2024-10-01",
+        "ttfa_budget_ms": 1500,
+        "price": {"text_in": 5.0, "text_out": 20.0, "audio_in": 100.0, "audio_out": 200.0}
+    },
+]
+
+# Turns that need more than a lighting change or a short factual answer
+COMPLEX_TURN_PATTERN = re.compile(
+    r"\b(why|explain|recommend|compare|plan|itinerary|suggest|difference|how (do|does|can|should)|"
+    r"what should|help me (decide|choose|plan))\b",
+    re.IGNORECASE
+)
+
+
+def load_tiers(path: str) -> List[Dict[str, Any]]:
+    """
+    Load tier definitions from a JSON file (same shape as DEFAULT_TIERS)
+
+    Raises:
+        ValueError: If a tier is missing its name or model
+    """
+    with open(path) as f:
+        tiers = json.load(f)
+    if not isinstance(tiers, list) or not tiers:
+        raise ValueError("Tier file must contain a non-empty list")
+    for index, tier in enumerate(tiers):
+        if not tier.get("name") or not tier.get("model"):
+            raise ValueError(f"Tier {index} needs a 'name' and a 'model'")
+    return tiers
+
+
+class ModelTier:
+    def __init__(self, name: str, model: str, ttfa_budget_ms: float = 1000.0,
+                 price: Dict[str, float] = None, window: int = 20):
+        """
+        One Realtime model with its latency budget and running totals
+
+        Args:
+            name: Short tier name used in logs and reports
+            model: Realtime model id
+            ttfa_budget_ms: Time from end of speech to first audio this tier should meet
+            price: USD per million text/audio input/output tokens
+            window: Recent time-to-first-audio samples used for demotion
+        """
+        self.name = name
+        self.model = model
+        self.ttfa_budget_ms = ttfa_budget_ms
+        self.price = price or {}
+        self.recent = deque(maxlen=window)
+        self.ttfa = LatencyHistogram()
+        self.demoted_until = 0.0
+
+        self.sessions = 0
+        self.turns = 0
+        self.escalations = 0
+        self.demotions = 0
+        self.over_budget = 0
+        self.tokens = {"text_in": 0, "text_out": 0, "audio_in": 0, "audio_out": 0}
+        self.cost_usd = 0.0
+
+    @property
+    def demoted(self) -> bool:
+        return time.monotonic() < self.demoted_until
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "sessions": self.sessions,
+            "turns": self.turns,
+            "escalations": self.escalations,
+            "ttfa_p50_ms": self.ttfa.percentile(50),
+            "ttfa_p90_ms": self.ttfa.percentile(90),
+            "ttfa_budget_ms": self.ttfa_budget_ms,
+            "over_budget": self.over_budget,
+            "demotions": self.demotions,
+            "demoted": self.demoted,
+            "tokens": dict(self.tokens),
+            "cost_usd": round(self.cost_usd, 4),
+            "cost_per_turn_usd": round(self.cost_usd / self.turns, 5) if self.turns else None
+        }
+
+
+class TierRouter:
+    def __init__(self,
+                 tiers: List[Dict[str, Any]] = None,
+                 escalate_words: int = 20,
+                 min_samples: int = 5,
+                 breach_ratio: float = 0.5,
+                 demote_seconds: float = 600.0,
+                 telemetry=None):
+        """
+        Initialize tier router
+
+        Args:
+            tiers: Tier definitions, cheapest first (default DEFAULT_TIERS)
+            escalate_words: Turns with at least this many words go to a higher tier
+            min_samples: Recent samples needed before a tier can be demoted
+            breach_ratio: Fraction of recent samples over budget that demotes a tier
+            demote_seconds: How long a demoted tier is skipped
+            telemetry: Optional TelemetryCollector receiving ttfa_<tier> samples
+        """
+        self.tiers = [ModelTier(tier["name"], tier["model"], tier.get("ttfa_budget_ms", 1000.0), tier.get("price"))
+                      for tier in (tiers or DEFAULT_TIERS)]
+        self.escalate_words = escalate_words
+        self.min_samples = min_samples
+        self.breach_ratio = breach_ratio
+        self.demote_seconds = demote_seconds
+        self.telemetry = telemetry
+
+        # Tier serving the current session, and when the turn being answered ended
+        self.active = None
+        self.turn_ended_at = None
+
+    def default_tier(self) -> ModelTier:
+        """Cheapest tier that isn't demoted (or, if all are, the one closest to its budget)"""
+        for tier in self.tiers:
+            if not tier.demoted:
+                return tier
+        return min(self.tiers, key=lambda t: (t.ttfa.percentile(90) or 0) / t.ttfa_budget_ms)
+
+    def is_complex(self, transcript: str) -> bool:
+        return len(transcript.split()) >= self.escalate_words or bool(COMPLEX_TURN_PATTERN.search(transcript))
+
+    def escalation_target(self, transcript: str) -> Optional[ModelTier]:
+        """Higher tier to hand a complex turn to, or None to stay on the active tier"""
+        if self.active is None or not self.is_complex(transcript):
+            return None
+        for tier in self.tiers[self.tiers.index(self.active) + 1:]:
+            if not tier.demoted:
+                return tier
+        return None
+
+    def activate(self, tier: ModelTier, escalated: bool = False):
+        """Make a tier the one serving the session"""
+        if escalated:
+            tier.escalations += 1
+            logger.info(f"⬆️ Escalating turn from {self.active.name} to {tier.name} ({tier.model})")
+        else:
+            tier.sessions += 1
+        self.active = tier
+
+    def record_ttfa(self, tier: ModelTier, ttfa_ms: float):
+        tier.ttfa.record(ttfa_ms)
+        tier.recent.append(ttfa_ms)
+        if self.telemetry:
+            self.telemetry.record(f"ttfa_{tier.name}", ttfa_ms)
+        if ttfa_ms > tier.ttfa_budget_ms:
+            tier.over_budget += 1
+
+        breaches = sum(1 for sample in tier.recent if sample > tier.ttfa_budget_ms)
+        if len(tier.recent) >= self.min_samples and breaches / len(tier.recent) >= self.breach_ratio:
+            tier.demoted_until = time.monotonic() + self.demote_seconds
+            tier.demotions += 1
+            tier.recent.clear()
+            logger.warning(f"⬇️ Demoting tier {tier.name} for {self.demote_seconds:.0f}s: "
+                           f"{breaches} recent turns over its {tier.ttfa_budget_ms:.0f} ms budget")
+
+    def record_usage(self, tier: ModelTier, usage: Dict[str, Any]):
+        """Add response.done usage to a tier's token and cost totals"""
+        inputs = usage.get("input_token_details") or {}
+        outputs = usage.get("output_token_details") or {}
+        counts = {
+            "text_in": inputs.get("text_tokens", 0),
+            "audio_in": inputs.get("audio_tokens", 0),
+            "text_out": outputs.get("text_tokens", 0),
+            "audio_out": outputs.get("audio_tokens", 0),
+        }
+        for kind, count in counts.items():
+            tier.tokens[kind] += count
+            tier.cost_usd += count * tier.price.get(kind, 0.0) / 1_000_000
+
+    def on_event(self, message_type: str, data: Dict[str, Any]):
+        """Observe a Realtime server event from the active tier's connection"""
+        tier = self.active
+        if tier is None:
+            return
+        if message_type == "input_audio_buffer.speech_stopped":
+            self.turn_ended_at = time.perf_counter()
+        elif message_type == "response.audio.delta" and self.turn_ended_at is not None:
+            # Only the first audio of a turn counts; follow-ups after tool calls don't
+            self.record_ttfa(tier, (time.perf_counter() - self.turn_ended_at) * 1000)
+            self.turn_ended_at = None
+        elif message_type == "response.done":
+            tier.turns += 1
+            self.record_usage(tier, (data.get("response") or {}).get("usage") or {})
+
+    def mark_turn_start(self):
+        """A response was requested without a speech_stopped event (session greeting, escalation)"""
+        self.turn_ended_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        return {tier.name: tier.report() for tier in self.tiers}
+
+
+class TierConnectionPool:
+    def __init__(self,
+                 connect: Callable[[str], Awaitable[Any]],
+                 warm: int = 1,
+                 max_idle: float = 600.0):
+        """
+        Warm Realtime WebSocket connections per model
+
+        Each spare is a fresh, unused session: conversations are never shared
+        between guests, only the TLS/WebSocket handshake is paid in advance.
+
+        Args:
+            connect: Coroutine opening a WebSocket for a model id
+            warm: Spare connections kept open per model
+            max_idle: Seconds an unused spare is kept (sessions expire server-side);
+                spares are replaced in the background before they reach it
+        """
+        self.connect = connect
+        self.warm = warm
+        self.max_idle = max_idle
+        self.spares = {}
+        self.fill_tasks = {}
+        self.wakeups = {}
+        self.refreshed = 0
+        self.hits = {}
+        self.misses = {}
+        self.connect_ms = LatencyHistogram()
+
+    async def _open(self, model: str):
+        started = time.perf_counter()
+        websocket = await self.connect(model)
+        self.connect_ms.record((time.perf_counter() - started) * 1000)
+        return websocket
+
+    async def acquire(self, model: str):
+        """A connected WebSocket for the model: a warm spare if one is usable, otherwise a new one"""
+        spares = self.spares.setdefault(model, deque())
+        while spares:
+            websocket, opened_at = spares.popleft()
+            if websocket.open and time.monotonic() - opened_at < self.max_idle:
+                self.hits[model] = self.hits.get(model, 0) + 1
+                self.refill(model)
+                return websocket
+            asyncio.ensure_future(websocket.close())
+        self.misses[model] = self.misses.get(model, 0) + 1
+        websocket = await self._open(model)
+        self.refill(model)
+        return websocket
+
+    def refill(self, model: str):
+        """Top up the model's spares in the background"""
+        if self.warm <= 0:
+            return
+        task = self.fill_tasks.get(model)
+        if task is None or task.done():
+            self.wakeups[model] = asyncio.Event()
+            self.fill_tasks[model] = asyncio.ensure_future(self._fill(model))
+        else:
+            self.wakeups[model].set()
+
+    async def _fill(self, model: str):
+        """Keep the model's spares topped up, replacing each one shortly before max_idle"""
+        spares = self.spares.setdefault(model, deque())
+        wakeup = self.wakeups[model]
+        while True:
+            wakeup.clear()
+            try:
+                while len(spares) < self.warm:
+                    spares.append((await self._open(model), time.monotonic()))
+            except Exception as e:
+                logger.warning(f"Could not pre-open a connection for {model}: {e}")
+                return
+
+            # Refresh at 90% of max_idle so acquire() never finds only stale spares
+            refresh_in = min(opened_at for _, opened_at in spares) + self.max_idle * 0.9 - time.monotonic()
+            try:
+                await asyncio.wait_for(wakeup.wait(), max(refresh_in, 0.0))
+                continue
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            for spare in list(spares):
+                websocket, opened_at = spare
+                if not websocket.open or now - opened_at >= self.max_idle * 0.9:
+                    spares.remove(spare)
+                    asyncio.ensure_future(websocket.close())
+                    self.refreshed += 1
+
+    async def close(self):
+        for task in self.fill_tasks.values():
+            task.cancel()
+        for spares in self.spares.values():
+            while spares:
+                websocket, _ = spares.popleft()
+                await websocket.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "spares": {model: len(spares) for model, spares in self.spares.items()},
+            "refreshed": self.refreshed,
+            "connect_p50_ms": self.connect_ms.percentile(50)
+        }
@@ -7,9 +7,10 @@ Provides hotel room lighting and device control via MQTT
 import json
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable
 import paho.mqtt.client as mqtt
 from asyncio_mqtt import Client as AsyncMQTTClient
+from wled_scenes import DEFAULT_SCENES, PresetSyncManifest, offer_scenes, with_transition, parse_effect_command
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,9 @@ class MQTTHotelController:
                  port: int = 1883,
                  username: str = None,
                  password: str = None,
-                 use_tls: bool = False):
+                 use_tls: bool = False,
+                 scenes: Dict[str, Dict[str, Any]] = None,
+                 manifest: PresetSyncManifest = None):
         """
         Initialize MQTT hotel controller
         
@@ -29,12 +32,16 @@ class MQTTHotelController:
             username: MQTT username
             password: MQTT password
             use_tls: Use TLS encryption
+            scenes: Scenes stored as WLED presets (default: wled_scenes.DEFAULT_SCENES)
+            manifest: Rooms whose presets are synced; other rooms get the scene's full state
         """
         self.broker = broker
         self.port = port
         self.username = username
         self.password = password
         self.use_tls = use_tls
+        self.scenes = DEFAULT_SCENES if scenes is None else scenes
+        self.manifest = manifest or PresetSyncManifest()
         
         # Room control topics
         self.room_topics = {
@@ -104,18 +111,31 @@ class MQTTHotelController:
         """Publish message to MQTT topic"""
         try:
             await self.client.publish(topic, payload)
-            logger.info(f"Published to {topic}: {payload}")
+            logger.debug("Published to %s: %s", topic, payload)
             return True
         except Exception as e:
             logger.error(f"Failed to publish to {topic}: {e}")
             return False
     
+    async def listen(self, topic: str, handler: Callable[[str, str], Any]):
+        """Subscribe to a topic and call handler(topic, payload) for each message until cancelled"""
+        async with self.client.filtered_messages(topic) as messages:
+            await self.client.subscribe(topic)
+            logger.info(f"Listening on {topic}")
+            async for message in messages:
+                try:
+                    handler(str(message.topic), message.payload.decode(errors="replace"))
+                except Exception as e:
+                    logger.error(f"Error handling message on {topic}: {e}")
+    
     async def control_room_lighting(self, 
                                   room: str = "room1",
                                   action: str = "on",
                                   effect: str = None,
                                   color: str = None,
-                                  brightness: int = None) -> Dict[str, Any]:
+                                  brightness: int = None,
+                                  scene: str = None,
+                                  transition: float = None) -> Dict[str, Any]:
         """
         Control room lighting via MQTT
         
@@ -125,6 +145,8 @@ class MQTTHotelController:
             effect: Lighting effect name
             color: Color name
             brightness: Brightness level (0-255)
+            scene: Scene name, recalled from the preset if the room has it synced
+            transition: Fade time in seconds, run by the controller
             
         Returns:
             Dict with result status and message
@@ -134,10 +156,32 @@ class MQTTHotelController:
                 return {"success": False, "message": "MQTT not connected"}
             
             topic = self.room_topics.get(room, room)
+            api_topic = f"{room}/api"
+            
+            # Scenes are one message (preset recall or full state); the controller runs the fade
+            if scene:
+                definition = self.scenes.get(scene.lower())
+                if not definition:
+                    return {
+                        "success": False,
+                        "message": f"Unknown scene: {scene}. Available: {list(self.scenes.keys())}"
+                    }
+                payload = self.manifest.scene_payload(room, scene.lower(), definition, transition)
+                success = await self.publish_message(api_topic, payload)
+                return {
+                    "success": success,
+                    "message": f"Set {room} lights to the {scene} scene",
+                    "topic": api_topic,
+                    "payload": payload
+                }
             
             # Handle basic on/off
             if action.lower() in ['off', 'on']:
                 payload = action.upper()
+                if transition is not None:
+                    # Plain ON/OFF commands can't carry a transition; use the JSON API
+                    topic = api_topic
+                    payload = json.dumps(with_transition(parse_effect_command(payload), transition))
                 success = await self.publish_message(topic, payload)
                 return {
                     "success": success,
@@ -150,6 +194,9 @@ class MQTTHotelController:
             if effect:
                 effect_cmd = self.effects.get(effect.lower())
                 if effect_cmd:
+                    if transition is not None and parse_effect_command(effect_cmd):
+                        topic = api_topic
+                        effect_cmd = json.dumps(with_transition(parse_effect_command(effect_cmd), transition))
                     success = await self.publish_message(topic, effect_cmd)
                     return {
                         "success": success,
@@ -165,9 +212,8 @@ class MQTTHotelController:
             
             # Handle brightness via JSON API
             if brightness is not None:
-                api_topic = f"{room}/api"
                 brightness = max(0, min(255, brightness))  # Clamp to valid range
-                payload = json.dumps({"bri": brightness})
+                payload = json.dumps(with_transition({"bri": brightness}, transition))
                 success = await self.publish_message(api_topic, payload)
                 return {
                     "success": success,
@@ -180,8 +226,7 @@ class MQTTHotelController:
             if color:
                 color_rgb = self.colors.get(color.lower())
                 if color_rgb:
-                    api_topic = f"{room}/api"
-                    payload = json.dumps({"seg": [{"col": [color_rgb]}]})
+                    payload = json.dumps(with_transition({"seg": [{"col": [color_rgb]}]}, transition))
                     success = await self.publish_message(api_topic, payload)
                     return {
                         "success": success,
@@ -206,15 +251,19 @@ class MQTTHotelController:
                 "success": False,
                 "message": f"Error: {str(e)}"
             }
+    
+    def tool_definitions(self) -> List[Dict[str, Any]]:
+        """OPENAI_TOOLS offering this controller's scenes"""
+        return offer_scenes(OPENAI_TOOLS, self.scenes)
 
 
-# OpenAI Tool Definitions
+# OpenAI Tool Definitions (the scene enum is replaced with the loaded scenes; see tool_definitions)
 OPENAI_TOOLS = [
     {
         "type": "function",
         "function": {
             "name": "control_hotel_lighting",
-            "description": "Control hotel room lighting including on/off, effects, colors, and brightness",
+            "description": "Control hotel room lighting including scenes, on/off, effects, colors, and brightness",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -243,6 +292,17 @@ OPENAI_TOOLS = [
                         "minimum": 0,
                         "maximum": 255,
                         "description": "Brightness level (0-255)"
+                    },
+                    "scene": {
+                        "type": "string",
+                        # Built-in scenes; offer_scenes() substitutes the loaded ones
+                        "enum": list(DEFAULT_SCENES),
+                        "description": "Complete lighting scene (mood) to switch to in one step"
+                    },
+                    "transition": {
+                        "type": "number",
+                        "minimum": 0,
+                        "description": "Fade time in seconds"
                     }
                 },
                 "required": []
@@ -7,23 +7,35 @@ Handles WebSocket connection and tool integration
 import os
 import json
 import logging
+import time
+import base64
 import asyncio
-import websockets
-import pyaudio
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Callable
-from mcp_tools import MCPHotelController, OPENAI_MCP_TOOLS
+from mcp_tools import MCPHotelController, OPENAI_MCP_TOOLS, dispatch_tool_call, realtime_tool_definition
+from speculative_tools import SpeculativeToolExecutor
+from wled_scenes import DEFAULT_SCENES, offer_scenes
+from audio_playback import AudioPlayer
+from conversation_context import ConversationContextManager
+from uplink_control import UplinkController
+from outbound_scheduler import OutboundScheduler, AUDIO
 
 logger = logging.getLogger(__name__)
 
 class OpenAIRealtimeClient:
-    def __init__(self, api_key: str, mcp_controller: MCPHotelController = None):
+    def __init__(self,
+                 api_key: str,
+                 mcp_controller: MCPHotelController = None,
+                 audio_format: str = "pcm16",
+                 context_token_budget: int = 6000):
         """
         Initialize OpenAI Realtime API client
         
         Args:
             api_key: OpenAI API key
             mcp_controller: MCP controller for tool execution
+            audio_format: Wire format for audio in both directions (pcm16, g711_ulaw, g711_alaw)
+            context_token_budget: Conversation size in tokens before old turns are pruned
         """
         self.api_key = api_key
         self.mcp_controller = mcp_controller
@@ -36,24 +48,108 @@ class OpenAIRealtimeClient:
         self.channels = 1
         self.chunk_size = 1024
         
+        # G.711 formats are 8 kHz on the wire; the codec resamples to/from the device rate
+        self.audio_format = audio_format
+        self.codec = None
+        if audio_format != "pcm16":
+            from g711 import AudioCodec
+            self.codec = AudioCodec(audio_format, device_rate=self.sample_rate)
+        self.player = AudioPlayer(sample_rate=self.sample_rate, channels=self.channels)
+        
+        # The uplink may temporarily switch to a lower-bitrate input format under congestion
+        self.input_format = audio_format
+        self.uplink_codec = self.codec
+        self.uplink = UplinkController(chunk_ms=self.chunk_size / self.sample_rate * 1000)
+        
+        # Single writer for the WebSocket during a conversation: control > tool results > audio
+        self.outbound = OutboundScheduler(lambda: self.websocket)
+        
+        # Dedicated, named thread for blocking microphone reads (visible to the sampling profiler)
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-capture")
+        
         # Session state
         self.session_active = False
         self.conversation_id = None
+        self.end_reason = None
+        
+        # Callbacks observing every server event as (message_type, data)
+        self.event_listeners = []
+        
+        # Keeps the server-side conversation under a token budget
+        self.context = ConversationContextManager(token_budget=context_token_budget)
+        self.add_event_listener(self.context.on_event)
+        
+        # Starts idempotent lighting calls while their arguments are still streaming
+        self.speculative = SpeculativeToolExecutor(
+            lambda function_name, arguments: dispatch_tool_call(self.mcp_controller, function_name, arguments)
+        )
+        
+        # Optional ConfirmationClips played as soon as a tool call finishes
+        self.confirmations = None
+        
+        # Optional ToolOutputShaper compacting results before they go back to the model
+        self.output_shaper = None
         
+        # Optional ResponseCache answering repeat questions without a generation
+        self.response_cache = None
+        self.turn_recorder = None
+        self.current_response_id = None
+        self.response_in_progress = False
+        self.cancel_next_response = False
+        self.cancelled_responses = set()
+        
+        # Tool definitions offered to the model (replaced by the discovered catalog in JSON-RPC mode)
+        self.tools = OPENAI_MCP_TOOLS
+        
+        # Realtime model for a single-model setup; with a TierRouter the tier picks the model
+        self.model = "gpt-4o-realtime-preview-2024-10-01"
+        self.tiers = None
+        self.pool = None
+        
+        # Optional TelemetryCollector receiving tool_call and ws_rtt samples
+        self.telemetry = None
+        self.rtt_interval = 5.0
+        self.last_rtt_ms = None
+        
+    async def open_websocket(self, model: str):
+        """Open a Realtime WebSocket for a model (no session configuration)"""
+        import websockets
+
+        uri = f"wss://api.openai.com/v1/realtime?model={model}"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "OpenAI-Beta": "realtime=v1"
+        }
+        # Bounded incoming queue and frame size; audio deltas are small, frequent messages
+        return await websockets.connect(uri, extra_headers=headers, max_queue=64, max_size=2 ** 20)
+    
+    def enable_model_tiers(self, router, pool=None):
+        """Pick the Realtime model per session from a TierRouter, optionally from warm per-tier connections"""
+        self.tiers = router
+        self.pool = pool
+        self.add_event_listener(router.on_event)
+    
     async def connect(self) -> bool:
         """Connect to OpenAI Realtime API"""
         try:
-            uri = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "OpenAI-Beta": "realtime=v1"
-            }
+            model = self.model
+            tier = None
+            if self.tiers:
+                tier = self.tiers.default_tier()
+                model = tier.model
             
-            logger.info("Connecting to OpenAI Realtime API...")
-            self.websocket = await websockets.connect(uri, extra_headers=headers)
+            logger.info(f"Connecting to OpenAI Realtime API ({model})...")
+            if self.pool:
+                self.websocket = await self.pool.acquire(model)
+            else:
+                self.websocket = await self.open_websocket(model)
             logger.info("✅ Connected to OpenAI Realtime API")
+            if tier:
+                self.tiers.activate(tier)
             
             # Configure session with tools
+            self.input_format = self.audio_format
+            self.uplink_codec = self.codec
             await self.configure_session()
             
             return True
@@ -62,13 +158,82 @@ class OpenAIRealtimeClient:
             logger.error(f"Failed to connect to OpenAI: {e}")
             return False
     
+    async def escalate(self, tier, transcript: str) -> bool:
+        """
+        Hand the current turn to a higher model tier
+        
+        The model is fixed per Realtime session, so this moves the conversation
+        to a (warm) connection for the tier: earlier turns are carried over as a
+        system note and the guest's words as text, then a response is requested.
+        """
+        if self.response_in_progress and self.current_response_id:
+            await self.cancel_response(self.current_response_id)
+        else:
+            self.cancel_next_response = True
+        self.player.clear()
+        
+        try:
+            if self.pool:
+                websocket = await self.pool.acquire(tier.model)
+            else:
+                websocket = await self.open_websocket(tier.model)
+        except Exception as e:
+            logger.warning(f"Escalation to {tier.name} failed, staying on {self.tiers.active.name}: {e}")
+            self.cancel_next_response = False
+            await self.send_message({"type": "response.create", "response": {"modalities": ["text", "audio"]}})
+            return False
+        
+        history = []
+        for entry in self.context.items.values():
+            if entry["type"] == "message" and entry["text"] and entry["text"] != transcript:
+                speaker = {"user": "Guest", "assistant": "Assistant"}.get(entry["role"], "Note")
+                history.append(f"{speaker}: {entry['text'].strip()}")
+        
+        old_websocket = self.websocket
+        self.websocket = websocket
+        self.tiers.activate(tier, escalated=True)
+        self.context.reset()
+        self.response_in_progress = False
+        self.cancel_next_response = False
+        self.current_response_id = None
+        self.input_format = self.audio_format
+        self.uplink_codec = self.codec
+        self.uplink.reset()
+        await self.configure_session()
+        
+        if history:
+            await self.send_message({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "message",
+                    "role": "system",
+                    "content": [{"type": "input_text", "text": "Conversation so far: " + " | ".join(history)}]
+                }
+            })
+        await self.send_message({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "user",
+                "content": [{"type": "input_text", "text": transcript}]
+            }
+        })
+        self.tiers.mark_turn_start()
+        await self.send_message({"type": "response.create", "response": {"modalities": ["text", "audio"]}})
+        await old_websocket.close()
+        return True
+    
     async def configure_session(self):
         """Configure the session with tools and instructions"""
+        # Offer the scenes the controller actually knows (SCENES_FILE may replace the built-in ones)
+        scenes = getattr(self.mcp_controller, "scenes", DEFAULT_SCENES)
+        scene_hint = (f"For a complete mood change, prefer a scene ({', '.join(scenes)}); "
+                      "add a transition in seconds for slow fades.\n\n") if scenes else ""
         session_config = {
             "type": "session.update",
             "session": {
                 "modalities": ["text", "audio"],
-                "instructions": """You are LIMI AI, a helpful hotel room assistant. You can control the room lighting and provide information about hotel services.
+                "instructions": f"""You are LIMI AI, a helpful hotel room assistant. You can control the room lighting and provide information about hotel services.
 
 For lighting control, you have access to these effects:
 - colorful: Fun colorful patterns
@@ -83,12 +248,12 @@ For lighting control, you have access to these effects:
 - fire: Fire flicker effect
 - ocean: Ocean wave patterns
 
-You can also set specific colors (red, green, blue, white, yellow, purple, orange, pink, teal, warm_white, cool_white) and brightness levels (0-255).
+{scene_hint}You can also set specific colors (red, green, blue, white, yellow, purple, orange, pink, teal, warm_white, cool_white) and brightness levels (0-255).
 
 Be conversational and helpful. When controlling lights, describe what you're doing.""",
                 "voice": "alloy",
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
+                "input_audio_format": self.audio_format,
+                "output_audio_format": self.audio_format,
                 "input_audio_transcription": {
                     "model": "whisper-1"
                 },
@@ -98,7 +263,7 @@ Be conversational and helpful. When controlling lights, describe what you're doi
                     "prefix_padding_ms": 300,
                     "silence_duration_ms": 200
                 },
-                "tools": OPENAI_MCP_TOOLS,
+                "tools": [realtime_tool_definition(tool) for tool in offer_scenes(self.tools, scenes)],
                 "tool_choice": "auto",
                 "temperature": 0.8,
                 "max_response_output_tokens": 4096
@@ -108,124 +273,189 @@ Be conversational and helpful. When controlling lights, describe what you're doi
         await self.send_message(session_config)
         logger.info("Session configured with tools")
     
-    async def send_message(self, message: Dict[str, Any]):
-        """Send message to OpenAI API"""
+    def add_event_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Register a callback invoked with (message_type, data) for every server event"""
+        self.event_listeners.append(listener)
+    
+    def decode_audio_delta(self, delta: str) -> bytes:
+        """response.audio.delta payload -> device PCM16"""
+        audio_data = base64.b64decode(delta)
+        if self.codec:
+            audio_data = self.codec.decode(audio_data)
+        return audio_data
+    
+    def enable_response_cache(self, cache):
+        """Record completed answers into a ResponseCache and serve repeat questions from it"""
+        from response_cache import TurnRecorder
+        
+        self.response_cache = cache
+        self.turn_recorder = TurnRecorder(cache)
+        self.add_event_listener(self.turn_recorder.on_event)
+    
+    async def cancel_response(self, response_id: str):
+        """Cancel a live response and drop any of its audio still arriving"""
+        self.cancelled_responses.add(response_id)
+        await self.send_message({"type": "response.cancel"})
+    
+    async def serve_cached_response(self, transcript: str) -> bool:
+        """Answer a transcript from the response cache; returns True on a hit"""
+        entry = self.response_cache.lookup(transcript)
+        if entry is None:
+            return False
+        
+        logger.info(f"💾 Answering from response cache: {entry.key!r}")
+        self.turn_recorder.skip()
+        if self.response_in_progress and self.current_response_id:
+            await self.cancel_response(self.current_response_id)
+        else:
+            # Server VAD hasn't created the response for this turn yet
+            self.cancel_next_response = True
+        
+        self.player.clear()
+        self.player.play_all(entry.audio)
+        self.response_cache.record_saving(entry, self.turn_recorder.since_speech_stopped_ms() or 0.0)
+        
+        # Keep the conversation coherent for follow-up questions
+        if entry.text:
+            await self.send_message({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "text", "text": entry.text}]
+                }
+            })
+        return True
+    
+    async def set_input_format(self, audio_format: str):
+        """Switch the microphone audio format mid-session"""
+        if audio_format == self.audio_format:
+            self.uplink_codec = self.codec
+        elif audio_format == "pcm16":
+            self.uplink_codec = None
+        else:
+            from g711 import AudioCodec
+            self.uplink_codec = AudioCodec(audio_format, device_rate=self.sample_rate)
+        self.input_format = audio_format
+        logger.info(f"Uplink input format: {audio_format}")
+        # Queued with the audio, so frames already encoded in the old format go out first
+        await self.send_message({
+            "type": "session.update",
+            "session": {"input_audio_format": audio_format}
+        }, priority=AUDIO)
+    
+    async def end_session(self, reason: str):
+        """End the current conversation; start_conversation returns once both loops stop"""
+        if not self.session_active:
+            return
+        logger.info(f"Ending session: {reason}")
+        self.end_reason = reason
+        self.session_active = False
         if self.websocket:
+            # Closing ends the incoming message loop
+            await self.websocket.close()
+    
+    async def send_message(self, message: Dict[str, Any], priority: Optional[int] = None):
+        """Send message to OpenAI API (through the outbound scheduler during a conversation)"""
+        if self.outbound.running:
+            await self.outbound.send(message, priority)
+        elif self.websocket:
             await self.websocket.send(json.dumps(message))
     
+    async def measure_rtt(self, timeout: float = 5.0) -> Optional[float]:
+        """Round trip time of a WebSocket ping in milliseconds, or None if no pong arrived"""
+        if not self.websocket:
+            return None
+        started = time.perf_counter()
+        try:
+            pong = await self.websocket.ping()
+            await asyncio.wait_for(pong, timeout)
+        except Exception:
+            return None
+        return (time.perf_counter() - started) * 1000
+    
+    async def monitor_rtt(self):
+        """Sample the WebSocket RTT while a conversation is active (cancel when done)"""
+        while self.session_active:
+            rtt = await self.measure_rtt()
+            if rtt is not None:
+                self.last_rtt_ms = rtt
+                if self.telemetry:
+                    self.telemetry.record("ws_rtt", rtt)
+            await asyncio.sleep(self.rtt_interval)
+    
+    def function_call_output(self, call_id: str, result: Dict[str, Any], function_name: str = None) -> Dict[str, Any]:
+        """Wrap a tool result in the conversation item sent back to the model"""
+        if self.output_shaper:
+            output = self.output_shaper.encode(function_name, result)
+        else:
+            output = json.dumps(result)
+        return {
+            "type": "conversation.item.create",
+            "item": {
+                "type": "function_call_output",
+                "call_id": call_id,
+                "output": output
+            }
+        }
+    
     async def handle_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """Handle tool function calls"""
         try:
             function_name = tool_call["function"]["name"]
             arguments = json.loads(tool_call["function"]["arguments"])
             call_id = tool_call["call_id"]
+            started = time.perf_counter()
             
-            logger.info(f"Executing tool: {function_name} with args: {arguments}")
-            
-            if function_name == "control_hotel_lighting":
-                if self.mcp_controller:
-                    result = await self.mcp_controller.control_hotel_lighting(**arguments)
-                    return {
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps(result)
-                        }
-                    }
-                else:
-                    return {
-                        "type": "conversation.item.create", 
-                        "item": {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps({
-                                "success": False,
-                                "message": "MCP controller not available"
-                            })
-                        }
-                    }
+            # Lighting calls may already be running from the streamed arguments
+            result = await self.speculative.resolve(call_id, function_name, arguments)
+            if result is not None:
+                logger.info(f"Tool {function_name} already executed speculatively with args: {arguments}")
+            else:
+                logger.info(f"Executing tool: {function_name} with args: {arguments}")
+                result = await dispatch_tool_call(self.mcp_controller, function_name, arguments)
             
-            elif function_name == "get_lighting_status":
-                if self.mcp_controller:
-                    result = await self.mcp_controller.get_lighting_status(**arguments)
-                    return {
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output", 
-                            "call_id": call_id,
-                            "output": json.dumps(result)
-                        }
-                    }
-                else:
-                    return {
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output", 
-                            "call_id": call_id,
-                            "output": json.dumps({
-                                "success": False,
-                                "message": "MCP controller not available"
-                            })
-                        }
-                    }
+            if self.confirmations:
+                # The guest hears the confirmation now rather than after the model's reply
+                spoken = self.confirmations.play(self.player, function_name, arguments, result)
+                if spoken:
+                    result = dict(result, confirmation_played=spoken)
             
-            elif function_name == "call_mcp_tool":
-                if self.mcp_controller:
-                    tool_name = arguments.pop("tool_name", "")
-                    parameters = arguments.pop("parameters", {})
-                    result = await self.mcp_controller.call_mcp_tool(tool_name, **parameters)
-                    return {
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps(result)
-                        }
-                    }
-                else:
-                    return {
-                        "type": "conversation.item.create",
-                        "item": {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps({
-                                "success": False,
-                                "message": "MCP controller not available"
-                            })
-                        }
-                    }
-            
-            else:
-                return {
-                    "type": "conversation.item.create",
-                    "item": {
-                        "type": "function_call_output",
-                        "call_id": call_id,
-                        "output": json.dumps({
-                            "success": False,
-                            "message": f"Unknown function: {function_name}"
-                        })
-                    }
-                }
+            if self.telemetry:
+                self.telemetry.record("tool_call", (time.perf_counter() - started) * 1000)
+            return self.function_call_output(call_id, result, function_name)
                 
         except Exception as e:
             logger.error(f"Error handling tool call: {e}")
-            return {
-                "type": "conversation.item.create",
-                "item": {
-                    "type": "function_call_output",
-                    "call_id": tool_call.get("call_id", "unknown"),
-                    "output": json.dumps({
-                        "success": False,
-                        "message": f"Tool execution error: {str(e)}"
-                    })
-                }
+            return self.function_call_output(tool_call.get("call_id", "unknown"), {
+                "success": False,
+                "message": f"Tool execution error: {str(e)}"
+            })
+    
+    def parse_function_call(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a tool call from a response.function_call_arguments.done event"""
+        if "item" in data and "function_call" in data["item"]:
+            return data["item"]["function_call"]
+        
+        # The Realtime API sends the call flat; the name may only have been
+        # announced in response.output_item.added
+        call_id = data.get("call_id")
+        name = data.get("name") or self.speculative.names.get(call_id)
+        if not call_id or not name:
+            return None
+        return {
+            "call_id": call_id,
+            "function": {
+                "name": name,
+                "arguments": data.get("arguments", "{}")
             }
+        }
     
     def initialize_audio(self) -> bool:
         """Initialize audio input/output"""
         try:
+            import pyaudio
+
             self.pyaudio = pyaudio.PyAudio()
             
             # Create input stream
@@ -237,6 +467,9 @@ Be conversational and helpful. When controlling lights, describe what you're doi
                 frames_per_buffer=self.chunk_size
             )
             
+            # Create output stream for the assistant's voice
+            self.player.start(self.pyaudio)
+            
             logger.info(f"Audio initialized: {self.sample_rate}Hz, {self.channels} channel(s)")
             return True
             
@@ -255,7 +488,18 @@ Be conversational and helpful. When controlling lights, describe what you're doi
         
         try:
             self.session_active = True
+            self.end_reason = None
+            self.context.reset()
+            self.uplink.reset()
+            self.response_in_progress = False
+            self.cancel_next_response = False
+            self.cancelled_responses.clear()
+            if self.turn_recorder:
+                self.turn_recorder.new_session()
+            self.outbound.start()
             logger.info("🎤 Starting voice conversation...")
+            if self.tiers:
+                self.tiers.mark_turn_start()
             
             # Start conversation
             await self.send_message({
@@ -266,105 +510,193 @@ Be conversational and helpful. When controlling lights, describe what you're doi
             })
             
             # Handle messages in parallel
-            await asyncio.gather(
-                self.handle_incoming_messages(),
-                self.stream_audio_input(),
-                return_exceptions=True
-            )
+            rtt_task = asyncio.ensure_future(self.monitor_rtt())
+            try:
+                await asyncio.gather(
+                    self.handle_incoming_messages(),
+                    self.stream_audio_input(),
+                    return_exceptions=True
+                )
+            finally:
+                rtt_task.cancel()
             
         except Exception as e:
             logger.error(f"Error in conversation: {e}")
         finally:
             self.session_active = False
+            await self.outbound.stop()
+            logger.info(f"Outbound scheduler stats: {self.outbound.stats()}")
+            self.speculative.reset()
             self.cleanup_audio()
     
+    async def handle_message(self, message: str) -> bool:
+        """Handle one server event; returns False when the conversation should end"""
+        data = json.loads(message)
+        message_type = data.get("type")
+        
+        logger.debug("Received: %s", message_type)
+        
+        for listener in self.event_listeners:
+            listener(message_type, data)
+        
+        if message_type == "session.created":
+            logger.info("Session created successfully")
+        
+        elif message_type == "response.created":
+            self.current_response_id = data.get("response", {}).get("id")
+            self.response_in_progress = True
+            if self.cancel_next_response:
+                self.cancel_next_response = False
+                await self.cancel_response(self.current_response_id)
+        
+        elif message_type == "response.audio.delta":
+            # Decode to device PCM16 and hand it to the playback thread
+            audio_data = data.get("delta", "")
+            if audio_data and data.get("response_id") not in self.cancelled_responses:
+                pcm = self.decode_audio_delta(audio_data)
+                self.player.play(pcm)
+                if self.turn_recorder:
+                    self.turn_recorder.record_audio(pcm)
+        
+        elif message_type == "input_audio_buffer.speech_started":
+            # Guest is talking over the assistant; stop what is still queued
+            self.player.clear()
+            self.cancel_next_response = False
+        
+        elif message_type == "response.output_item.added":
+            self.speculative.on_output_item_added(data.get("item", {}))
+        
+        elif message_type == "response.function_call_arguments.delta":
+            # Function call in progress, start it early once the arguments are complete
+            self.speculative.on_arguments_delta(
+                data.get("call_id"), data.get("delta", ""), data.get("name")
+            )
+        
+        elif message_type == "response.function_call_arguments.done":
+            # Function call complete, execute it (or collect the speculative result)
+            tool_call = self.parse_function_call(data)
+            if tool_call:
+                tool_response = await self.handle_tool_call(tool_call)
+                await self.send_message(tool_response)
+                
+                # Continue the response
+                await self.send_message({
+                    "type": "response.create",
+                    "response": {
+                        "modalities": ["text", "audio"]
+                    }
+                })
+        
+        elif message_type == "response.done":
+            logger.info("Response completed")
+            self.response_in_progress = False
+            self.cancelled_responses.discard(data.get("response", {}).get("id"))
+            
+            # Between turns is the cheapest moment to trim old context
+            for context_message in self.context.plan_pruning():
+                await self.send_message(context_message)
+            
+        elif message_type == "error":
+            logger.error(f"OpenAI API error: {data}")
+            self.end_reason = self.end_reason or "api_error"
+            return False
+        
+        elif message_type == "conversation.item.input_audio_transcription.completed":
+            transcript = data.get("transcript", "")
+            logger.info(f"User said: {transcript}")
+            
+            # Check for exit commands
+            if any(word in transcript.lower() for word in ["goodbye", "bye", "stop", "exit", "end"]):
+                logger.info("User ended conversation")
+                self.end_reason = "exit_word"
+                return False
+            
+            if self.response_cache:
+                # Only questions without earlier context are looked up (and cached), and only
+                # while the live answer is still coming (transcription can finish after it)
+                served = not self.turn_recorder.has_context and not self.turn_recorder.done \
+                    and await self.serve_cached_response(transcript)
+                self.turn_recorder.transcript_checked()
+                if served:
+                    return True
+            
+            target = self.tiers.escalation_target(transcript) if self.tiers else None
+            if target:
+                await self.escalate(target, transcript)
+        return True
+    
     async def handle_incoming_messages(self):
         """Handle incoming WebSocket messages"""
+        import websockets
+
         try:
-            async for message in self.websocket:
-                data = json.loads(message)
-                message_type = data.get("type")
-                
-                logger.debug(f"Received: {message_type}")
-                
-                if message_type == "session.created":
-                    logger.info("Session created successfully")
-                
-                elif message_type == "response.audio.delta":
-                    # Handle audio output (would implement audio playback here)
-                    audio_data = data.get("delta", "")
-                    if audio_data:
-                        # TODO: Implement audio playback
-                        pass
-                
-                elif message_type == "response.function_call_arguments.delta":
-                    # Function call in progress
-                    pass
-                
-                elif message_type == "response.function_call_arguments.done":
-                    # Function call complete, execute it
-                    if "item" in data and "function_call" in data["item"]:
-                        tool_response = await self.handle_tool_call(data["item"]["function_call"])
-                        await self.send_message(tool_response)
-                        
-                        # Continue the response
-                        await self.send_message({
-                            "type": "response.create",
-                            "response": {
-                                "modalities": ["text", "audio"]
-                            }
-                        })
-                
-                elif message_type == "response.done":
-                    logger.info("Response completed")
-                    
-                elif message_type == "error":
-                    logger.error(f"OpenAI API error: {data}")
-                    break
-                
-                elif message_type == "conversation.item.input_audio_transcription.completed":
-                    transcript = data.get("transcript", "")
-                    logger.info(f"User said: {transcript}")
-                    
-                    # Check for exit commands
-                    if any(word in transcript.lower() for word in ["goodbye", "bye", "stop", "exit", "end"]):
-                        logger.info("User ended conversation")
-                        break
+            # Read through self.websocket each time: escalation may swap the connection mid-session
+            while await self.handle_message(await self.websocket.recv()):
+                pass
                         
         except websockets.exceptions.ConnectionClosed:
             logger.info("WebSocket connection closed")
+            self.end_reason = self.end_reason or "connection_closed"
         except Exception as e:
             logger.error(f"Error handling messages: {e}")
+            self.end_reason = self.end_reason or "error"
+        finally:
+            # Stop the microphone loop too, however the conversation ended
+            self.session_active = False
     
     async def stream_audio_input(self):
-        """Stream audio input to OpenAI"""
+        """Stream audio input to OpenAI, adapting to uplink congestion"""
+        loop = asyncio.get_event_loop()
         try:
             while self.session_active and self.audio_stream:
-                # Read audio data
-                audio_data = self.audio_stream.read(
-                    self.chunk_size,
-                    exception_on_overflow=False
+                # Blocking read in the executor so the event loop keeps serving playback and events
+                audio_data = await loop.run_in_executor(
+                    self.capture_executor, self.audio_stream.read, self.chunk_size, False
                 )
                 
-                # Convert to base64 for transmission
-                import base64
-                audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                # Send audio to OpenAI
-                await self.send_message({
-                    "type": "input_audio_buffer.append",
-                    "audio": audio_b64
-                })
+                if not self.session_active:
+                    break
                 
-                # Small delay to prevent overwhelming the API
-                await asyncio.sleep(0.01)
+                await self.send_audio_chunk(audio_data)
                 
         except Exception as e:
             logger.error(f"Error streaming audio: {e}")
+        finally:
+            logger.info(f"Uplink stats: {self.uplink.stats()}")
+    
+    async def send_audio_chunk(self, audio_data: bytes):
+        """Encode one microphone chunk and queue it for the writer, adapting to uplink congestion"""
+        delay_ms = self.uplink.observe(self.websocket, self.last_rtt_ms, self.outbound.queued_audio_bytes)
+        if self.telemetry and delay_ms:
+            self.telemetry.record("uplink_queue_delay", delay_ms)
+        
+        input_format = self.uplink.input_format(self.audio_format)
+        if input_format != self.input_format:
+            await self.set_input_format(input_format)
+        
+        # Congestion: frames are aggregated, and long silences are dropped
+        audio_data = self.uplink.push(audio_data)
+        if audio_data is None:
+            return
+        
+        # Encode to the wire format and base64 for transmission
+        if self.uplink_codec:
+            audio_data = self.uplink_codec.encode(audio_data)
+        message = json.dumps({
+            "type": "input_audio_buffer.append",
+            "audio": base64.b64encode(audio_data).decode('utf-8')
+        })
+        
+        # Queue audio for the writer; this waits only while the audio queue is full
+        if self.websocket:
+            await self.outbound.send(message, AUDIO, wait=False)
+            self.uplink.on_sent(len(message))
     
     def cleanup_audio(self):
         """Clean up audio resources"""
         try:
+            self.player.stop()
+            
             if self.audio_stream:
                 self.audio_stream.close()
                 self.audio_stream = None
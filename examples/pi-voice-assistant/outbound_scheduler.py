@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Outbound Message Scheduler
+Single writer for the Realtime WebSocket with priority classes, so an
+interruption or a tool result is never stuck behind queued microphone audio:
+control (response.cancel, buffer clears) > tool (tool results, response.create
+and other conversation/session events, kept in order with each other) > audio
+"""
+
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Callable, Optional, Union
+
+from telemetry import LatencyHistogram
+from uplink_control import UplinkController
+
+logger = logging.getLogger(__name__)
+
+CONTROL, TOOL, AUDIO = 0, 1, 2
+CLASS_NAMES = {CONTROL: "control", TOOL: "tool", AUDIO: "audio"}
+
+# Messages that must overtake everything already queued
+INTERRUPT_TYPES = {"response.cancel", "input_audio_buffer.clear", "output_audio_buffer.clear"}
+AUDIO_TYPES = {"input_audio_buffer.append", "input_audio_buffer.commit"}
+
+
+def classify(message: Dict[str, Any]) -> int:
+    """
+    Priority class of a client event
+
+    response.create shares the tool class rather than control: it must not
+    overtake the function_call_output it follows.
+    """
+    message_type = message.get("type")
+    if message_type in INTERRUPT_TYPES:
+        return CONTROL
+    if message_type in AUDIO_TYPES:
+        return AUDIO
+    return TOOL
+
+
+class OutboundScheduler:
+    def __init__(self,
+                 get_websocket: Callable[[], Any],
+                 limits: Optional[Dict[int, int]] = None,
+                 max_buffered_bytes: int = 16 * 1024,
+                 hold_interval: float = 0.005):
+        """
+        Initialize outbound scheduler
+
+        Args:
+            get_websocket: Returns the current WebSocket (it may change mid-session)
+            limits: Queue bound per class; senders wait for room when it is full
+            max_buffered_bytes: Audio is held back while the transport buffer is above this,
+                so a control message written next doesn't queue behind it in the kernel
+            hold_interval: Poll interval while audio is held back
+        """
+        self.get_websocket = get_websocket
+        self.limits = {CONTROL: 32, TOOL: 32, AUDIO: 50}
+        if limits:
+            self.limits.update(limits)
+        self.max_buffered_bytes = max_buffered_bytes
+        self.hold_interval = hold_interval
+
+        self.queues = {priority: deque() for priority in CLASS_NAMES}
+        self.queued_audio_bytes = 0
+        self.changed = None
+        self.task = None
+
+        self.sent = {priority: 0 for priority in CLASS_NAMES}
+        self.wait_ms = {priority: LatencyHistogram() for priority in CLASS_NAMES}
+        self.max_depth = {priority: 0 for priority in CLASS_NAMES}
+        self.preemptions = 0
+        self.held_seconds = 0.0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        """Start the writer task (one per conversation)"""
+        if self.running:
+            return
+        self.changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """Stop the writer and fail whatever is still queued"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        for queue in self.queues.values():
+            while queue:
+                _, future, _ = queue.popleft()
+                if future and not future.done():
+                    future.set_exception(ConnectionError("Outbound scheduler stopped"))
+        self.queued_audio_bytes = 0
+        if self.changed:
+            # Wake senders waiting for room in a full queue
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def send(self, message: Union[Dict[str, Any], str], priority: Optional[int] = None, wait: bool = True):
+        """
+        Queue a client event
+
+        Args:
+            message: Event dict, or already-encoded JSON text
+            priority: CONTROL, TOOL or AUDIO (default: classify the event)
+            wait: Return once it has been written (raising if the send failed);
+                otherwise return as soon as it is queued
+        """
+        if isinstance(message, str):
+            text = message
+            priority = AUDIO if priority is None else priority
+        else:
+            text = json.dumps(message)
+            priority = classify(message) if priority is None else priority
+
+        queue = self.queues[priority]
+        async with self.changed:
+            await self.changed.wait_for(lambda: len(queue) < self.limits[priority])
+            future = asyncio.get_event_loop().create_future() if wait else None
+            queue.append((text, future, time.perf_counter()))
+            self.max_depth[priority] = max(self.max_depth[priority], len(queue))
+            if priority == AUDIO:
+                self.queued_audio_bytes += len(text)
+            self.changed.notify_all()
+        if future:
+            await future
+
+    def _urgent(self) -> bool:
+        return bool(self.queues[CONTROL] or self.queues[TOOL])
+
+    async def _hold_audio(self, websocket) -> bool:
+        """Wait for the transport buffer to drain; False if something more urgent arrived first"""
+        held = time.perf_counter()
+        try:
+            while UplinkController.write_buffer_size(websocket) > self.max_buffered_bytes:
+                if self._urgent():
+                    return False
+                await asyncio.sleep(self.hold_interval)
+            return not self._urgent()
+        finally:
+            self.held_seconds += time.perf_counter() - held
+
+    async def run(self):
+        """Writer loop: always the oldest message of the most urgent non-empty class"""
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: any(self.queues.values()))
+                priority = next(p for p in (CONTROL, TOOL, AUDIO) if self.queues[p])
+
+            websocket = self.get_websocket()
+            if priority == AUDIO and not await self._hold_audio(websocket):
+                # A control or tool message arrived while audio was held; it goes first
+                self.preemptions += 1
+                continue
+
+            async with self.changed:
+                text, future, queued_at = self.queues[priority].popleft()
+                if priority == AUDIO:
+                    self.queued_audio_bytes -= len(text)
+                self.changed.notify_all()
+
+            self.wait_ms[priority].record((time.perf_counter() - queued_at) * 1000)
+            try:
+                if websocket is None:
+                    raise ConnectionError("Not connected")
+                await websocket.send(text)
+                self.sent[priority] += 1
+                if future and not future.done():
+                    future.set_result(None)
+            except Exception as e:
+                self.failed += 1
+                if future and not future.done():
+                    future.set_exception(e)
+                else:
+                    logger.debug(f"Dropped {CLASS_NAMES[priority]} message: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            name: {
+                "sent": self.sent[priority],
+                "wait_p50_ms": self.wait_ms[priority].percentile(50),
+                "wait_p99_ms": self.wait_ms[priority].percentile(99),
+                "max_depth": self.max_depth[priority]
+            } for priority, name in CLASS_NAMES.items()
+        }
+        stats.update(preemptions=self.preemptions, audio_held_s=round(self.held_seconds, 2), failed=self.failed)
+        return stats
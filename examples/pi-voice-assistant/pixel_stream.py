@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Realtime Pixel Streaming to WLED
+Computes LED frames locally with NumPy effect generators and streams them
+over UDP using DDP (port 4048) or E1.31/sACN (port 5568) at a paced frame
+rate. WLED switches to realtime mode while frames arrive and returns to its
+previous state a few seconds after they stop.
+
+    python pixel_stream.py --loopback             # self-test, no hardware
+    python pixel_stream.py 192.168.1.50 --pixels 120 --effect rainbow
+"""
+
+import time
+import struct
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+DDP_PORT = 4048
+E131_PORT = 5568
+
+# DDP header: flags, sequence, data type, destination, offset, length
+DDP_HEADER = struct.Struct("!BBBBIH")
+DDP_VERSION_1 = 0x40
+DDP_PUSH = 0x01
+DDP_TYPE_RGB8 = 0x0B
+DDP_DESTINATION_DISPLAY = 0x01
+DDP_MAX_DATA = 1440  # 480 RGB pixels, fits a 1500-byte MTU
+
+E131_CHANNELS_PER_UNIVERSE = 510  # 170 RGB pixels; 512 would split a pixel
+E131_HEADER_SIZE = 126
+E131_ACN_ID = b"ASC-E1.17\x00\x00\x00"
+
+# An effect maps (seconds since start, pixel count) to an (n, 3) uint8 frame
+Effect = Callable[[float, int], np.ndarray]
+
+
+def ddp_packets(frame: bytes, sequence: int) -> list:
+    """Split one RGB frame into DDP packets; the last one carries PUSH to display it"""
+    packets = []
+    for offset in range(0, len(frame), DDP_MAX_DATA):
+        data = frame[offset:offset + DDP_MAX_DATA]
+        last = offset + DDP_MAX_DATA >= len(frame)
+        flags = DDP_VERSION_1 | (DDP_PUSH if last else 0)
+        header = DDP_HEADER.pack(flags, sequence & 0x0F, DDP_TYPE_RGB8, DDP_DESTINATION_DISPLAY, offset, len(data))
+        packets.append(header + data)
+    return packets
+
+
+def parse_ddp(packet: bytes) -> Optional[Dict[str, Any]]:
+    if len(packet) < DDP_HEADER.size:
+        return None
+    flags, sequence, _, _, offset, length = DDP_HEADER.unpack_from(packet)
+    if flags & 0xC0 != DDP_VERSION_1:
+        return None
+    return {"sequence": sequence, "offset": offset, "push": bool(flags & DDP_PUSH),
+            "data": packet[DDP_HEADER.size:DDP_HEADER.size + length]}
+
+
+class E131Encoder:
+    def __init__(self, source_name: str = "pi-voice-assistant", priority: int = 100, cid: bytes = None):
+        """Builds E1.31 data packets from a per-universe header template"""
+        self.cid = cid or bytes(16)
+        self.source_name = source_name.encode()[:63].ljust(64, b"\x00")
+        self.priority = priority
+
+    def packet(self, universe: int, sequence: int, channels: bytes) -> bytes:
+        count = len(channels)
+        total = E131_HEADER_SIZE + count
+        header = bytearray(E131_HEADER_SIZE)
+        struct.pack_into("!HH12s", header, 0, 0x0010, 0x0000, E131_ACN_ID)
+        # Root layer
+        struct.pack_into("!HI16s", header, 16, 0x7000 | (total - 16), 0x00000004, self.cid)
+        # Framing layer
+        struct.pack_into("!HI64sBHBBH", header, 38, 0x7000 | (total - 38), 0x00000002,
+                         self.source_name, self.priority, 0, sequence & 0xFF, 0, universe)
+        # DMP layer; the property values start with the DMX start code
+        struct.pack_into("!HBBHHHB", header, 115, 0x7000 | (total - 115), 0x02, 0xA1,
+                         0x0000, 0x0001, count + 1, 0x00)
+        return bytes(header) + channels
+
+    def packets(self, frame: bytes, sequence: int, first_universe: int = 1) -> list:
+        return [
+            self.packet(first_universe + index, sequence, frame[offset:offset + E131_CHANNELS_PER_UNIVERSE])
+            for index, offset in enumerate(range(0, len(frame), E131_CHANNELS_PER_UNIVERSE))
+        ]
+
+
+def parse_e131(packet: bytes) -> Optional[Dict[str, Any]]:
+    if len(packet) < E131_HEADER_SIZE or packet[4:16] != E131_ACN_ID:
+        return None
+    sequence = packet[111]
+    universe = struct.unpack_from("!H", packet, 113)[0]
+    count = struct.unpack_from("!H", packet, 123)[0] - 1
+    return {"sequence": sequence, "universe": universe,
+            "data": packet[E131_HEADER_SIZE:E131_HEADER_SIZE + count]}
+
+
+# Effect generators -------------------------------------------------------
+
+def _hsv_to_rgb(hue: np.ndarray, saturation: float = 1.0, value: np.ndarray = 1.0) -> np.ndarray:
+    """Vectorized HSV -> RGB for hue in [0, 1)"""
+    h = (hue % 1.0) * 6
+    c = value * saturation
+    x = c * (1 - np.abs(h % 2 - 1))
+    m = value - c
+    zeros = np.zeros_like(h)
+    c = np.broadcast_to(c, h.shape)
+    x = np.broadcast_to(x, h.shape)
+    sector = h.astype(int) % 6
+    r = np.choose(sector, [c, x, zeros, zeros, x, c])
+    g = np.choose(sector, [x, c, c, x, zeros, zeros])
+    b = np.choose(sector, [zeros, zeros, x, c, c, x])
+    return (np.stack([r, g, b], axis=-1) + np.expand_dims(np.broadcast_to(m, h.shape), -1)) * 255
+
+
+def rainbow(speed: float = 0.2, spread: float = 1.0) -> Effect:
+    """Rainbow moving along the strip; speed in cycles per second"""
+    def frame(t: float, n: int) -> np.ndarray:
+        hue = np.arange(n) / n * spread + t * speed
+        return _hsv_to_rgb(hue).astype(np.uint8)
+    return frame
+
+
+def breathe(color=(255, 140, 60), period: float = 4.0) -> Effect:
+    """Whole strip fading in and out"""
+    rgb = np.array(color, dtype=np.float32)
+
+    def frame(t: float, n: int) -> np.ndarray:
+        level = 0.15 + 0.85 * (0.5 - 0.5 * np.cos(2 * np.pi * t / period))
+        return np.tile((rgb * level).astype(np.uint8), (n, 1))
+    return frame
+
+
+def comet(color=(80, 160, 255), speed: float = 60.0, tail: int = 20) -> Effect:
+    """Bright head running along the strip with an exponential tail; speed in pixels per second"""
+    rgb = np.array(color, dtype=np.float32)
+
+    def frame(t: float, n: int) -> np.ndarray:
+        head = (t * speed) % n
+        distance = (head - np.arange(n)) % n
+        brightness = np.exp(-distance / max(1, tail / 4)) * (distance < tail)
+        return (brightness[:, None] * rgb).astype(np.uint8)
+    return frame
+
+
+def audio_reactive(level: Callable[[], float],
+                   low=(20, 0, 60), high=(0, 200, 255),
+                   gain: float = 4.0, decay: float = 0.85) -> Effect:
+    """
+    Bar from the strip's centre that follows an audio level, e.g. the assistant's voice
+
+    Args:
+        level: Returns the current level in 0-1 (AudioPlayer.level)
+        low: Color of the idle strip
+        high: Color of the lit bar
+        gain: Level multiplier before clipping
+        decay: Per-frame falloff so the bar doesn't flicker between chunks
+    """
+    low = np.array(low, dtype=np.float32)
+    high = np.array(high, dtype=np.float32)
+    state = {"smoothed": 0.0}
+
+    def frame(t: float, n: int) -> np.ndarray:
+        current = min(1.0, level() * gain)
+        state["smoothed"] = max(current, state["smoothed"] * decay)
+        distance = np.abs(np.arange(n) - (n - 1) / 2) / (n / 2)
+        lit = np.clip((state["smoothed"] - distance) * 4, 0, 1)[:, None]
+        return (low * (1 - lit) + high * lit).astype(np.uint8)
+    return frame
+
+
+EFFECTS = {
+    "rainbow": rainbow,
+    "breathe": breathe,
+    "comet": comet,
+}
+
+
+# Streaming ---------------------------------------------------------------
+
+class _UDPSender(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.errors = 0
+
+    def error_received(self, exc):
+        self.errors += 1
+
+
+class PixelStreamer:
+    def __init__(self,
+                 host: str,
+                 pixel_count: int,
+                 protocol: str = "ddp",
+                 fps: float = 40.0,
+                 port: Optional[int] = None,
+                 first_universe: int = 1,
+                 brightness: float = 1.0):
+        """
+        Initialize pixel streamer
+
+        Args:
+            host: WLED controller address
+            pixel_count: LEDs on the strip
+            protocol: ddp or e131
+            fps: Target frame rate (WLED handles 30-60 fps comfortably)
+            port: UDP port (default 4048 for DDP, 5568 for E1.31)
+            first_universe: First E1.31 universe, as configured in WLED's sync settings
+            brightness: Global scale applied to every frame
+        """
+        if protocol not in ("ddp", "e131"):
+            raise ValueError(f"Unknown pixel protocol: {protocol}")
+
+        self.host = host
+        self.pixel_count = pixel_count
+        self.protocol = protocol
+        self.fps = fps
+        self.port = port or (DDP_PORT if protocol == "ddp" else E131_PORT)
+        self.first_universe = first_universe
+        self.brightness = brightness
+
+        self.e131 = E131Encoder() if protocol == "e131" else None
+        self.last_frame = None
+        self.transport = None
+        self.sender = None
+        self.sequence = 0
+        self.running = False
+        self.closed = False
+
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.late_frames = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+        self.render_total = 0.0
+        self.started_at = None
+
+    async def open(self):
+        loop = asyncio.get_event_loop()
+        self.transport, self.sender = await loop.create_datagram_endpoint(
+            _UDPSender, remote_addr=(self.host, self.port)
+        )
+
+    def close(self):
+        """Stop streaming for good, including a run() that hasn't started yet"""
+        self.closed = True
+        self.running = False
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+    def send_frame(self, frame: np.ndarray):
+        """Send one (pixel_count, 3) uint8 frame"""
+        if self.brightness < 1.0:
+            frame = (frame * self.brightness).astype(np.uint8)
+        data = np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+        self.last_frame = data
+
+        if self.protocol == "ddp":
+            # DDP sequence numbers run 1-15; 0 means "not used"
+            self.sequence = self.sequence % 15 + 1
+            packets = ddp_packets(data, self.sequence)
+        else:
+            self.sequence = (self.sequence + 1) % 256
+            packets = self.e131.packets(data, self.sequence, self.first_universe)
+
+        for packet in packets:
+            self.transport.sendto(packet)
+            self.bytes_sent += len(packet)
+        self.packets_sent += len(packets)
+        self.frames_sent += 1
+
+    async def run(self, effect: Effect, duration: Optional[float] = None):
+        """
+        Stream an effect at the target frame rate until stop() or the duration elapses
+
+        Frames are scheduled on an absolute clock. When the loop falls more than a
+        frame behind, the missed frames are skipped (counted as dropped) rather than
+        sent in a burst, so the strip stays in time.
+        """
+        if self.closed:
+            return
+        if self.transport is None:
+            await self.open()
+            if self.closed:
+                # close() ran while the socket was being opened
+                self.transport.close()
+                self.transport = None
+                return
+        loop = asyncio.get_event_loop()
+        interval = 1.0 / self.fps
+        self.running = True
+        self.started_at = time.monotonic()
+        start = loop.time()
+        next_frame = start
+
+        while self.running:
+            now = loop.time()
+            if duration is not None and now - start >= duration:
+                break
+
+            lateness = now - next_frame
+            if lateness > interval:
+                missed = int(lateness / interval)
+                self.frames_dropped += missed
+                next_frame += missed * interval
+                lateness = now - next_frame
+            if lateness > interval / 4:
+                self.late_frames += 1
+            self.jitter_total += abs(lateness)
+            self.jitter_max = max(self.jitter_max, abs(lateness))
+
+            render_started = time.perf_counter()
+            self.send_frame(effect(next_frame - start, self.pixel_count))
+            self.render_total += time.perf_counter() - render_started
+
+            next_frame += interval
+            await asyncio.sleep(max(0.0, next_frame - loop.time()))
+
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = (time.monotonic() - self.started_at) if self.started_at else 0
+        frames = max(1, self.frames_sent)
+        return {
+            "protocol": self.protocol,
+            "target_fps": self.fps,
+            "achieved_fps": round(self.frames_sent / elapsed, 1) if elapsed else 0.0,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "late_frames": self.late_frames,
+            "avg_jitter_ms": round(self.jitter_total / frames * 1000, 2),
+            "max_jitter_ms": round(self.jitter_max * 1000, 2),
+            "avg_render_ms": round(self.render_total / frames * 1000, 2),
+            "packets_sent": self.packets_sent,
+            "kbps": round(self.bytes_sent * 8 / elapsed / 1000, 1) if elapsed else 0.0,
+            "send_errors": self.sender.errors if self.sender else 0
+        }
+
+
+class LoopbackReceiver(asyncio.DatagramProtocol):
+    def __init__(self, pixel_count: int, protocol: str = "ddp", first_universe: int = 1):
+        """
+        Minimal DDP/E1.31 receiver for testing without a controller
+
+        Reassembles frames, counts sequence gaps and keeps the last complete frame.
+        """
+        self.pixel_count = pixel_count
+        self.protocol = protocol
+        self.first_universe = first_universe
+        self.buffer = bytearray(pixel_count * 3)
+        self.universes_seen = set()
+        self.universe_count = -(-pixel_count * 3 // E131_CHANNELS_PER_UNIVERSE)
+
+        self.last_frame = None
+        self.frames = 0
+        self.packets = 0
+        self.invalid = 0
+        self.sequence_gaps = 0
+        self.last_sequence = None
+
+    def datagram_received(self, data: bytes, addr):
+        self.packets += 1
+        parsed = parse_ddp(data) if self.protocol == "ddp" else parse_e131(data)
+        if parsed is None:
+            self.invalid += 1
+            return
+
+        if self.protocol == "ddp":
+            offset = parsed["offset"]
+            self.buffer[offset:offset + len(parsed["data"])] = parsed["data"]
+            self._check_sequence(parsed["sequence"], 16, first_packet=offset == 0)
+            if parsed["push"]:
+                self._complete()
+        else:
+            index = parsed["universe"] - self.first_universe
+            offset = index * E131_CHANNELS_PER_UNIVERSE
+            self.buffer[offset:offset + len(parsed["data"])] = parsed["data"]
+            self._check_sequence(parsed["sequence"], 256, first_packet=index == 0)
+            self.universes_seen.add(index)
+            if len(self.universes_seen) == self.universe_count:
+                self.universes_seen.clear()
+                self._complete()
+
+    def _check_sequence(self, sequence: int, modulo: int, first_packet: bool):
+        if not first_packet:
+            return
+        if self.last_sequence is not None:
+            expected = self.last_sequence % (modulo - 1) + 1 if modulo == 16 else (self.last_sequence + 1) % modulo
+            if sequence != expected:
+                self.sequence_gaps += 1
+        self.last_sequence = sequence
+
+    def _complete(self):
+        self.frames += 1
+        self.last_frame = np.frombuffer(bytes(self.buffer), dtype=np.uint8).reshape(-1, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"frames": self.frames, "packets": self.packets, "invalid": self.invalid,
+                "sequence_gaps": self.sequence_gaps}
+
+
+async def loopback_test(pixel_count: int = 300, protocol: str = "ddp", fps: float = 40.0,
+                        seconds: float = 3.0, effect_name: str = "rainbow") -> Dict[str, Any]:
+    """Stream an effect to a local receiver and check the frames arrive intact"""
+    loop = asyncio.get_event_loop()
+    transport, receiver = await loop.create_datagram_endpoint(
+        lambda: LoopbackReceiver(pixel_count, protocol), local_addr=("127.0.0.1", 0)
+    )
+    port = transport.get_extra_info("sockname")[1]
+    effect = EFFECTS[effect_name]()
+    streamer = PixelStreamer("127.0.0.1", pixel_count, protocol=protocol, fps=fps, port=port)
+    try:
+        await streamer.run(effect, duration=seconds)
+        await asyncio.sleep(0.1)
+        intact = receiver.last_frame is not None and receiver.last_frame.tobytes() == streamer.last_frame
+    finally:
+        streamer.close()
+        transport.close()
+    return {"streamer": streamer.stats(), "receiver": receiver.stats(), "last_frame_intact": intact}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream LED effects to WLED over DDP/E1.31")
+    parser.add_argument("host", nargs="?", help="WLED controller address")
+    parser.add_argument("--pixels", type=int, default=300)
+    parser.add_argument("--protocol", choices=["ddp", "e131"], default="ddp")
+    parser.add_argument("--fps", type=float, default=40.0)
+    parser.add_argument("--effect", choices=list(EFFECTS), default="rainbow")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--loopback", action="store_true", help="Stream to a local test receiver")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.loopback or not args.host:
+        print(asyncio.run(loopback_test(args.pixels, args.protocol, args.fps, min(args.seconds, 3.0), args.effect)))
+    else:
+        streamer = PixelStreamer(args.host, args.pixels, protocol=args.protocol, fps=args.fps)
+        asyncio.run(streamer.run(EFFECTS[args.effect](), duration=args.seconds))
+        print(streamer.stats())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Remembers the text and audio of answers to recurring guest questions ("what's
+the Wi-Fi password", "when is breakfast"), keyed on the normalized transcript
+with token-set fuzzy matching, so a repeat question is answered from memory
+instead of a full Realtime generation
+"""
+
+import re
+import time
+import logging
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Words that change nothing about what is being asked
+FILLER_WORDS = {
+    "um", "uh", "erm", "hmm", "hey", "hi", "please", "so", "okay", "ok", "well",
+    "just", "like", "actually", "the", "a", "an", "jarvis", "limi",
+}
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase, drop punctuation and filler words, collapse whitespace"""
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[^a-z0-9' ]+", " ", text)
+    return " ".join(word for word in text.split() if word not in FILLER_WORDS)
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """
+    Similarity of two normalized transcripts (0-1), ignoring word order and repeats
+
+    Both sides are rewritten as their shared words followed by their own extra
+    words, so "breakfast when is it" matches "when is breakfast". Unlike
+    fuzzywuzzy's token_set_ratio a subset is not a perfect match: "when is
+    breakfast on sunday" must not get the answer cached for "when is breakfast".
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if not tokens_a or not tokens_b:
+        return 0.0
+    shared = " ".join(sorted(tokens_a & tokens_b))
+    combined_a = f"{shared} {' '.join(sorted(tokens_a - tokens_b))}".strip()
+    combined_b = f"{shared} {' '.join(sorted(tokens_b - tokens_a))}".strip()
+    return SequenceMatcher(None, combined_a, combined_b).ratio()
+
+
+class CachedResponse:
+    def __init__(self, key: str, text: str, audio: bytes, first_audio_ms: Optional[float]):
+        self.key = key
+        self.text = text
+        self.audio = audio
+        # How long the original generation took to start speaking, for savings estimates
+        self.first_audio_ms = first_audio_ms
+        self.created = time.monotonic()
+        self.hits = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.audio) + len(self.text)
+
+
+class ResponseCache:
+    def __init__(self,
+                 ttl: float = 6 * 3600,
+                 max_bytes: int = 8 * 1024 * 1024,
+                 threshold: float = 0.9,
+                 min_words: int = 2,
+                 max_response_bytes: int = 1024 * 1024):
+        """
+        Initialize response cache
+
+        Args:
+            ttl: Seconds an answer stays valid
+            max_bytes: Total text and audio kept; least recently used answers are evicted
+            threshold: Minimum token-set similarity for a fuzzy hit
+            min_words: Shorter transcripts ("yes", "thanks") are never cached or served
+            max_response_bytes: Longer answers are not cached
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.threshold = threshold
+        self.min_words = min_words
+        self.max_response_bytes = max_response_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+
+    def _expired(self, entry: CachedResponse) -> bool:
+        return time.monotonic() - entry.created > self.ttl
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+
+    def lookup(self, transcript: str) -> Optional[CachedResponse]:
+        """Find a cached answer for a transcript (exact normalized match first, then fuzzy)"""
+        key = normalize_transcript(transcript)
+        if len(key.split()) < self.min_words:
+            return None
+        self.lookups += 1
+
+        entry = self.entries.get(key)
+        if entry is None:
+            best_score = 0.0
+            for candidate in list(self.entries.values()):
+                if self._expired(candidate):
+                    continue
+                score = token_set_ratio(key, candidate.key)
+                if score > best_score:
+                    best_score, entry = score, candidate
+            if entry is not None and best_score < self.threshold:
+                entry = None
+            if entry is not None:
+                self.fuzzy_hits += 1
+                logger.debug("Fuzzy response cache hit %r ~ %r (%.2f)", key, entry.key, best_score)
+
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                self._remove(entry.key)
+            return None
+
+        self.entries.move_to_end(entry.key)
+        entry.hits += 1
+        self.hits += 1
+        return entry
+
+    def put(self, transcript: str, text: str, audio: bytes, first_audio_ms: Optional[float] = None) -> bool:
+        """Store an answer; returns False if it isn't cacheable"""
+        key = normalize_transcript(transcript)
+        if len(key.split()) < self.min_words or not audio:
+            return False
+        entry = CachedResponse(key, text, audio, first_audio_ms)
+        if entry.size > min(self.max_response_bytes, self.max_bytes):
+            return False
+
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.bytes += entry.size
+        self.stores += 1
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+        return True
+
+    def record_saving(self, entry: CachedResponse, served_after_ms: float):
+        """Account the latency saved by serving an entry this long after the guest stopped talking"""
+        if entry.first_audio_ms is not None:
+            self.saved_ms += max(0.0, entry.first_audio_ms - served_after_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "saved_ms": round(self.saved_ms)
+        }
+
+
+class TurnRecorder:
+    def __init__(self, cache: ResponseCache):
+        """
+        Event listener that assembles each turn's transcript, answer text and audio
+
+        A turn is stored once both the guest's transcript (after the cache
+        lookup for it) and a completed response are in, unless the response
+        called a tool (its answer depends on live state), was served from the
+        cache, or followed earlier turns of the session (it may depend on them).
+
+        The answer's audio is handed over by the client with record_audio(),
+        as the PCM it already decoded for playback.
+
+        Args:
+            cache: Cache receiving completed turns
+        """
+        self.cache = cache
+        self.new_session()
+
+    def new_session(self):
+        """A new conversation starts without context"""
+        self.prior_turns = 0
+        self.reset()
+
+    @property
+    def has_context(self) -> bool:
+        """Earlier guest turns in this session, which the current answer may depend on"""
+        return self.prior_turns > 0
+
+    def reset(self):
+        self.transcript = None
+        self.checked = False
+        self.speech_stopped_at = None
+        self.first_audio_ms = None
+        self.text = []
+        self.audio = []
+        self.audio_bytes = 0
+        self.cacheable = True
+        self.done = False
+
+    def skip(self):
+        """The current turn was answered from the cache; don't store it again"""
+        self.cacheable = False
+
+    def since_speech_stopped_ms(self) -> Optional[float]:
+        if self.speech_stopped_at is None:
+            return None
+        return (time.perf_counter() - self.speech_stopped_at) * 1000
+
+    def on_event(self, message_type: str, data: Dict[str, Any]):
+        if message_type == "input_audio_buffer.speech_started":
+            self.reset()
+        elif message_type == "input_audio_buffer.speech_stopped":
+            self.speech_stopped_at = time.perf_counter()
+        elif message_type == "conversation.item.input_audio_transcription.completed":
+            # Stored only after the client has looked it up (transcript_checked), so a
+            # response that completed first can't be served back as its own cache hit
+            self.transcript = data.get("transcript", "")
+        elif message_type == "response.audio.delta" and self.cacheable:
+            if self.first_audio_ms is None:
+                self.first_audio_ms = self.since_speech_stopped_ms()
+        elif message_type == "response.audio_transcript.delta":
+            self.text.append(data.get("delta", ""))
+        elif message_type == "response.output_item.added":
+            if data.get("item", {}).get("type") == "function_call":
+                self.cacheable = False
+        elif message_type == "response.done":
+            status = data.get("response", {}).get("status")
+            if status != "completed":
+                self.cacheable = False
+            self.done = True
+            self._store()
+
+    def record_audio(self, pcm: bytes):
+        """Add decoded answer audio; stops buffering once the answer is too long to cache"""
+        if not self.cacheable:
+            return
+        self.audio_bytes += len(pcm)
+        if self.audio_bytes > min(self.cache.max_response_bytes, self.cache.max_bytes):
+            self.cacheable = False
+            self.audio = []
+            return
+        self.audio.append(pcm)
+
+    def transcript_checked(self):
+        """The client looked up the current transcript; the turn may be stored now"""
+        self.checked = True
+        self._store()
+
+    def _store(self):
+        if not (self.done and self.transcript and self.checked):
+            return
+        # Counted once per guest turn, whether or not it is cacheable
+        self.checked = False
+        self.prior_turns += 1
+        if not self.cacheable or self.prior_turns > 1:
+            return
+        if self.cache.put(self.transcript, "".join(self.text), b"".join(self.audio), self.first_audio_ms):
+            logger.debug("Cached response for %r", self.transcript)
+        self.cacheable = False
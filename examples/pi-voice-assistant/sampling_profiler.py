@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+On-demand Sampling Profiler
+Samples the Python stacks of the event loop, wake-word and audio-capture
+threads from a background thread for a fixed duration and writes them as
+collapsed stacks (flamegraph.pl / speedscope input), so a sluggish device can
+be profiled under real load without restarting it
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Thread name prefixes sampled besides the event loop thread
+DEFAULT_THREAD_PREFIXES = ("wake-word", "audio-capture")
+
+
+def frame_label(frame) -> str:
+    """One collapsed-stack entry: function (file:first line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, max_depth: int = 64) -> str:
+    """Outermost-first, semicolon-separated stack for a frame"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self,
+                 output_dir: str = ".",
+                 interval: float = 0.005,
+                 default_duration: float = 30.0,
+                 max_duration: float = 300.0,
+                 thread_prefixes=DEFAULT_THREAD_PREFIXES,
+                 max_depth: int = 64,
+                 label: str = "profile"):
+        """
+        Initialize sampling profiler
+
+        Args:
+            output_dir: Where .folded profiles are written
+            interval: Seconds between samples
+            default_duration: Profile length when a trigger doesn't give one
+            max_duration: Upper bound on a requested profile length
+            thread_prefixes: Names of the threads sampled besides the event loop thread
+            max_depth: Frames kept per stack (innermost frames are kept)
+            label: File name prefix, e.g. the room id
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.default_duration = default_duration
+        self.max_duration = max_duration
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.max_depth = max_depth
+        self.label = label
+
+        self.loop_thread_id = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.profiles_written = 0
+        self.last_profile = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _targets(self) -> Dict[int, str]:
+        """Thread id -> role for every thread to sample"""
+        targets = {}
+        if self.loop_thread_id is not None:
+            targets[self.loop_thread_id] = "event-loop"
+        for thread in threading.enumerate():
+            for prefix in self.thread_prefixes:
+                if thread.name.startswith(prefix):
+                    targets[thread.ident] = prefix
+        return targets
+
+    def start(self, duration: Optional[float] = None) -> bool:
+        """Start profiling in the background; False if a profile is already running"""
+        if self.running:
+            logger.warning("Profiler already running, ignoring trigger")
+            return False
+        duration = min(duration or self.default_duration, self.max_duration)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(duration,), name="sampling-profiler", daemon=True)
+        self.thread.start()
+        logger.info(f"🔬 Sampling profiler started for {duration:.0f}s "
+                    f"({1 / self.interval:.0f} Hz, threads: event-loop, {', '.join(self.thread_prefixes)})")
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self, duration: float):
+        stacks = Counter()
+        samples = 0
+        sampling_time = 0.0
+        refresh_at = 0
+        targets = {}
+        started = time.monotonic()
+        deadline = started + duration
+
+        while not self.stop_event.is_set() and time.monotonic() < deadline:
+            tick = time.perf_counter()
+            # Executor threads come and go; re-resolve them every 100 samples
+            if samples >= refresh_at:
+                targets = self._targets()
+                refresh_at = samples + 100
+            frames = sys._current_frames()
+            for thread_id, role in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[f"{role};{collapse_stack(frame, self.max_depth)}"] += 1
+            del frames
+            samples += 1
+            elapsed = time.perf_counter() - tick
+            sampling_time += elapsed
+            self.stop_event.wait(max(0.0, self.interval - elapsed))
+
+        wall = time.monotonic() - started
+        self.last_profile = self.write(stacks)
+        self.profiles_written += 1
+        logger.info(f"🔬 Profile written to {self.last_profile}: {samples} samples over {wall:.1f}s, "
+                    f"sampler overhead {sampling_time / max(wall, 1e-9) * 100:.1f}% of one core")
+        for stack, count in self.top_functions(stacks):
+            logger.info(f"    {count / max(samples, 1) * 100:5.1f}%  {stack}")
+
+    def write(self, stacks: Counter) -> str:
+        """Write collapsed stacks ('frame;frame;frame count' per line)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    @staticmethod
+    def top_functions(stacks: Counter, n: int = 5):
+        """Innermost functions (with their thread) that appear in the most samples"""
+        leaves = Counter()
+        for stack, count in stacks.items():
+            parts = stack.split(";")
+            leaves[f"{parts[0]}: {parts[-1]}"] += count
+        return leaves.most_common(n)
+
+    def install_signal_handler(self, sig: int = signal.SIGUSR1):
+        """Profile for the default duration when the signal arrives; must run on the event loop"""
+        loop = asyncio.get_event_loop()
+        self.loop_thread_id = threading.get_ident()
+        loop.add_signal_handler(sig, self.start)
+        logger.info(f"Send signal {sig} (kill -USR1 {os.getpid()}) for a {self.default_duration:.0f}s CPU profile")
+
+    def handle_command(self, payload: str) -> bool:
+        """
+        Handle a remote trigger such as 'profile', 'profile 60' or {"command": "profile", "duration": 60}
+
+        Returns:
+            True if the payload was a profile command
+        """
+        import json
+
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            words = payload.split()
+            message = {"command": words[0] if words else ""}
+            if len(words) > 1:
+                message["duration"] = words[1]
+        if not isinstance(message, dict) or message.get("command") != "profile":
+            return False
+        try:
+            duration = float(message["duration"]) if message.get("duration") else None
+        except (TypeError, ValueError):
+            duration = None
+        self.start(duration)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "profiles_written": self.profiles_written,
+            "last_profile": self.last_profile
+        }
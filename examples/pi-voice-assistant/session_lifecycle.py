@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Realtime Session Lifecycle Management
+Keeps a session open for follow-up questions after each response and tears
+it down on silence, idle time, duration or token budget
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque, Counter
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLifecycleManager:
+    def __init__(self,
+                 follow_up_window: float = 8.0,
+                 idle_timeout: float = 30.0,
+                 max_session_seconds: float = 600.0,
+                 token_budget: int = 30000,
+                 check_interval: float = 0.25):
+        """
+        Initialize session lifecycle manager
+
+        Args:
+            follow_up_window: Seconds to wait for the guest to speak again after a
+                response has finished playing, before ending the session
+            idle_timeout: Seconds without any traffic in either direction before ending
+            max_session_seconds: Hard cap on session length
+            token_budget: Total tokens (from response.done usage) before ending
+            check_interval: Seconds between teardown checks
+        """
+        self.follow_up_window = follow_up_window
+        self.idle_timeout = idle_timeout
+        self.max_session_seconds = max_session_seconds
+        self.token_budget = token_budget
+        self.check_interval = check_interval
+
+        # Per-session state
+        self.started_at = None
+        self.last_activity = None
+        self.response_done_at = None
+        self.tokens_used = 0
+        self.turns = 0
+
+        # Recent session summaries for reporting
+        self.history = deque(maxlen=100)
+
+    def start(self):
+        """Reset state for a new session"""
+        now = time.monotonic()
+        self.started_at = now
+        self.last_activity = now
+        self.response_done_at = None
+        self.tokens_used = 0
+        self.turns = 0
+
+    def on_event(self, message_type: str, data: Dict[str, Any]):
+        """Observe a Realtime server event"""
+        now = time.monotonic()
+
+        if message_type == "input_audio_buffer.speech_started":
+            # Guest is talking: the follow-up window is used
+            self.last_activity = now
+            self.response_done_at = None
+            self.turns += 1
+
+        elif message_type in ("response.created", "response.audio.delta"):
+            self.last_activity = now
+            self.response_done_at = None
+
+        elif message_type == "response.done":
+            self.last_activity = now
+            self.response_done_at = now
+            usage = (data.get("response") or {}).get("usage") or {}
+            self.tokens_used += usage.get("total_tokens", 0)
+
+    def check(self, is_playing: Callable[[], bool] = None) -> Optional[str]:
+        """Return the reason the session should end now, or None to keep it open"""
+        if self.started_at is None:
+            return None
+        now = time.monotonic()
+        playing = is_playing() if is_playing else False
+
+        if now - self.started_at > self.max_session_seconds:
+            return "max_duration"
+        if self.tokens_used >= self.token_budget:
+            return "token_budget"
+        if playing:
+            # The window only starts once the guest has heard the whole answer
+            if self.response_done_at is not None:
+                self.response_done_at = now
+            return None
+        if self.response_done_at is not None and now - self.response_done_at > self.follow_up_window:
+            return "follow_up_silence"
+        if now - self.last_activity > self.idle_timeout:
+            return "idle"
+        return None
+
+    async def watch(self, client):
+        """Poll for a teardown condition and end the client's session when one is met (cancel when done)"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            reason = self.check(client.player.is_playing)
+            if reason:
+                await client.end_session(reason)
+                return
+
+    def finish(self, reason: str = None) -> Dict[str, Any]:
+        """Record the end of a session and return its summary"""
+        if self.started_at is None:
+            return {}
+        summary = {
+            "duration_s": round(time.monotonic() - self.started_at, 1),
+            "reason": reason or "unknown",
+            "turns": self.turns,
+            "tokens": self.tokens_used
+        }
+        self.history.append(summary)
+        self.started_at = None
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        """Return session length statistics over recent sessions"""
+        if not self.history:
+            return {"sessions": 0}
+        durations = sorted(session["duration_s"] for session in self.history)
+        return {
+            "sessions": len(durations),
+            "avg_s": round(sum(durations) / len(durations), 1),
+            "median_s": durations[len(durations) // 2],
+            "max_s": durations[-1],
+            "end_reasons": dict(Counter(session["reason"] for session in self.history))
+        }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Speculative Tool Execution for the OpenAI Realtime API
+Follows streamed function-call arguments and starts idempotent tools early
+"""
+
+import json
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# Tools whose calls can safely run twice or run with arguments that are later
+# confirmed, so they may start before response.function_call_arguments.done
+SPECULATIVE_TOOLS = {"control_hotel_lighting", "get_lighting_status"}
+
+# Lighting arguments are a few hundred bytes; anything longer is not worth buffering
+MAX_SPECULATIVE_ARGUMENT_CHARS = 4096
+
+
+class IncrementalJSONObject:
+    def __init__(self, max_chars: int = MAX_SPECULATIVE_ARGUMENT_CHARS):
+        """Track a JSON object arriving in chunks and parse it once its braces close"""
+        self.max_chars = max_chars
+        self.length = 0
+        self.chunks = []
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.finished = False
+        self.value = None
+
+    def feed(self, delta: str) -> Optional[Dict[str, Any]]:
+        """
+        Add a chunk of the JSON text
+
+        Returns:
+            The parsed object the first time it is complete and valid, otherwise None
+        """
+        if self.finished:
+            return None
+        self.length += len(delta)
+        if self.length > self.max_chars:
+            # Give up on speculation; the call still runs normally on .done
+            self.finished = True
+            self.chunks = []
+            return None
+        self.chunks.append(delta)
+
+        for char in delta:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+                self.started = True
+            elif char in '}]':
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    self.finished = True
+                    break
+
+        if not self.finished:
+            return None
+        try:
+            value = json.loads(''.join(self.chunks))
+        except ValueError:
+            return None
+        if isinstance(value, dict):
+            self.value = value
+        return self.value
+
+
+class SpeculativeToolExecutor:
+    def __init__(self,
+                 execute: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 tools: set = None):
+        """
+        Initialize speculative executor
+
+        Args:
+            execute: Coroutine function running a tool by name with parsed arguments
+            tools: Tool names allowed to run speculatively
+        """
+        self.execute = execute
+        self.tools = SPECULATIVE_TOOLS if tools is None else tools
+
+        # Per call_id state for calls that are still streaming
+        self.names = {}
+        self.parsers = {}
+        self.pending = {}
+
+        self.started = 0
+        self.confirmed = 0
+        self.mismatched = 0
+
+    def on_output_item_added(self, item: Dict[str, Any]):
+        """Remember the function name for a call; delta events only carry the call_id"""
+        if item.get("type") == "function_call" and item.get("call_id"):
+            self.names[item["call_id"]] = item.get("name")
+
+    def on_arguments_delta(self, call_id: str, delta: str, name: str = None):
+        """Feed streamed arguments and start the tool as soon as they form a valid object"""
+        name = name or self.names.get(call_id)
+        if not call_id or name not in self.tools or call_id in self.pending:
+            return
+
+        parser = self.parsers.setdefault(call_id, IncrementalJSONObject())
+        arguments = parser.feed(delta)
+        if arguments is None:
+            return
+
+        logger.debug(f"Speculatively executing {name} with args: {arguments}")
+        self.started += 1
+        task = asyncio.ensure_future(self.execute(name, dict(arguments)))
+        # A mismatched speculation is never awaited; keep its exception from being reported
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.pending[call_id] = (name, arguments, task)
+
+    async def resolve(self, call_id: str, name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Reconcile a finished call with any speculative execution
+
+        Returns:
+            The speculative result if it ran with the final arguments, otherwise None
+            (the caller then executes the tool normally)
+        """
+        self.names.pop(call_id, None)
+        self.parsers.pop(call_id, None)
+        speculation = self.pending.pop(call_id, None)
+        if speculation is None:
+            return None
+
+        spec_name, spec_arguments, task = speculation
+        if spec_name != name or spec_arguments != arguments:
+            # Only idempotent tools are speculated, so re-running with the final arguments is safe
+            logger.warning(f"Speculative {spec_name} args {spec_arguments} differ from final {arguments}")
+            self.mismatched += 1
+            return None
+
+        self.confirmed += 1
+        return await task
+
+    def reset(self):
+        """Forget streaming state at the end of a session"""
+        for _, _, task in self.pending.values():
+            if not task.done():
+                task.cancel()
+        self.names.clear()
+        self.parsers.clear()
+        self.pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "confirmed": self.confirmed,
+            "mismatched": self.mismatched
+        }
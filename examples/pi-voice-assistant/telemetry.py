@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Fleet Telemetry
+Collects latency histograms and resource counters on each assistant and
+publishes them as compact JSON on <room>/telemetry. Histograms use HDR-style
+log-linear buckets, so snapshots from many rooms can be merged exactly
+(see telemetry_aggregator.py)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import subprocess
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Tuple
+
+from memory_monitor import read_rss_mb
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_VERSION = 1
+
+# 16 linear sub-buckets per power of two: about 6% relative error
+SUB_BUCKETS = 16
+SUB_BUCKET_BITS = 4
+
+
+def bucket_index(value_ms: float) -> int:
+    """Bucket holding a latency in milliseconds"""
+    value = max(0, int(value_ms))
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Lowest value in a bucket and the lowest value of the next one"""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    def __init__(self, counts: Optional[Dict[int, int]] = None, maximum: float = 0.0):
+        """Log-linear histogram of millisecond latencies"""
+        self.counts = dict(counts or {})
+        self.maximum = maximum
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def record(self, value_ms: float):
+        index = bucket_index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.maximum = max(self.maximum, value_ms)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Approximate percentile (bucket midpoint), or None when empty"""
+        total = self.count
+        if not total:
+            return None
+        rank = percent / 100 * total
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) / 2, self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form: sorted [bucket, count] pairs plus the exact maximum"""
+        return {
+            "b": [[index, self.counts[index]] for index in sorted(self.counts)],
+            "max": round(self.maximum, 1)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        return cls({int(index): count for index, count in data.get("b", [])}, data.get("max", 0.0))
+
+
+def wifi_access_point(interface: str = "wlan0") -> Optional[str]:
+    """BSSID of the access point the device is associated with, if it can be found"""
+    try:
+        output = subprocess.run(["iwgetid", interface, "--ap", "--raw"],
+                                capture_output=True, text=True, timeout=2).stdout.strip()
+        return output.lower() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def wifi_signal_dbm(interface: str = "wlan0") -> Optional[float]:
+    """Signal level from /proc/net/wireless"""
+    try:
+        with open('/proc/net/wireless') as f:
+            for line in f:
+                if line.strip().startswith(interface + ':'):
+                    return float(line.split()[3].rstrip('.'))
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class TelemetryCollector:
+    HISTOGRAMS = ("wake_to_audio", "tool_call", "ws_rtt", "uplink_queue_delay")
+
+    def __init__(self,
+                 room_id: str,
+                 floor: Optional[str] = None,
+                 access_point: Optional[str] = None,
+                 interval: float = 60.0,
+                 interface: str = "wlan0"):
+        """
+        Initialize telemetry collector
+
+        Args:
+            room_id: Room this assistant serves; the topic is <room>/telemetry
+            floor: Floor label for fleet grouping
+            access_point: Access point label; detected from the Wi-Fi interface when None
+            interval: Seconds between published snapshots
+            interface: Wi-Fi interface used for access point and signal detection
+        """
+        self.room_id = room_id
+        self.floor = floor
+        self.access_point = access_point
+        self.interval = interval
+        self.interface = interface
+        self.topic = f"{room_id}/telemetry"
+
+        self.histograms = {name: LatencyHistogram() for name in self.HISTOGRAMS}
+        self.counters = {}
+        # Cumulative counters owned by other components, reported as per-interval deltas
+        self.counter_sources = {}
+        self.counter_last = {}
+
+        self.wake_at = None
+        self.interval_started = time.monotonic()
+        self.cpu_last = self._cpu_seconds()
+        self.published = 0
+        self.publish_failures = 0
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        times = os.times()
+        return times.user + times.system
+
+    def record(self, name: str, value_ms: float):
+        """Add a latency sample to a histogram"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(value_ms)
+
+    def increment(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_counter_source(self, name: str, source: Callable[[], int]):
+        """Report the growth of a cumulative counter (e.g. player.dropped_chunks) each interval"""
+        self.counter_sources[name] = source
+        self.counter_last[name] = source()
+
+    def mark_wake(self):
+        """The wake word was heard; the next assistant audio closes the wake_to_audio sample"""
+        self.wake_at = time.perf_counter()
+
+    def on_event(self, message_type: str, data: Dict[str, Any]):
+        """Observe a Realtime server event"""
+        if message_type == "response.audio.delta" and self.wake_at is not None:
+            self.record("wake_to_audio", (time.perf_counter() - self.wake_at) * 1000)
+            self.wake_at = None
+
+    def snapshot(self, detected_ap: Optional[str] = None) -> Dict[str, Any]:
+        """Build the payload for the interval that just ended and start a new one"""
+        now = time.monotonic()
+        elapsed = max(now - self.interval_started, 1e-6)
+        cpu = self._cpu_seconds()
+
+        counters = dict(self.counters)
+        for name, source in self.counter_sources.items():
+            try:
+                value = source()
+            except Exception:
+                continue
+            counters[name] = counters.get(name, 0) + value - self.counter_last[name]
+            self.counter_last[name] = value
+
+        payload = {
+            "v": TELEMETRY_VERSION,
+            "room": self.room_id,
+            "floor": self.floor,
+            "ap": self.access_point or detected_ap,
+            "ts": int(time.time()),
+            "interval_s": round(elapsed, 1),
+            "cpu_pct": round((cpu - self.cpu_last) / elapsed * 100, 1),
+            "rss_mb": round(read_rss_mb() or 0, 1),
+            "signal_dbm": wifi_signal_dbm(self.interface),
+            "c": counters,
+            "h": {name: histogram.to_dict() for name, histogram in self.histograms.items() if histogram.counts}
+        }
+
+        self.histograms = {name: LatencyHistogram() for name in self.HISTOGRAMS}
+        self.counters = {}
+        self.interval_started = now
+        self.cpu_last = cpu
+        return payload
+
+    async def run(self, publish: Callable[[str, str], Awaitable[Any]]):
+        """Publish a snapshot every interval with publish(topic, payload)"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            detected_ap = None
+            if not self.access_point:
+                # Shells out to iwgetid; the device may roam between access points
+                detected_ap = await loop.run_in_executor(None, wifi_access_point, self.interface)
+            payload = self.snapshot(detected_ap)
+            try:
+                result = await publish(self.topic, json.dumps(payload, separators=(',', ':')))
+                if result is False or (isinstance(result, dict) and not result.get("success")):
+                    raise RuntimeError(result)
+                self.published += 1
+            except Exception as e:
+                self.publish_failures += 1
+                logger.warning(f"Telemetry publish to {self.topic} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"published": self.published, "failures": self.publish_failures}
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge telemetry payloads: histograms and counters add up, CPU averages, RSS takes the max"""
+    histograms = {}
+    counters = {}
+    rooms = set()
+    cpu = []
+    rss = 0.0
+    for snapshot in snapshots:
+        rooms.add(snapshot.get("room"))
+        for name, data in (snapshot.get("h") or {}).items():
+            histograms.setdefault(name, LatencyHistogram()).merge(LatencyHistogram.from_dict(data))
+        for name, value in (snapshot.get("c") or {}).items():
+            counters[name] = counters.get(name, 0) + value
+        if snapshot.get("cpu_pct") is not None:
+            cpu.append(snapshot["cpu_pct"])
+        rss = max(rss, snapshot.get("rss_mb") or 0)
+    return {
+        "rooms": len(rooms),
+        "snapshots": len(snapshots),
+        "cpu_pct": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "rss_mb_max": rss,
+        "counters": counters,
+        "histograms": histograms
+    }
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Fleet Telemetry Aggregator
+Merges <room>/telemetry snapshots from many assistants and prints latency
+percentiles and counters per room, floor or access point
+
+    mosquitto_sub -h broker -t '+/telemetry' > telemetry.jsonl
+    python telemetry_aggregator.py telemetry.jsonl --by floor
+"""
+
+import sys
+import json
+import argparse
+from collections import defaultdict
+from typing import Dict, Any, List, Iterable
+
+from telemetry import merge_snapshots
+
+
+def read_snapshots(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parse JSON lines, skipping anything that isn't a telemetry payload"""
+    snapshots = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        # mosquitto_sub -v prefixes each payload with its topic
+        if not line.startswith('{') and ' {' in line:
+            line = line[line.index(' {') + 1:]
+        try:
+            snapshot = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(snapshot, dict) and "room" in snapshot:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def aggregate(snapshots: List[Dict[str, Any]], by: str = "room") -> Dict[str, Dict[str, Any]]:
+    """Merge snapshots per group (room, floor or ap)"""
+    groups = defaultdict(list)
+    for snapshot in snapshots:
+        groups[str(snapshot.get(by) or "unknown")].append(snapshot)
+    return {group: merge_snapshots(items) for group, items in sorted(groups.items())}
+
+
+def format_ms(value) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_report(groups: Dict[str, Dict[str, Any]], by: str, sort_by: str = "wake_to_audio"):
+    histograms = ("wake_to_audio", "tool_call", "ws_rtt")
+
+    def slowest(item):
+        histogram = item[1]["histograms"].get(sort_by)
+        return -(histogram.percentile(95) or 0) if histogram else 0
+
+    header = f"{by:<20} {'rooms':>5} " + " ".join(f"{name + ' p50/p95/p99':>26}" for name in histograms)
+    print(header + f" {'cpu%':>6} {'rss':>6} {'drops':>6} {'conn':>5}")
+    print("-" * len(header) + "-" * 27)
+
+    for group, merged in sorted(groups.items(), key=slowest):
+        columns = []
+        for name in histograms:
+            histogram = merged["histograms"].get(name)
+            if histogram is None:
+                columns.append(f"{'-':>26}")
+            else:
+                columns.append(f"{format_ms(histogram.percentile(50))}/{format_ms(histogram.percentile(95))}/"
+                               f"{format_ms(histogram.percentile(99))} (n={histogram.count})".rjust(26))
+        counters = merged["counters"]
+        print(f"{group:<20} {merged['rooms']:>5} " + " ".join(columns) +
+              f" {merged['cpu_pct'] if merged['cpu_pct'] is not None else '-':>6}"
+              f" {merged['rss_mb_max']:>6.0f}"
+              f" {counters.get('dropped_frames', 0):>6}"
+              f" {counters.get('connection_drops', 0) + counters.get('connect_failures', 0):>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge assistant telemetry across rooms")
+    parser.add_argument("files", nargs="*", help="JSON-lines files (default: stdin)")
+    parser.add_argument("--by", choices=["room", "floor", "ap"], default="room",
+                        help="Group rooms by this field")
+    parser.add_argument("--sort", default="wake_to_audio",
+                        help="Histogram whose p95 orders the groups (slowest first)")
+    parser.add_argument("--json", action="store_true", help="Print merged results as JSON")
+    args = parser.parse_args()
+
+    snapshots = []
+    if args.files:
+        for path in args.files:
+            with open(path) as f:
+                snapshots.extend(read_snapshots(f))
+    else:
+        snapshots = read_snapshots(sys.stdin)
+
+    groups = aggregate(snapshots, args.by)
+    if args.json:
+        print(json.dumps({
+            group: dict(merged, histograms={
+                name: {"count": h.count, "p50": h.percentile(50), "p95": h.percentile(95),
+                       "p99": h.percentile(99), "max": h.maximum}
+                for name, h in merged["histograms"].items()
+            })
+            for group, merged in groups.items()
+        }, indent=2))
+    else:
+        print_report(groups, args.by, args.sort)
+
+
+if __name__ == "__main__":
+    main()
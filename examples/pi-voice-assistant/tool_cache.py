@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Result Cache for Read-Only MCP Tools
+TTL + LRU memoization keyed by tool name and canonicalized parameters
+"""
+
+import copy
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a result stays fresh, per read-only tool. Tools not listed are never cached.
+DEFAULT_TOOL_TTLS = {
+    "mqtt_read_messages": 5.0,
+    "mqtt_get_status": 10.0,
+    "mqtt_list_topics": 60.0,
+}
+
+
+# A WLED controller subscribed to <base> takes commands on <base>, <base>/api and
+# <base>/col, and reports its state on these topics under the same base
+WLED_COMMAND_SUFFIXES = ("", "api", "col")
+WLED_STATE_SUFFIXES = ("status", "v", "g", "c")
+
+
+def topic_base(topic: str) -> str:
+    """Return the device part of a topic (WLED uses <base>, <base>/api, <base>/status, ...)"""
+    return (topic or "").strip('/').split('/')[0]
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    """MQTT topic filter match, with + and # wildcards"""
+    levels = (subscription or "").strip('/').split('/')
+    parts = (topic or "").strip('/').split('/')
+    for index, level in enumerate(levels):
+        if level == '#':
+            return True
+        if index >= len(parts) or (level != '+' and level != parts[index]):
+            return False
+    return len(levels) == len(parts)
+
+
+def topics_related(cached_topic: str, published_topic: str) -> bool:
+    """
+    True if a publish to published_topic may change what a read of cached_topic returns
+
+    That is a read of the same topic, or, for a WLED command, a read of the
+    state topics of that controller. Other topics under the same base (such as
+    <room>/telemetry) don't touch the lights' state.
+    """
+    if topic_matches(cached_topic, published_topic):
+        return True
+    parts = (published_topic or "").strip('/').split('/')
+    if len(parts) > 2 or (parts[1] if len(parts) == 2 else "") not in WLED_COMMAND_SUFFIXES:
+        return False
+    return any(topic_matches(cached_topic, f"{parts[0]}/{suffix}") for suffix in WLED_STATE_SUFFIXES)
+
+
+class ToolResultCache:
+    def __init__(self, ttls: Dict[str, float] = None, max_entries: int = 128):
+        """
+        Initialize the tool result cache
+
+        Args:
+            ttls: Seconds to keep results per tool name (defaults to DEFAULT_TOOL_TTLS)
+            max_entries: Maximum cached results before least recently used are evicted
+        """
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+        # Bumped on every invalidation so reads that raced a publish aren't stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return self.ttls.get(tool_name, 0) > 0
+
+    @staticmethod
+    def make_key(tool_name: str, params: Dict[str, Any]) -> str:
+        """Canonical key: parameter order and whitespace don't matter"""
+        return tool_name + ":" + json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+
+    def get(self, tool_name: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached result (a copy the caller may modify), or None on a miss"""
+        key = self.make_key(tool_name, params)
+        entry = self.entries.get(key)
+        if entry is None or entry["expires_at"] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return dict(copy.deepcopy(entry["result"]), cached=True)
+
+    def put(self, tool_name: str, params: Dict[str, Any], result: Dict[str, Any], generation: int = None):
+        """
+        Store a result
+
+        Args:
+            generation: The cache generation when the call started; the result is
+                dropped if a matching publish invalidated the cache in the meantime
+        """
+        if not self.is_cacheable(tool_name):
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        key = self.make_key(tool_name, params)
+        self.entries[key] = {
+            "expires_at": time.monotonic() + self.ttls[tool_name],
+            "topic": params.get("topic", ""),
+            # Callers keep using their dict, so store a copy of it
+            "result": copy.deepcopy(result)
+        }
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_topic(self, topic: str) -> int:
+        """Drop every entry whose topic a publish to this topic may affect"""
+        self.generation += 1
+        stale = [key for key, entry in self.entries.items() if topics_related(entry["topic"], topic)]
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached result(s) for topic {topic}")
+        return len(stale)
+
+    def clear(self):
+        self.generation += 1
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tool Output Shaping
+Projects tool results down to the fields the model needs to answer, caps
+their size and encodes them compactly before they go back to the Realtime
+session as function_call_output, counting the bytes (and input tokens) saved
+"""
+
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Any, Callable, Optional
+
+from conversation_context import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# WLED state fields worth telling the guest about
+WLED_STATE_FIELDS = ("on", "bri", "ps", "transition")
+WLED_SEGMENT_FIELDS = ("fx", "pal", "col")
+
+
+def compact_json(value: Any) -> str:
+    """JSON without whitespace, keeping non-ASCII text readable (and shorter)"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def trim(value: Any, max_string: int, max_items: int, depth: int = 6) -> Any:
+    """Cap string lengths, list and dict sizes, and nesting depth of a JSON value"""
+    if isinstance(value, str):
+        return value if len(value) <= max_string else value[:max_string] + "…"
+    if depth <= 0 and isinstance(value, (dict, list)):
+        return trim(compact_json(value), max_string, max_items)
+    if isinstance(value, dict):
+        kept = [(key, item) for key, item in value.items()
+                if item is not None and item != "" and item != [] and item != {}]
+        trimmed = {trim(str(key), max_string, max_items): trim(item, max_string, max_items, depth - 1)
+                   for key, item in kept[:max_items]}
+        if len(kept) > max_items:
+            # Keep the first keys; projections put the ones that matter first
+            trimmed["omitted"] = f"{len(kept) - max_items} more keys"
+        return trimmed
+    if isinstance(value, list):
+        items = [trim(item, max_string, max_items, depth - 1) for item in value[-max_items:]]
+        if len(value) > max_items:
+            # Keep the most recent entries; readings and messages are oldest first
+            items.insert(0, f"({len(value) - max_items} earlier omitted)")
+        return items
+    return value
+
+
+def parse_payload(payload: Any) -> Any:
+    """MQTT payloads arrive as JSON text; decode them so they can be projected"""
+    if isinstance(payload, str) and payload[:1] in "{[":
+        try:
+            return json.loads(payload)
+        except ValueError:
+            pass
+    return payload
+
+
+def wled_state(state: Any) -> Any:
+    """The guest-relevant part of a WLED JSON state (power, brightness, preset, first segment)"""
+    if not isinstance(state, dict) or not ({"on", "bri", "seg"} & set(state)):
+        return state
+    projected = {key: state[key] for key in WLED_STATE_FIELDS if key in state}
+    segments = state.get("seg")
+    if isinstance(segments, list) and segments and isinstance(segments[0], dict):
+        projected["seg"] = {key: segments[0][key] for key in WLED_SEGMENT_FIELDS if key in segments[0]}
+    return projected
+
+
+def base_outcome(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Success flag, plus the reason on failure; 'Successfully called X' tells the model nothing"""
+    outcome = {"success": result.get("success", False)}
+    if not outcome["success"]:
+        outcome["error"] = result.get("message") or result.get("error")
+    if result.get("confirmation_played"):
+        outcome["confirmation_played"] = result["confirmation_played"]
+    return outcome
+
+
+def shape_lighting_control(result: Dict[str, Any]) -> Dict[str, Any]:
+    # The publish echo (topic, message, qos) only repeats the model's own arguments
+    return base_outcome(result)
+
+
+def shape_lighting_status(result: Dict[str, Any]) -> Dict[str, Any]:
+    outcome = base_outcome(result)
+    value = result.get("result")
+    messages = value.get("messages") if isinstance(value, dict) else value
+    if isinstance(messages, list):
+        latest = messages[-1] if messages else None
+        if isinstance(latest, dict):
+            latest = latest.get("payload", latest.get("message", latest))
+        outcome["status"] = wled_state(parse_payload(latest)) if latest is not None else "no recent status"
+    elif value is not None:
+        outcome["status"] = wled_state(parse_payload(value))
+    return outcome
+
+
+def shape_generic(result: Dict[str, Any]) -> Dict[str, Any]:
+    outcome = base_outcome(result)
+    if "result" in result:
+        outcome["result"] = parse_payload(result["result"])
+    for key, value in result.items():
+        # Local additions such as a step list from a batch
+        if key not in ("success", "message", "error", "result", "confirmation_played"):
+            outcome[key] = value
+    return outcome
+
+
+DEFAULT_SHAPES = {
+    "control_hotel_lighting": shape_lighting_control,
+    "get_lighting_status": shape_lighting_status,
+}
+
+
+class ToolOutputShaper:
+    def __init__(self,
+                 max_bytes: int = 1200,
+                 max_string: int = 240,
+                 max_items: int = 10,
+                 shapes: Optional[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None):
+        """
+        Initialize tool output shaper
+
+        Args:
+            max_bytes: Largest encoded output sent to the model
+            max_string: Longest string value kept
+            max_items: Most list entries kept (the most recent ones)
+            shapes: Per-tool projections; other tools use shape_generic
+        """
+        self.max_bytes = max_bytes
+        self.max_string = max_string
+        self.max_items = max_items
+        self.shapes = dict(DEFAULT_SHAPES)
+        if shapes:
+            self.shapes.update(shapes)
+
+        self.calls = defaultdict(int)
+        self.raw_bytes = defaultdict(int)
+        self.sent_bytes = defaultdict(int)
+        self.truncated = 0
+
+    def shape(self, function_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Project a tool result down to what the model needs"""
+        if not isinstance(result, dict):
+            return {"success": True, "result": result}
+        shaper = self.shapes.get(function_name, shape_generic)
+        try:
+            return shaper(result)
+        except Exception as e:
+            logger.warning(f"Could not shape {function_name} output, sending it trimmed: {e}")
+            return shape_generic(result)
+
+    def encode(self, function_name: str, result: Dict[str, Any]) -> str:
+        """Shape, trim and compactly encode a tool result for function_call_output"""
+        function_name = function_name or "unknown"
+        shaped = self.shape(function_name, result)
+        max_string, max_items = self.max_string, self.max_items
+        output = compact_json(trim(shaped, max_string, max_items))
+        # Tighten the caps until it fits, rather than cutting the JSON mid-value
+        while len(output.encode()) > self.max_bytes and max_string > 16:
+            max_string //= 2
+            max_items = max(1, max_items // 2)
+            output = compact_json(trim(shaped, max_string, max_items, depth=3))
+        if len(output.encode()) > self.max_bytes:
+            output = compact_json({"success": shaped.get("success", False),
+                                   "truncated": output[:self.max_bytes // 2]})
+        if max_string != self.max_string:
+            self.truncated += 1
+
+        self.calls[function_name] += 1
+        self.raw_bytes[function_name] += len(json.dumps(result, default=str).encode())
+        self.sent_bytes[function_name] += len(output.encode())
+        return output
+
+    def stats(self) -> Dict[str, Any]:
+        raw = sum(self.raw_bytes.values())
+        sent = sum(self.sent_bytes.values())
+        return {
+            "calls": sum(self.calls.values()),
+            "raw_bytes": raw,
+            "sent_bytes": sent,
+            "saved_percent": round((raw - sent) / raw * 100, 1) if raw else None,
+            "input_tokens_saved": (raw - sent) // CHARS_PER_TOKEN,
+            "tightened_to_fit": self.truncated,
+            "by_tool": {
+                name: {"calls": self.calls[name],
+                       "avg_raw_bytes": self.raw_bytes[name] // self.calls[name],
+                       "avg_sent_bytes": self.sent_bytes[name] // self.calls[name]}
+                for name in sorted(self.calls)
+            }
+        }
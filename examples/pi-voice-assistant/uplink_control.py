@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Adaptive Uplink Control
+Watches how much microphone audio is still sitting in the WebSocket
+transport's write buffer and the ping RTT, and under congestion aggregates
+frames, drops silence and asks for a lower-bitrate input format, so the
+assistant stays responsive on weak hotel Wi-Fi instead of drifting behind
+"""
+
+import time
+import logging
+import numpy as np
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLEAR, CONGESTED, SEVERE = 0, 1, 2
+LEVEL_NAMES = {CLEAR: "clear", CONGESTED: "congested", SEVERE: "severe"}
+
+
+class UplinkController:
+    def __init__(self,
+                 chunk_ms: float,
+                 congested_delay_ms: float = 150.0,
+                 severe_delay_ms: float = 500.0,
+                 severe_rtt_ms: float = 800.0,
+                 aggregation: Dict[int, int] = None,
+                 silence_rms: float = 300.0,
+                 hangover_ms: float = 600.0,
+                 preroll_ms: float = 300.0,
+                 low_bitrate_format: str = "g711_ulaw",
+                 downgrade_after: float = 3.0,
+                 upgrade_after: float = 30.0):
+        """
+        Initialize uplink controller
+
+        Args:
+            chunk_ms: Duration of one capture chunk
+            congested_delay_ms: Estimated queueing delay that counts as congested
+            severe_delay_ms: Estimated queueing delay that counts as severely congested
+            severe_rtt_ms: Ping RTT that counts as severely congested
+            aggregation: Capture chunks per append message for each congestion level
+            silence_rms: RMS below which a chunk is treated as silence
+            hangover_ms: Silence still sent after speech so server VAD sees the turn end
+            preroll_ms: Silence kept and sent ahead of speech (server VAD prefix padding)
+            low_bitrate_format: Input format requested while severely congested (None disables)
+            downgrade_after: Seconds of severe congestion before switching to low bitrate
+            upgrade_after: Seconds without congestion before switching back
+        """
+        self.chunk_ms = chunk_ms
+        self.congested_delay_ms = congested_delay_ms
+        self.severe_delay_ms = severe_delay_ms
+        self.severe_rtt_ms = severe_rtt_ms
+        self.aggregation = aggregation or {CLEAR: 1, CONGESTED: 4, SEVERE: 8}
+        self.silence_rms = silence_rms
+        self.hangover_chunks = max(1, int(hangover_ms / chunk_ms))
+        self.low_bitrate_format = low_bitrate_format
+        self.downgrade_after = downgrade_after
+        self.upgrade_after = upgrade_after
+
+        self.level = CLEAR
+        self.level_since = time.monotonic()
+        self.low_bitrate = False
+
+        # Drain-rate estimate for turning buffered bytes into queueing delay
+        self.buffered_bytes = 0
+        self.sent_since_observe = 0
+        self.last_observe = None
+        self.drain_bytes_per_s = None
+        self.queue_delay_ms = 0.0
+
+        self.pending = []
+        self.preroll = deque(maxlen=max(1, int(preroll_ms / chunk_ms)))
+        self.silent_run = 0
+
+        self.chunks_in = 0
+        self.chunks_sent = 0
+        self.total_bytes_sent = 0
+        self.silence_dropped = 0
+        self.messages_sent = 0
+        self.level_changes = 0
+
+    @staticmethod
+    def write_buffer_size(websocket) -> int:
+        """Bytes the WebSocket transport has accepted but not yet written to the socket"""
+        transport = getattr(websocket, "transport", None)
+        if transport is None:
+            return 0
+        try:
+            return transport.get_write_buffer_size()
+        except Exception:
+            return 0
+
+    def observe(self, websocket, rtt_ms: Optional[float] = None, queued_bytes: int = 0) -> Optional[float]:
+        """
+        Update the congestion level from the transport buffer and RTT
+
+        Args:
+            websocket: The Realtime WebSocket
+            rtt_ms: Latest ping round trip time
+            queued_bytes: Audio accepted but still waiting in the outbound scheduler
+
+        Returns:
+            The estimated queueing delay in milliseconds
+        """
+        now = time.monotonic()
+        buffered = self.write_buffer_size(websocket) + queued_bytes
+
+        if self.last_observe is not None:
+            elapsed = now - self.last_observe
+            drained = self.sent_since_observe - (buffered - self.buffered_bytes)
+            if elapsed > 0 and self.buffered_bytes > 0:
+                # Only measure while there was a backlog; an empty buffer says nothing about capacity
+                rate = max(drained, 0) / elapsed
+                self.drain_bytes_per_s = rate if self.drain_bytes_per_s is None else \
+                    0.8 * self.drain_bytes_per_s + 0.2 * rate
+        self.buffered_bytes = buffered
+        self.sent_since_observe = 0
+        self.last_observe = now
+
+        if buffered and self.drain_bytes_per_s:
+            self.queue_delay_ms = buffered / self.drain_bytes_per_s * 1000
+        elif buffered:
+            # No drain rate measured yet: express the backlog in chunks of audio
+            bytes_per_chunk = self.total_bytes_sent / max(1, self.chunks_sent) or 1
+            self.queue_delay_ms = buffered / bytes_per_chunk * self.chunk_ms
+        else:
+            self.queue_delay_ms = 0.0
+
+        if self.queue_delay_ms >= self.severe_delay_ms or (rtt_ms or 0) >= self.severe_rtt_ms:
+            level = SEVERE
+        elif self.queue_delay_ms >= self.congested_delay_ms:
+            level = CONGESTED
+        elif self.level != CLEAR and self.queue_delay_ms > self.congested_delay_ms / 2:
+            # Hysteresis: stay congested until the backlog has mostly drained
+            level = CONGESTED
+        else:
+            level = CLEAR
+        self._set_level(level, now)
+        self._update_bitrate(now)
+        return self.queue_delay_ms
+
+    def _set_level(self, level: int, now: float):
+        if level != self.level:
+            logger.info(f"Uplink {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} "
+                        f"(queue ~{self.queue_delay_ms:.0f} ms, {self.buffered_bytes} bytes buffered)")
+            self.level = level
+            self.level_since = now
+            self.level_changes += 1
+
+    def on_sent(self, message_bytes: int):
+        """Account for a message handed to the WebSocket"""
+        self.sent_since_observe += message_bytes
+        self.total_bytes_sent += message_bytes
+        self.messages_sent += 1
+
+    def push(self, pcm: bytes) -> Optional[bytes]:
+        """
+        Add a captured chunk
+
+        Returns:
+            PCM to send now (one or more chunks joined), or None to hold or drop it
+        """
+        self.chunks_in += 1
+        silent = self._rms(pcm) < self.silence_rms
+        self.silent_run = self.silent_run + 1 if silent else 0
+
+        if self.level != CLEAR and silent and self.silent_run > self.hangover_chunks:
+            # Long silence under congestion: keep only a short pre-roll for the next onset
+            if len(self.preroll) == self.preroll.maxlen:
+                self.silence_dropped += 1
+            self.preroll.append(pcm)
+            return None
+
+        if self.preroll:
+            self.pending.extend(self.preroll)
+            self.preroll.clear()
+        self.pending.append(pcm)
+
+        if len(self.pending) < self.aggregation[self.level] and not (silent and self.silent_run == 1):
+            return None
+        # Flush early at the first silent chunk so the end of an utterance isn't held back
+        return self.flush()
+
+    def flush(self) -> Optional[bytes]:
+        if not self.pending:
+            return None
+        data = b"".join(self.pending)
+        self.chunks_sent += len(self.pending)
+        self.pending = []
+        return data
+
+    @staticmethod
+    def _rms(pcm: bytes) -> float:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if not len(samples):
+            return 0.0
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def _update_bitrate(self, now: float):
+        if not self.low_bitrate_format:
+            return
+        held = now - self.level_since
+        if not self.low_bitrate and self.level == SEVERE and held >= self.downgrade_after:
+            self.low_bitrate = True
+        elif self.low_bitrate and self.level == CLEAR and held >= self.upgrade_after:
+            self.low_bitrate = False
+
+    def input_format(self, configured: str) -> str:
+        """Input audio format that should be in effect given the configured one"""
+        return self.low_bitrate_format if self.low_bitrate else configured
+
+    def reset(self):
+        """Start a new session with a clear uplink"""
+        self.level = CLEAR
+        self.level_since = time.monotonic()
+        self.low_bitrate = False
+        self.pending = []
+        self.preroll.clear()
+        self.silent_run = 0
+        self.buffered_bytes = 0
+        self.sent_since_observe = 0
+        self.last_observe = None
+        self.queue_delay_ms = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "level": LEVEL_NAMES[self.level],
+            "queue_delay_ms": round(self.queue_delay_ms, 1),
+            "buffered_bytes": self.buffered_bytes,
+            "drain_kbps": round(self.drain_bytes_per_s * 8 / 1000, 1) if self.drain_bytes_per_s else None,
+            "chunks_in": self.chunks_in,
+            "silence_dropped": self.silence_dropped,
+            "messages_sent": self.messages_sent,
+            "level_changes": self.level_changes,
+            "low_bitrate": self.low_bitrate
+        }
@@ -5,11 +5,9 @@ Uses Picovoice Porcupine for efficient local wake word detection
 """
 
 import os
+import time
 import logging
-import numpy as np
-import pyaudio
-import pvporcupine
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +15,9 @@ class WakeWordDetector:
     def __init__(self, 
                  keywords: List[str] = None, 
                  keyword_paths: List[str] = None,
-                 sensitivity: float = 0.5):
+                 sensitivity: float = 0.5,
+                 command_keywords: List[Dict[str, Any]] = None,
+                 energy_gate=None):
         """
         Initialize wake word detector
         
@@ -25,10 +25,24 @@ class WakeWordDetector:
             keywords: Built-in keywords like ['jarvis', 'computer', 'hey google']
             keyword_paths: Paths to custom .ppn keyword files
             sensitivity: Detection sensitivity (0.0 to 1.0)
+            command_keywords: Extra keywords mapped straight to a tool call, each a dict
+                with 'keyword' (built-in) or 'keyword_path' (.ppn), 'tool' and 'arguments'
+            energy_gate: Optional EnergyGate that skips Porcupine during sustained silence
         """
         self.keywords = keywords or ['jarvis']
         self.keyword_paths = keyword_paths
         self.sensitivity = sensitivity
+        self.command_keywords = command_keywords or []
+        self.energy_gate = energy_gate
+        
+        # Display name for every Porcupine keyword index (wake words first, then commands)
+        wake_labels = ([os.path.splitext(os.path.basename(path))[0] for path in keyword_paths]
+                       if keyword_paths else list(self.keywords))
+        self.wake_word_count = len(wake_labels)
+        self.labels = wake_labels + [
+            command.get("label") or command.get("keyword") or os.path.basename(command["keyword_path"])
+            for command in self.command_keywords
+        ]
         self.porcupine = None
         self.audio_stream = None
         self.pyaudio = None
@@ -36,8 +50,24 @@ class WakeWordDetector:
     def initialize(self) -> bool:
         """Initialize Porcupine and audio stream"""
         try:
+            # Heavy native modules are imported here rather than at module load
+            # so the daemon can start its other stages while these load
+            import pvporcupine
+            import pyaudio
+
             # Initialize Porcupine
-            if self.keyword_paths:
+            if self.command_keywords:
+                # Wake words and command keywords share one Porcupine instance,
+                # so built-in keywords are resolved to their bundled model paths
+                paths = list(self.keyword_paths or
+                             [pvporcupine.KEYWORD_PATHS[keyword] for keyword in self.keywords])
+                paths += [command.get("keyword_path") or pvporcupine.KEYWORD_PATHS[command["keyword"]]
+                          for command in self.command_keywords]
+                self.porcupine = pvporcupine.create(
+                    keyword_paths=paths,
+                    sensitivities=[self.sensitivity] * len(paths)
+                )
+            elif self.keyword_paths:
                 self.porcupine = pvporcupine.create(
                     keyword_paths=self.keyword_paths,
                     sensitivities=[self.sensitivity] * len(self.keyword_paths)
@@ -60,7 +90,7 @@ class WakeWordDetector:
                 frames_per_buffer=self.porcupine.frame_length
             )
             
-            logger.info(f"Wake word detector initialized with keywords: {self.keywords}")
+            logger.info(f"Wake word detector initialized with keywords: {self.labels}")
             logger.info(f"Sample rate: {self.porcupine.sample_rate}Hz")
             logger.info(f"Frame length: {self.porcupine.frame_length}")
             
@@ -87,15 +117,20 @@ class WakeWordDetector:
                 self.porcupine.frame_length,
                 exception_on_overflow=False
             )
-            pcm = np.frombuffer(pcm, dtype=np.int16)
-            
-            # Process frame for wake word
-            result = self.porcupine.process(pcm)
             
-            if result >= 0:
-                keyword = self.keywords[result] if result < len(self.keywords) else f"custom_{result}"
-                logger.info(f"Wake word detected: {keyword}")
-                return result
+            # The gate returns nothing during silence, and replays recent audio at onset
+            frames = self.energy_gate.process(pcm) if self.energy_gate else [pcm]
+            for frame in frames:
+                # Reinterpret the raw bytes as int16 samples without copying
+                started = time.perf_counter()
+                result = self.porcupine.process(memoryview(frame).cast('h'))
+                if self.energy_gate:
+                    self.energy_gate.record_inference(time.perf_counter() - started)
+                
+                if result >= 0:
+                    keyword = self.labels[result] if result < len(self.labels) else f"custom_{result}"
+                    logger.info(f"Keyword detected: {keyword}")
+                    return result
                 
             return None
             
@@ -103,27 +138,44 @@ class WakeWordDetector:
             logger.error(f"Error during wake word detection: {e}")
             return None
     
-    def wait_for_wake_word(self) -> bool:
+    def wait_for_keyword(self) -> Optional[int]:
         """
-        Block until wake word is detected
+        Block until a wake word or command keyword is detected
         
         Returns:
-            True if wake word detected, False on error
+            Index of the detected keyword (see command_for), or None on error
         """
         logger.info("Listening for wake word...")
+        if self.energy_gate:
+            self.energy_gate.reset()
         
         try:
             while True:
                 result = self.listen_for_wake_word()
                 if result is not None:
-                    return True
+                    return result
                     
         except KeyboardInterrupt:
             logger.info("Wake word detection interrupted by user")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Error in wake word loop: {e}")
-            return False
+            return None
+    
+    def wait_for_wake_word(self) -> bool:
+        """
+        Block until wake word is detected
+        
+        Returns:
+            True if wake word detected, False on error
+        """
+        return self.wait_for_keyword() is not None
+    
+    def command_for(self, index: int) -> Optional[Dict[str, Any]]:
+        """Return the command mapped to a detected keyword, or None for a wake word"""
+        if index is None or index < self.wake_word_count:
+            return None
+        return self.command_keywords[index - self.wake_word_count]
     
     def cleanup(self):
         """Clean up resources"""
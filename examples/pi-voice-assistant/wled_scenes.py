@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+WLED Scenes
+Scene definitions compiled into WLED presets stored on the controllers, so a
+mood change is one small {"ps": id} message and fades run on the device
+("tt" transition) instead of as a stream of MQTT publishes
+"""
+
+import os
+import json
+import hashlib
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# Assistant scenes live in their own preset range so presets made by staff
+# in the WLED UI (usually 1-99) are never overwritten
+PRESET_RANGE = range(100, 200)
+
+# WLED transitions are in units of 100 ms; 65535 is the largest value accepted
+MAX_TRANSITION_UNITS = 65535
+
+DEFAULT_SCENES = {
+    "romantic": {
+        "preset": 100,
+        "transition": 3.0,
+        "state": {"on": True, "bri": 90, "seg": [{"fx": 88, "pal": 8, "sx": 60, "col": [[255, 60, 80]]}]}
+    },
+    "relaxing": {
+        "preset": 101,
+        "transition": 2.0,
+        "state": {"on": True, "bri": 120, "seg": [{"fx": 2, "sx": 40, "col": [[255, 160, 90]]}]}
+    },
+    "party": {
+        "preset": 102,
+        "transition": 0.5,
+        "state": {"on": True, "bri": 255, "seg": [{"fx": 23, "pal": 6, "sx": 200, "col": [[255, 0, 255]]}]}
+    },
+    "reading": {
+        "preset": 103,
+        "transition": 1.0,
+        "state": {"on": True, "bri": 230, "seg": [{"fx": 0, "col": [[255, 220, 180]]}]}
+    },
+    "movie": {
+        "preset": 104,
+        "transition": 3.0,
+        "state": {"on": True, "bri": 40, "seg": [{"fx": 0, "col": [[60, 80, 255]]}]}
+    },
+    "goodnight": {
+        "preset": 105,
+        "transition": 10.0,
+        "state": {"on": False, "bri": 10, "seg": [{"fx": 0, "col": [[255, 140, 60]]}]}
+    },
+    "wake_up": {
+        "preset": 106,
+        "transition": 30.0,
+        "state": {"on": True, "bri": 200, "seg": [{"fx": 0, "col": [[255, 200, 150]]}]}
+    },
+    "ocean": {
+        "preset": 107,
+        "transition": 2.0,
+        "state": {"on": True, "bri": 150, "seg": [{"fx": 70, "pal": 9, "sx": 80}]}
+    },
+}
+
+
+def load_scenes(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load scene definitions from a JSON file (same shape as DEFAULT_SCENES)
+
+    Raises:
+        ValueError: If a scene is missing its preset or state, or uses a preset outside PRESET_RANGE
+    """
+    with open(path) as f:
+        scenes = json.load(f)
+
+    if not isinstance(scenes, dict):
+        raise ValueError("Scene file must contain an object keyed by scene name")
+
+    presets = {}
+    for name, scene in scenes.items():
+        preset = scene.get("preset")
+        if not isinstance(preset, int) or preset not in PRESET_RANGE:
+            raise ValueError(f"Scene '{name}' needs a preset between {PRESET_RANGE.start} and {PRESET_RANGE.stop - 1}")
+        if preset in presets:
+            raise ValueError(f"Scenes '{presets[preset]}' and '{name}' share preset {preset}")
+        if not isinstance(scene.get("state"), dict):
+            raise ValueError(f"Scene '{name}' needs a 'state' object")
+        presets[preset] = name
+
+    return scenes
+
+
+def transition_units(seconds: Optional[float]) -> Optional[int]:
+    """Seconds -> WLED transition units (100 ms), clamped to the accepted range"""
+    if seconds is None:
+        return None
+    return max(0, min(MAX_TRANSITION_UNITS, int(round(seconds * 10))))
+
+
+def with_transition(state: Dict[str, Any], seconds: Optional[float]) -> Dict[str, Any]:
+    """Add a one-off transition ("tt") to a JSON API state update"""
+    units = transition_units(seconds)
+    if units is None:
+        return state
+    return dict(state, tt=units)
+
+
+def recall_payload(scene: Dict[str, Any], transition: Optional[float] = None) -> str:
+    """JSON API message recalling a scene's stored preset"""
+    seconds = scene.get("transition") if transition is None else transition
+    return json.dumps(with_transition({"ps": scene["preset"]}, seconds), separators=(',', ':'))
+
+
+def apply_payload(scene: Dict[str, Any], transition: Optional[float] = None) -> str:
+    """JSON API message applying a scene's state directly, for controllers without its preset"""
+    seconds = scene.get("transition") if transition is None else transition
+    return json.dumps(with_transition(scene["state"], seconds), separators=(',', ':'))
+
+
+def save_payload(name: str, scene: Dict[str, Any]) -> str:
+    """JSON API message applying a scene's state and storing it as its preset"""
+    state = dict(scene["state"], psave=scene["preset"], n=name, ib=True, sb=True)
+    return json.dumps(state, separators=(',', ':'))
+
+
+def scene_hash(scene: Dict[str, Any]) -> str:
+    """Fingerprint of what gets stored on the controller, to skip unchanged presets"""
+    canonical = json.dumps({"preset": scene["preset"], "state": scene["state"]}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def parse_effect_command(command: str) -> Optional[Dict[str, Any]]:
+    """Convert an MQTT effect command like 'FX=9' into the equivalent JSON API state"""
+    if command.startswith("FX="):
+        try:
+            return {"on": True, "seg": [{"fx": int(command[3:])}]}
+        except ValueError:
+            return None
+    if command in ("ON", "OFF"):
+        return {"on": command == "ON"}
+    return None
+
+
+def offer_scenes(tools: List[Dict[str, Any]], scenes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Tool definitions whose lighting scene parameter lists exactly these scenes
+
+    Works on wrapped ({"function": {...}}) and flat definitions; the scene
+    parameter is removed when there are no scenes. Other tools are returned as is.
+    """
+    offered = []
+    for tool in tools:
+        function = tool.get("function", tool)
+        properties = function.get("parameters", {}).get("properties", {})
+        if "scene" not in properties:
+            offered.append(tool)
+            continue
+        properties = dict(properties)
+        if scenes:
+            properties["scene"] = dict(properties["scene"], enum=list(scenes))
+        else:
+            del properties["scene"]
+        function = dict(function, parameters=dict(function["parameters"], properties=properties))
+        offered.append(dict(tool, function=function) if "function" in tool else function)
+    return offered
+
+
+class PresetSyncManifest:
+    def __init__(self, path: Optional[str] = None):
+        """Remembers which scene versions each controller already stores"""
+        self.path = path
+        self.synced = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.synced = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring preset sync manifest {path}: {e}")
+
+    def is_current(self, room: str, name: str, scene: Dict[str, Any]) -> bool:
+        return self.synced.get(room, {}).get(name) == scene_hash(scene)
+
+    def scene_payload(self, room: str, name: str, scene: Dict[str, Any],
+                      transition: Optional[float] = None) -> str:
+        """
+        Message switching a room to a scene
+
+        A preset recall if the room's controller has the current version stored,
+        otherwise the scene's full state (WLED ignores a recall of a missing
+        preset, and the publish would still look successful).
+        """
+        if self.is_current(room, name, scene):
+            return recall_payload(scene, transition)
+        return apply_payload(scene, transition)
+
+    def mark(self, room: str, name: str, scene: Dict[str, Any]):
+        self.synced.setdefault(room, {})[name] = scene_hash(scene)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.synced, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+async def sync_presets(publish: Callable[[str, str], Awaitable[Any]],
+                       rooms: List[str],
+                       scenes: Dict[str, Dict[str, Any]] = None,
+                       manifest: PresetSyncManifest = None,
+                       force: bool = False,
+                       save_delay: float = 0.5,
+                       concurrency: int = 8) -> Dict[str, Any]:
+    """
+    Store scene presets on many controllers
+
+    Rooms are synced in parallel; presets within a room are written one at a
+    time with a pause, since each psave rewrites presets.json on the
+    controller's flash.
+
+    Args:
+        publish: Coroutine publishing (topic, payload); returns a falsy value or
+            a dict without success on failure
+        rooms: Room identifiers; each controller listens on <room>/api
+        scenes: Scene definitions (default DEFAULT_SCENES)
+        manifest: Skips presets the controller already has
+        force: Write every preset even if the manifest says it is current
+        save_delay: Seconds between preset writes to the same controller
+        concurrency: Rooms synced at once
+
+    Returns:
+        Counts of written, skipped and failed presets, plus failing rooms
+    """
+    scenes = DEFAULT_SCENES if scenes is None else scenes
+    manifest = manifest or PresetSyncManifest()
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {"written": 0, "skipped": 0, "failed": 0, "failed_rooms": []}
+
+    async def sync_room(room: str):
+        async with semaphore:
+            topic = f"{room}/api"
+            for name, scene in scenes.items():
+                if not force and manifest.is_current(room, name, scene):
+                    summary["skipped"] += 1
+                    continue
+                try:
+                    result = await publish(topic, save_payload(name, scene))
+                    ok = result.get("success") if isinstance(result, dict) else bool(result)
+                except Exception as e:
+                    logger.error(f"Preset sync to {room} failed: {e}")
+                    ok = False
+                if not ok:
+                    summary["failed"] += 1
+                    summary["failed_rooms"].append(room)
+                    # Don't keep writing to a controller that isn't taking them
+                    return
+                manifest.mark(room, name, scene)
+                summary["written"] += 1
+                await asyncio.sleep(save_delay)
+
+    await asyncio.gather(*(sync_room(room) for room in rooms))
+    manifest.save()
+    logger.info(f"Preset sync: {summary['written']} written, {summary['skipped']} up to date, "
+                f"{summary['failed']} failed")
+    return summary
+
+
+async def sync_from_environment(rooms: List[str], scenes_file: Optional[str], force: bool) -> Dict[str, Any]:
+    """Sync presets through the MQTT broker when MQTT_BROKER is set, otherwise through MCP"""
+    scenes = load_scenes(scenes_file) if scenes_file else DEFAULT_SCENES
+    manifest = PresetSyncManifest(os.getenv('PRESET_SYNC_MANIFEST', 'preset_sync.json'))
+
+    if os.getenv('MQTT_BROKER'):
+        from mqtt_tools import MQTTHotelController
+        controller = MQTTHotelController(
+            broker=os.getenv('MQTT_BROKER'),
+            port=int(os.getenv('MQTT_PORT', '1883')),
+            username=os.getenv('MQTT_USER'),
+            password=os.getenv('MQTT_PASSWORD')
+        )
+        if not await controller.connect():
+            raise RuntimeError("Could not connect to the MQTT broker")
+        try:
+            return await sync_presets(controller.publish_message, rooms, scenes, manifest, force)
+        finally:
+            await controller.disconnect()
+
+    from mcp_tools import MCPHotelController
+    controller = MCPHotelController(os.getenv('MCP_SERVER_URL', 'https://srv1000332.hstgr.cloud/mcp'))
+
+    async def publish(topic: str, payload: str):
+        return await controller.call_mcp_tool("mqtt_publish", topic=topic, message=payload, qos=1, retain=False)
+
+    return await sync_presets(publish, rooms, scenes, manifest, force)
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Store assistant scenes as WLED presets")
+    parser.add_argument("rooms", nargs="*", help="Rooms to sync (default: ROOM_ID)")
+    parser.add_argument("--scenes", default=os.getenv('SCENES_FILE'),
+                        help="Scene definition JSON file (default: $SCENES_FILE or the built-in scenes)")
+    parser.add_argument("--force", action="store_true", help="Rewrite presets even if already synced")
+    parser.add_argument("--list", action="store_true", help="List scenes and their recall payloads")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.list:
+        for scene_name, definition in (load_scenes(args.scenes) if args.scenes else DEFAULT_SCENES).items():
+            print(f"{scene_name:>10}: preset {definition['preset']}, recall {recall_payload(definition)}")
+    else:
+        print(asyncio.run(sync_from_environment(args.rooms or [os.getenv('ROOM_ID', 'room1')],
+                                                args.scenes, args.force)))